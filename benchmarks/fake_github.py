@@ -0,0 +1,685 @@
+"""
+A local stand-in for the GitHub API, to benchmark the gh_xxx.py scripts offline (no quota burnt).
+
+It serves a made-up classroom organization with N repos, each with the same shape:
+
+    - a main branch with a number of commits (by the student, a teammate and the classroom
+      bot's "Initial commit"), and a "submission" tag on the second to last commit;
+    - an "Autograding" workflow with a few runs, each with one job whose check run has an
+      annotation with the automarking points ({"totalPoints":..,"maxPoints":..});
+    - a "Feedback" issue/PR #1 (in 1 out of FEEDBACK_PR_EVERY repos it is PR #2 instead, to
+      exercise the fallback search over the pull requests).
+
+REST endpoints emulated (as PyGithub calls them), with pagination (per_page/page and Link):
+
+    GET  /rate_limit
+    GET  /repos/{repo}
+    GET  /repos/{repo}/branches, /tags, /git/ref/tags/{tag}
+    GET  /repos/{repo}/commits?sha=&since=&until=, /commits/{sha or branch}
+    GET  /repos/{repo}/commits/{sha}/statuses, /statuses/{sha}
+    GET  /repos/{repo}/stats/contributors
+    GET  /repos/{repo}/actions/workflows, /actions/workflows/{id}, /actions/workflows/{id}/runs
+    POST /repos/{repo}/actions/workflows/{id}/dispatches
+    GET  /repos/{repo}/actions/runs, /actions/runs/{id}, /actions/runs/{id}/jobs
+    DEL  /repos/{repo}/actions/runs/{id}
+    GET  /repos/{repo}/check-runs/{id}, /check-runs/{id}/annotations
+    GET  /repos/{repo}/pulls, /pulls/{number}, /issues/{number}, /issues/{number}/comments
+    POST /repos/{repo}/issues/{number}/comments
+
+GraphQL (POST /graphql) only answers rateLimit (cost 1 per query): the benchmarked scripts are
+REST-only, and any other field gets a GraphQL error, so that a script relying on it fails loudly.
+
+Every response carries the rate-limit headers (X-RateLimit-Limit/Remaining/Used/Reset/Resource)
+of its resource (core or graphql); once the limit is used up in the current window, requests get
+a 403 "API rate limit exceeded" until the window resets. Each request is delayed by a latency
+(plus a random jitter) to emulate the network round trip.
+
+Scripts are pointed to it via GITHUB_API_URL (see utils_gh.API_URL). To run it standalone:
+
+    $ python benchmarks/fake_github.py --repos 1000 --port 8000 --latency 0.05 --csv repos.csv
+    $ GITHUB_API_URL=http://127.0.0.1:8000 python gh_workflow.py jobs repos.csv --name Autograding -t x
+"""
+import csv
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+ORG = "bench-org"
+PREFIX = "p0-warmup"
+NO_COMMITS = 10
+NO_RUNS = 3
+FEEDBACK_PR_EVERY = 20
+WORKFLOW_NAME = "Autograding"
+SUBMISSION_TAG = "submission"
+BOT = "github-classroom[bot]"
+
+RATE_LIMIT = 5000  # calls per window and resource, as GitHub for a user token
+RATE_WINDOW = 3600  # seconds
+PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+START_DATE = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+REPOS_HEADER_CSV = ["NO", "ORG_NAME", "REPO_ID_PREFIX", "REPO_ID_SUFFIX", "REPO_ID", "REPO_URL", "REPO_HTTP"]
+
+
+class NotFound(Exception):
+    pass
+
+
+def iso(date: datetime) -> str:
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_iso(date_str: str) -> datetime:
+    date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def fake_sha(*parts) -> str:
+    return hashlib.sha1("/".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class FakeGitHub:
+    """The data of the fake organization, generated on demand (the same on every call)."""
+
+    def __init__(self, no_repos: int, no_commits=NO_COMMITS, no_runs=NO_RUNS, org=ORG, prefix=PREFIX):
+        self.no_repos = no_repos
+        self.no_commits = no_commits
+        self.no_runs = no_runs
+        self.org = org
+        self.prefix = prefix
+        self.api_url = None  # set when served
+        self.repo_index = {self.repo_name(k).lower(): k for k in range(1, no_repos + 1)}
+
+        self.lock = threading.Lock()
+        self.comments = dict()  # (repo no, issue number) -> list of comments posted
+        self.dispatches = dict()  # repo no -> number of workflow dispatches
+        self.deleted_runs = set()  # (repo no, run id)
+        self.requests = dict()  # endpoint -> number of requests served
+
+    def reset(self):
+        """Forget all the writes (comments, dispatches, deleted runs) and requests served."""
+        with self.lock:
+            self.comments.clear()
+            self.dispatches.clear()
+            self.deleted_runs.clear()
+            self.requests.clear()
+
+    #######################################
+    # Names and CSV of the repos
+    #######################################
+    def student(self, k: int) -> str:
+        return f"student{k:05d}"
+
+    def repo_name(self, k: int) -> str:
+        return f"{self.org}/{self.prefix}-{self.student(k)}"
+
+    def repos_csv(self, csv_file: str):
+        """Write the CSV of the repos, as produced by gh_classroom_collect.py."""
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(REPOS_HEADER_CSV)
+            for k in range(1, self.no_repos + 1):
+                name = self.repo_name(k)
+                writer.writerow(
+                    [k, self.org, self.prefix, self.student(k), name, f"git@github.com:{name}.git", f"https://github.com/{name}"]
+                )
+
+    #######################################
+    # Objects
+    #######################################
+    def user(self, login: str) -> dict:
+        return {
+            "login": login,
+            "id": int(fake_sha(login)[:8], 16),
+            "type": "Bot" if login.endswith("[bot]") else "User",
+            "url": f"{self.api_url}/users/{login}",
+            "html_url": f"https://github.com/{login}",
+        }
+
+    def repo(self, k: int) -> dict:
+        name = self.repo_name(k)
+        return {
+            "id": k,
+            "node_id": f"R_{k}",
+            "name": name.split("/")[1],
+            "full_name": name,
+            "owner": dict(self.user(self.org), type="Organization"),
+            "private": True,
+            "default_branch": "main",
+            "url": f"{self.api_url}/repos/{name}",
+            "html_url": f"https://github.com/{name}",
+            "clone_url": f"https://github.com/{name}.git",
+            "ssh_url": f"git@github.com:{name}.git",
+            "created_at": iso(START_DATE),
+            "updated_at": iso(self.commit_date(self.no_commits - 1)),
+            "pushed_at": iso(self.commit_date(self.no_commits - 1)),
+        }
+
+    def commit_date(self, c: int) -> datetime:
+        return START_DATE + timedelta(hours=6 * c)
+
+    def commit_author(self, k: int, c: int) -> str:
+        if c == 0:
+            return BOT
+        return self.student(k) if c % 3 else f"teammate{k:05d}"
+
+    def commit(self, k: int, c: int, full=False) -> dict:
+        """Commit c (0 is the first one) of repo k; full as in GET commits/{sha} (with stats)."""
+        name = self.repo_name(k)
+        sha = fake_sha(name, c)
+        login = self.commit_author(k, c)
+        git_author = {"name": login, "email": f"{login}@users.noreply.github.com", "date": iso(self.commit_date(c))}
+        data = {
+            "sha": sha,
+            "node_id": f"C_{sha}",
+            "url": f"{self.api_url}/repos/{name}/commits/{sha}",
+            "html_url": f"https://github.com/{name}/commit/{sha}",
+            "commit": {
+                "author": git_author,
+                "committer": git_author,
+                "message": "Initial commit" if c == 0 else f"Work on question {c}\n\nMore details of the change.",
+                "url": f"{self.api_url}/repos/{name}/git/commits/{sha}",
+            },
+            "author": self.user(login),
+            "committer": self.user(login),
+            "parents": [] if c == 0 else [{"sha": fake_sha(name, c - 1), "url": f"{self.api_url}/repos/{name}/commits/{fake_sha(name, c - 1)}"}],
+        }
+        if full:
+            additions, deletions = 10 * c + k % 7, 2 * c
+            data["stats"] = {"additions": additions, "deletions": deletions, "total": additions + deletions}
+            data["files"] = [{"filename": f"q{c}.py", "status": "modified", "additions": additions, "deletions": deletions, "changes": additions + deletions}]
+        return data
+
+    def find_commit(self, k: int, ref: str) -> int:
+        """The commit no of a branch (main), the submission tag or a sha in repo k."""
+        if ref in ("main", "HEAD", "refs/heads/main"):
+            return self.no_commits - 1
+        if ref in (SUBMISSION_TAG, f"refs/tags/{SUBMISSION_TAG}"):
+            return max(self.no_commits - 2, 0)
+        for c in range(self.no_commits):
+            if fake_sha(self.repo_name(k), c).startswith(ref) and len(ref) >= 7:
+                return c
+        raise NotFound()
+
+    def workflow(self, k: int) -> dict:
+        name = self.repo_name(k)
+        wid = 1_000_000 + k
+        return {
+            "id": wid,
+            "node_id": f"W_{wid}",
+            "name": WORKFLOW_NAME,
+            "path": ".github/workflows/classroom.yml",
+            "state": "active",
+            "created_at": iso(START_DATE),
+            "updated_at": iso(START_DATE),
+            "url": f"{self.api_url}/repos/{name}/actions/workflows/{wid}",
+            "html_url": f"https://github.com/{name}/actions/workflows/classroom.yml",
+            "badge_url": f"https://github.com/{name}/workflows/{WORKFLOW_NAME}/badge.svg",
+        }
+
+    def run(self, k: int, r: int) -> dict:
+        """Workflow run r (0 is the first one) of repo k."""
+        name = self.repo_name(k)
+        rid = k * 100 + r
+        date = self.commit_date(self.no_commits - 1) + timedelta(days=r)
+        url = f"{self.api_url}/repos/{name}/actions/runs/{rid}"
+        return {
+            "id": rid,
+            "node_id": f"WR_{rid}",
+            "name": f"{WORKFLOW_NAME} run {r + 1}",
+            "run_number": r + 1,
+            "run_attempt": 1,
+            "event": "workflow_dispatch",
+            "status": "completed",
+            "conclusion": "success",
+            "workflow_id": 1_000_000 + k,
+            "head_branch": "main",
+            "head_sha": fake_sha(name, self.no_commits - 1),
+            "created_at": iso(date),
+            "updated_at": iso(date + timedelta(minutes=2)),
+            "run_started_at": iso(date),
+            "url": url,
+            "html_url": f"https://github.com/{name}/actions/runs/{rid}",
+            "jobs_url": f"{url}/jobs",
+            "logs_url": f"{url}/logs",
+            "check_suite_url": f"{self.api_url}/repos/{name}/check-suites/{rid}",
+            "workflow_url": self.workflow(k)["url"],
+        }
+
+    def runs(self, k: int) -> list:
+        """The (non-deleted) runs of repo k, latest first."""
+        with self.lock:
+            deleted = {rid for (j, rid) in self.deleted_runs if j == k}
+        return [self.run(k, r) for r in reversed(range(self.no_runs)) if k * 100 + r not in deleted]
+
+    def job(self, k: int, rid: int) -> dict:
+        name = self.repo_name(k)
+        run = self.run(k, rid - k * 100)
+        return {
+            "id": rid * 10,
+            "node_id": f"J_{rid * 10}",
+            "run_id": rid,
+            "run_attempt": 1,
+            "name": "run-autograding-tests",
+            "workflow_name": WORKFLOW_NAME,
+            "status": "completed",
+            "conclusion": "success",
+            "head_branch": "main",
+            "head_sha": run["head_sha"],
+            "started_at": run["run_started_at"],
+            "completed_at": run["updated_at"],
+            "created_at": run["created_at"],
+            "url": f"{self.api_url}/repos/{name}/actions/jobs/{rid * 10}",
+            "html_url": f"https://github.com/{name}/actions/runs/{rid}/job/{rid * 10}",
+            "run_url": run["url"],
+            "check_run_url": f"{self.api_url}/repos/{name}/check-runs/{rid * 10}",
+            "steps": [],
+            "labels": ["ubuntu-latest"],
+        }
+
+    def check_run(self, k: int, cid: int) -> dict:
+        name = self.repo_name(k)
+        url = f"{self.api_url}/repos/{name}/check-runs/{cid}"
+        return {
+            "id": cid,
+            "node_id": f"CR_{cid}",
+            "name": "run-autograding-tests",
+            "head_sha": fake_sha(name, self.no_commits - 1),
+            "status": "completed",
+            "conclusion": "success",
+            "started_at": iso(self.commit_date(self.no_commits)),
+            "completed_at": iso(self.commit_date(self.no_commits)),
+            "url": url,
+            "html_url": f"https://github.com/{name}/runs/{cid}",
+            "output": {"title": "Autograding", "summary": "", "annotations_count": 2, "annotations_url": f"{url}/annotations"},
+        }
+
+    def annotations(self, k: int) -> list:
+        points = k % 11 * 10
+        return [
+            {
+                "path": ".github",
+                "start_line": 1,
+                "end_line": 1,
+                "annotation_level": "notice",
+                "title": "Autograding complete",
+                "message": f"Points {points}/100",
+            },
+            {
+                "path": ".github",
+                "start_line": 1,
+                "end_line": 1,
+                "annotation_level": "notice",
+                "title": "Autograding report",
+                "message": json.dumps({"totalPoints": points, "maxPoints": 100}, separators=(",", ":")),
+            },
+        ]
+
+    def feedback_no(self, k: int) -> int:
+        """Number of the Feedback PR of repo k."""
+        return 2 if k % FEEDBACK_PR_EVERY == 0 else 1
+
+    def issue(self, k: int, number: int) -> dict:
+        name = self.repo_name(k)
+        if number not in (1, self.feedback_no(k)):
+            raise NotFound()
+        url = f"{self.api_url}/repos/{name}/issues/{number}"
+        with self.lock:
+            no_comments = len(self.comments.get((k, number), []))
+        return {
+            "id": k * 10 + number,
+            "node_id": f"I_{k * 10 + number}",
+            "number": number,
+            "title": "Feedback" if number == self.feedback_no(k) else "Setup",
+            "state": "open",
+            "user": self.user(BOT),
+            "body": "",
+            "comments": no_comments,
+            "url": url,
+            "html_url": f"https://github.com/{name}/pull/{number}",
+            "comments_url": f"{url}/comments",
+            "created_at": iso(START_DATE),
+            "updated_at": iso(START_DATE),
+            "pull_request": {"url": f"{self.api_url}/repos/{name}/pulls/{number}", "html_url": f"https://github.com/{name}/pull/{number}"},
+        }
+
+    def pull(self, k: int, number: int) -> dict:
+        issue = self.issue(k, number)
+        name = self.repo_name(k)
+        return {
+            "id": issue["id"],
+            "node_id": f"PR_{issue['id']}",
+            "number": number,
+            "title": issue["title"],
+            "state": "open",
+            "user": issue["user"],
+            "url": f"{self.api_url}/repos/{name}/pulls/{number}",
+            "html_url": issue["html_url"],
+            "issue_url": issue["url"],
+            "head": {"ref": "main", "sha": fake_sha(name, self.no_commits - 1)},
+            "base": {"ref": "feedback", "sha": fake_sha(name, 0)},
+            "created_at": iso(START_DATE),
+            "updated_at": iso(START_DATE),
+        }
+
+    def comment(self, k: int, number: int, no: int, body: str) -> dict:
+        name = self.repo_name(k)
+        cid = (k * 10 + number) * 1000 + no
+        return {
+            "id": cid,
+            "node_id": f"IC_{cid}",
+            "body": body,
+            "user": self.user(self.org),
+            "url": f"{self.api_url}/repos/{name}/issues/comments/{cid}",
+            "html_url": f"https://github.com/{name}/pull/{number}#issuecomment-{cid}",
+            "issue_url": f"{self.api_url}/repos/{name}/issues/{number}",
+            "created_at": iso(datetime.now(timezone.utc)),
+            "updated_at": iso(datetime.now(timezone.utc)),
+        }
+
+    #######################################
+    # Repo endpoints
+    #######################################
+    def repo_get(self, k: int, method: str, rest: str, query: dict, body: dict):
+        """
+        Answer a request on a repo endpoint.
+
+        :return: (status, data, list item) where list item is the key of the list in data for
+            wrapped lists (e.g., workflow_runs), "" for plain lists and None if not a list
+        """
+        name = self.repo_name(k)
+        commit_ref = lambda c: {"sha": fake_sha(name, c), "url": f"{self.api_url}/repos/{name}/commits/{fake_sha(name, c)}"}
+
+        if rest == "" and method == "GET":
+            return 200, self.repo(k), None
+        if rest == "/branches":
+            return 200, [{"name": "main", "commit": commit_ref(self.no_commits - 1), "protected": False}], ""
+        if rest == "/tags":
+            c = self.find_commit(k, SUBMISSION_TAG)
+            return 200, [{"name": SUBMISSION_TAG, "commit": commit_ref(c), "node_id": f"T_{k}",
+                          "zipball_url": f"{self.api_url}/repos/{name}/zipball/{SUBMISSION_TAG}",
+                          "tarball_url": f"{self.api_url}/repos/{name}/tarball/{SUBMISSION_TAG}"}], ""
+        if match := re.fullmatch(r"/git/ref/(tags/.+)", rest):
+            c = self.find_commit(k, f"refs/{match.group(1)}")
+            return 200, {"ref": f"refs/{match.group(1)}", "url": f"{self.api_url}/repos/{name}/git/{match.group(1)}",
+                         "object": dict(commit_ref(c), type="commit")}, None
+        if rest == "/commits":
+            last = self.find_commit(k, query.get("sha", "main"))
+            since = parse_iso(query["since"]) if "since" in query else None
+            until = parse_iso(query["until"]) if "until" in query else None
+            commits = [
+                self.commit(k, c)
+                for c in reversed(range(last + 1))
+                if (since is None or self.commit_date(c) >= since) and (until is None or self.commit_date(c) <= until)
+            ]
+            return 200, commits, ""
+        if match := re.fullmatch(r"/commits/([^/]+)/statuses|/statuses/([^/]+)", rest):
+            self.find_commit(k, match.group(1) or match.group(2))
+            return 200, [], ""
+        if match := re.fullmatch(r"/commits/([^/]+)", rest):
+            return 200, self.commit(k, self.find_commit(k, match.group(1)), full=True), None
+        if rest == "/stats/contributors":
+            totals = dict()
+            for c in range(self.no_commits):
+                totals[self.commit_author(k, c)] = totals.get(self.commit_author(k, c), 0) + 1
+            return 200, [{"author": self.user(a), "total": n, "weeks": []} for a, n in totals.items()], ""
+
+        # workflows, runs and jobs
+        wid = 1_000_000 + k
+        if rest == "/actions/workflows":
+            return 200, {"total_count": 1, "workflows": [self.workflow(k)]}, "workflows"
+        if rest == f"/actions/workflows/{wid}":
+            return 200, self.workflow(k), None
+        if rest == f"/actions/workflows/{wid}/dispatches" and method == "POST":
+            with self.lock:
+                self.dispatches[k] = self.dispatches.get(k, 0) + 1
+            return 204, None, None
+        if rest in ("/actions/runs", f"/actions/workflows/{wid}/runs"):
+            runs = self.runs(k)
+            return 200, {"total_count": len(runs), "workflow_runs": runs}, "workflow_runs"
+        if match := re.fullmatch(r"/actions/runs/(\d+)(/jobs)?", rest):
+            rid = int(match.group(1))
+            if rid not in [r["id"] for r in self.runs(k)]:
+                raise NotFound()
+            if match.group(2):
+                return 200, {"total_count": 1, "jobs": [self.job(k, rid)]}, "jobs"
+            if method == "DELETE":
+                with self.lock:
+                    self.deleted_runs.add((k, rid))
+                return 204, None, None
+            return 200, self.run(k, rid - k * 100), None
+        if match := re.fullmatch(r"/check-runs/(\d+)(/annotations)?", rest):
+            cid = int(match.group(1))
+            if cid // 10 not in [r["id"] for r in self.runs(k)]:
+                raise NotFound()
+            if match.group(2):
+                return 200, self.annotations(k), ""
+            return 200, self.check_run(k, cid), None
+
+        # issues, PRs and comments
+        if rest == "/pulls":
+            return 200, [self.pull(k, self.feedback_no(k))], ""
+        if match := re.fullmatch(r"/pulls/(\d+)", rest):
+            return 200, self.pull(k, int(match.group(1))), None
+        if match := re.fullmatch(r"/issues/(\d+)", rest):
+            return 200, self.issue(k, int(match.group(1))), None
+        if match := re.fullmatch(r"/issues/(\d+)/comments", rest):
+            number = int(match.group(1))
+            self.issue(k, number)
+            if method == "POST":
+                with self.lock:
+                    comments = self.comments.setdefault((k, number), [])
+                    comment = self.comment(k, number, len(comments) + 1, (body or {}).get("body", ""))
+                    comments.append(comment)
+                return 201, comment, None
+            with self.lock:
+                return 200, list(self.comments.get((k, number), [])), ""
+        raise NotFound()
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """HTTP server of a FakeGitHub, with rate limits and latency."""
+
+    daemon_threads = True
+
+    def __init__(self, fake: FakeGitHub, port=0, latency=0.0, jitter=0.0, rate_limit=RATE_LIMIT, rate_window=RATE_WINDOW):
+        super().__init__(("127.0.0.1", port), FakeGitHubHandler)
+        self.fake = fake
+        self.fake.api_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rate_lock = threading.Lock()
+        self.reset_quota()
+
+    @property
+    def url(self) -> str:
+        return self.fake.api_url
+
+    def reset_quota(self):
+        with self.rate_lock:
+            self.window_end = int(time.time()) + self.rate_window
+            self.used = {"core": 0, "graphql": 0}
+
+    def use_quota(self, resource: str, cost=1) -> tuple:
+        """Use quota of a resource: (allowed, rate-limit headers)."""
+        with self.rate_lock:
+            if time.time() >= self.window_end:
+                self.window_end = int(time.time()) + self.rate_window
+                self.used = {"core": 0, "graphql": 0}
+            allowed = self.used[resource] + cost <= self.rate_limit
+            if allowed:
+                self.used[resource] += cost
+            used = self.used[resource]
+        return allowed, {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(self.rate_limit - used),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": str(self.window_end),
+            "X-RateLimit-Resource": resource,
+        }
+
+    def rate(self, resource: str) -> dict:
+        with self.rate_lock:
+            used = self.used[resource]
+        return {"limit": self.rate_limit, "used": used, "remaining": self.rate_limit - used, "reset": self.window_end}
+
+    def start(self) -> threading.Thread:
+        """Serve in a background thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as requests sessions do with GitHub
+    disable_nagle_algorithm = True  # no delayed ACK waits between the headers and body
+    server: FakeGitHubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def do_PATCH(self):
+        self.handle_api("PATCH")
+
+    def do_PUT(self):
+        self.handle_api("PUT")
+
+    def do_DELETE(self):
+        self.handle_api("DELETE")
+
+    def send_json(self, status: int, data, headers: dict = None):
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_api(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        body = json.loads(raw_body) if raw_body else None
+
+        server = self.server
+        fake = server.fake
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if "Authorization" not in self.headers:
+            return self.send_json(401, {"message": "Requires authentication"})
+
+        # rate limit status does not count against the quota
+        if path == "/rate_limit":
+            _, headers = server.use_quota("core", cost=0)
+            core, graphql = server.rate("core"), server.rate("graphql")
+            return self.send_json(200, {"resources": {"core": core, "graphql": graphql}, "rate": core}, headers)
+
+        resource = "graphql" if path == "/graphql" else "core"
+        allowed, headers = server.use_quota(resource)
+        endpoint = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/{repo}", path)
+        endpoint = re.sub(r"/\d+(?=/|$)", "/{id}", re.sub(r"/[0-9a-f]{40}(?=/|$)", "/{sha}", endpoint))
+        with fake.lock:
+            fake.requests[f"{method} {endpoint}"] = fake.requests.get(f"{method} {endpoint}", 0) + 1
+        if not allowed:
+            return self.send_json(
+                403,
+                {"message": "API rate limit exceeded for user.", "documentation_url": "https://docs.github.com/rest/rate-limit"},
+                headers,
+            )
+
+        if path == "/graphql":
+            return self.send_json(200, self.graphql((body or {}).get("query", "")), headers)
+
+        match = re.fullmatch(r"/repos/([^/]+/[^/]+)(/.*)?", path)
+        k = fake.repo_index.get(match.group(1).lower()) if match else None
+        if k is None:
+            return self.send_json(404, {"message": "Not Found"}, headers)
+        try:
+            status, data, list_item = fake.repo_get(k, method, match.group(2) or "", query, body)
+        except NotFound:
+            return self.send_json(404, {"message": "Not Found"}, headers)
+
+        if list_item is not None and status == 200:
+            data, link = self.paginate(url, query, data, list_item)
+            if link:
+                headers["Link"] = link
+        self.send_json(status, data, headers)
+
+    def paginate(self, url, query: dict, data, list_item: str) -> tuple:
+        """The page asked (per_page/page) of a list, and its Link header."""
+        items = data if list_item == "" else data[list_item]
+        per_page = min(int(query.get("per_page", PER_PAGE)), MAX_PER_PAGE)
+        page = int(query.get("page", 1))
+        last_page = max((len(items) + per_page - 1) // per_page, 1)
+        page_items = items[(page - 1) * per_page : page * per_page]
+        data = page_items if list_item == "" else dict(data, **{list_item: page_items})
+
+        page_url = lambda p: f"{self.server.url}{url.path}?{urlencode(dict(query, per_page=per_page, page=p))}"
+        links = []
+        if page < last_page:
+            links.append(f'<{page_url(page + 1)}>; rel="next"')
+            links.append(f'<{page_url(last_page)}>; rel="last"')
+        if page > 1:
+            links.append(f'<{page_url(page - 1)}>; rel="prev"')
+            links.append(f'<{page_url(1)}>; rel="first"')
+        return data, ", ".join(links)
+
+    def graphql(self, query: str) -> dict:
+        """Only the rateLimit field is supported."""
+        fields = re.findall(r"[{\s]([A-Za-z_]\w*)\s*(?:\([^)]*\))?\s*{", query.split("{", 1)[-1])
+        if fields and fields[0] == "rateLimit":
+            rate = self.server.rate("graphql")
+            reset = iso(datetime.fromtimestamp(rate["reset"], timezone.utc))
+            return {"data": {"rateLimit": {"limit": rate["limit"], "cost": 1, "remaining": rate["remaining"], "used": rate["used"], "resetAt": reset}}}
+        return {"data": None, "errors": [{"message": "Fake GitHub API only supports the rateLimit field in GraphQL queries."}]}
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Serve a fake GitHub API for offline benchmarks.")
+    parser.add_argument("--repos", type=int, default=100, help="Number of repos in the organization (Default: %(default)s).")
+    parser.add_argument("--commits", type=int, default=NO_COMMITS, help="Number of commits per repo (Default: %(default)s).")
+    parser.add_argument("--runs", type=int, default=NO_RUNS, help="Number of workflow runs per repo (Default: %(default)s).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to serve in (Default: %(default)s).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency of each request (Default: %(default)s).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Max random seconds added to the latency (Default: %(default)s).")
+    parser.add_argument("--rate-limit", type=int, default=RATE_LIMIT, help="Requests per window and resource (Default: %(default)s).")
+    parser.add_argument("--rate-window", type=int, default=RATE_WINDOW, help="Seconds of the rate-limit window (Default: %(default)s).")
+    parser.add_argument("--csv", help="Write the CSV of the repos to this file.")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.repos, no_commits=args.commits, no_runs=args.runs)
+    server = FakeGitHubServer(
+        fake, port=args.port, latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit, rate_window=args.rate_window
+    )
+    if args.csv:
+        fake.repos_csv(args.csv)
+        print(f"Repos CSV written to {args.csv}")
+    print(f"Fake GitHub API with {args.repos} repos serving at {server.url} (set GITHUB_API_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
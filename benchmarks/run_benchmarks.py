@@ -0,0 +1,304 @@
+"""
+Offline benchmarks of the gh_xxx.py scripts against a fake GitHub API (fake_github.py).
+
+For each organization size (100/1,000/5,000 repos by default), a fake GitHub API is served
+locally and each benchmarked script is run on all its repos, as a separate process with the
+run-scoped instrumentation of utils_prof on (RUN_STATS) and pointed to the fake API via
+GITHUB_API_URL. The run stats of each script are collected into a table (wall time, API calls
+per repo, latency percentiles, quota used, sleeps, time not in API calls) and a CSV file.
+
+Benchmarks:
+
+    - workflow-jobs: gh_workflow.py jobs (workflow -> last run -> job -> check-run annotations)
+    - workflow-start: gh_workflow.py start (dispatch the workflow on the head of main)
+    - authors: gh_authors_collect.py (all commits of all branches, with their stats)
+    - post-result: gh_pr_post_result.py (post report + feedback to the Feedback PR)
+
+The fixed pauses the scripts make between repos (SLEEP_TIME every SLEEP_RATE repos) and the
+pacing of PyGithub between requests are not work and would dominate the wall time (~40 minutes
+of pauses alone for 5,000 repos), so they are skipped (but still counted in SLEEPS) unless
+--keep-sleeps is given.
+
+Each run happens in its own folder <output>/<size>/<benchmark>, with the inputs generated for
+it, the output files of the script, its log (run.log) and its stats (run-stats-*.json).
+
+Example:
+
+    $ python benchmarks/run_benchmarks.py --sizes 100 1000 --latency 0.05 --jitter 0.02
+
+    $ python benchmarks/run_benchmarks.py --sizes 5000 --benchmarks authors --profile
+"""
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import datetime
+from pathlib import Path
+
+from fake_github import FakeGitHub, FakeGitHubServer, NO_COMMITS, NO_RUNS, WORKFLOW_NAME
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+SIZES = [100, 1000, 5000]
+LATENCY = 0.05  # seconds per request: a typical round trip to api.github.com
+JITTER = 0.02
+RATE_LIMIT = 1_000_000  # high enough so a benchmark never waits for the rate-limit window
+TOKEN = "fake-token"
+TOKEN_FILE = "token.txt"  # for scripts taking a token file (-t/--token-file)
+
+NOW_TXT = datetime.now().strftime("%Y-%m-%d_%H-%M")
+
+# run a script as __main__, with the scripts folder in the path (and time.sleep() skipped)
+LAUNCHER = """
+import runpy, sys, time
+sys.path.insert(0, sys.argv[1])
+if sys.argv[2] == "skip":
+    time.sleep = lambda seconds: None
+sys.argv = sys.argv[3:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+RESULTS_HEADER_CSV = [
+    "BENCHMARK",
+    "REPOS",
+    "EXIT",
+    "WALL_TIME",
+    "API_CALLS",
+    "API_CALLS_PER_REPO",
+    "API_TIME",
+    "API_P50",
+    "API_P95",
+    "QUOTA_USED",
+    "SLEEPS",
+    "OTHER_TIME",
+    "HTTP_ERRORS",
+]
+
+FEEDBACK_CONFIG = '''
+FEEDBACK_REPORT_BEFORE = "Find below the report of the automarker."
+FEEDBACK_REPORT_AFTER = None
+
+
+def result_feedback(mapping):
+    return f"| Mark | Feedback |\\n|---|---|\\n| {mapping['MARK']} | {mapping['FEEDBACK']} |"
+
+
+def check_submission(repo_id, mapping, batch, logger):
+    return None, False, None
+'''
+
+REPORT_TEXT = "".join(f"Test {t:02d}: {'PASS' if t % 4 else 'FAIL'} ({t % 4} points)\n" for t in range(1, 41))
+
+
+def inputs_repos(fake: FakeGitHub, run_dir: Path):
+    fake.repos_csv(run_dir / "repos.csv")
+    (run_dir / TOKEN_FILE).write_text(TOKEN)
+
+
+def inputs_post_result(fake: FakeGitHub, run_dir: Path):
+    """Marking CSV, report builder config and one automarker report per repo."""
+    fake.repos_csv(run_dir / "repos.csv")
+    (run_dir / "feedback.py").write_text(FEEDBACK_CONFIG)
+    reports_dir = run_dir / "reports"
+    reports_dir.mkdir(exist_ok=True)
+    with open(run_dir / "marking.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["GHU", "BATCH", "MARK", "FEEDBACK"])
+        for k in range(1, fake.no_repos + 1):
+            writer.writerow([fake.student(k), 1, k % 100, "Well done"])
+            (reports_dir / f"{fake.student(k)}.txt").write_text(REPORT_TEXT)
+
+
+# benchmark -> (script, arguments, function to generate its inputs in the run folder)
+BENCHMARKS = {
+    "workflow-jobs": ("gh_workflow.py", ["jobs", "repos.csv", "--name", WORKFLOW_NAME, "-t", TOKEN_FILE], inputs_repos),
+    "workflow-start": ("gh_workflow.py", ["start", "repos.csv", "--name", WORKFLOW_NAME, "-t", TOKEN_FILE], inputs_repos),
+    "authors": ("gh_authors_collect.py", ["repos.csv", "authors.csv", "-t", TOKEN], inputs_repos),
+    "post-result": (
+        "gh_pr_post_result.py",
+        ["repos.csv", "marking.csv", "feedback.py", "reports", "-t", TOKEN],
+        inputs_post_result,
+    ),
+}
+
+
+def run_benchmark(name: str, server: FakeGitHubServer, run_dir: Path, args) -> dict:
+    """
+    Run a benchmark script against the fake API, in its own folder.
+
+    :return: the results row of the run (see RESULTS_HEADER_CSV)
+    """
+    fake = server.fake
+    script, script_args, make_inputs = BENCHMARKS[name]
+    run_dir.mkdir(parents=True, exist_ok=True)
+    make_inputs(fake, run_dir)
+    fake.reset()
+    server.reset_quota()
+
+    env = dict(os.environ, GITHUB_API_URL=server.url, RUN_STATS="1")
+    env.pop("GH_TOKEN", None)
+    env.pop("GHTOKEN", None)
+    if args.profile:
+        env["RUN_PROFILE"] = "profile.prof"
+    command = [
+        sys.executable,
+        "-c",
+        LAUNCHER,
+        str(REPO_DIR),
+        "keep" if args.keep_sleeps else "skip",
+        str(REPO_DIR / script),
+        *script_args,
+    ]
+    start = time.perf_counter()
+    with open(run_dir / "run.log", "w") as log:
+        try:
+            exit_code = subprocess.run(command, cwd=run_dir, env=env, stdout=log, stderr=subprocess.STDOUT, timeout=args.timeout).returncode
+        except subprocess.TimeoutExpired:
+            exit_code = "timeout"
+    elapsed = time.perf_counter() - start
+
+    row = {"BENCHMARK": name, "REPOS": fake.no_repos, "EXIT": exit_code, "WALL_TIME": round(elapsed, 3)}
+    stats_files = sorted(run_dir.glob("run-stats-*.json"))
+    if not stats_files:
+        print(f"[ERROR] {name} ({fake.no_repos} repos): no run stats written, see {run_dir / 'run.log'}")
+        return row
+
+    with open(stats_files[-1]) as f:
+        stats = json.load(f)
+    api = stats["categories"].get("api", {"count": 0, "total": 0, "p50": None, "p95": None})
+    row.update(
+        {
+            "WALL_TIME": stats["wall_time"],
+            "API_CALLS": api["count"],
+            "API_CALLS_PER_REPO": round(api["count"] / fake.no_repos, 2),
+            "API_TIME": api["total"],
+            "API_P50": api["p50"],
+            "API_P95": api["p95"],
+            "QUOTA_USED": sum(q["used"] for q in stats["quota_used"].values()),
+            "SLEEPS": stats["categories"].get("sleep", {}).get("count", 0),
+            "OTHER_TIME": stats["other_time"],
+            "HTTP_ERRORS": sum(stats["http_errors"].values()),
+        }
+    )
+    served = sum(fake.requests.values())
+    if served != api["count"]:
+        print(f"[WARNING] {name} ({fake.no_repos} repos): {served} requests served but {api['count']} timed")
+    return row
+
+
+def print_table(rows: list):
+    columns = [c for c in RESULTS_HEADER_CSV if any(c in r for r in rows)]
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the GitHub scripts offline, against a local fake GitHub API.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=SIZES,
+        metavar="INT",
+        help="Number of repos of each benchmark run (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help="Benchmarks to run (Default: all).",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=LATENCY,
+        help="Seconds of latency of each API request (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=JITTER,
+        help="Max random seconds added to the latency of each request (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=RATE_LIMIT,
+        help="API requests allowed per rate-limit window; e.g., 5000 to see how the scripts cope (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rate-window",
+        type=int,
+        default=3600,
+        help="Seconds of the rate-limit window (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--commits",
+        type=int,
+        default=NO_COMMITS,
+        help="Number of commits in each repo (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=NO_RUNS,
+        help="Number of workflow runs in each repo (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--keep-sleeps",
+        action="store_true",
+        help="Do not skip the pauses of the scripts between repos (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Also write a cProfile of each run (profile.prof in its folder) (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=3 * 3600,
+        help="Seconds before a benchmark run is stopped (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path(f"benchmarks-{NOW_TXT}"),
+        help="Folder for the runs and results (Default: %(default)s).",
+    )
+    args = parser.parse_args()
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for size in args.sizes:
+        fake = FakeGitHub(size, no_commits=args.commits, no_runs=args.runs)
+        server = FakeGitHubServer(
+            fake, latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit, rate_window=args.rate_window
+        )
+        server.start()
+        print(f"Fake GitHub API with {size} repos at {server.url} (latency {args.latency}s + {args.jitter}s jitter)")
+        for name in args.benchmarks:
+            print(f"Running {name} on {size} repos...")
+            row = run_benchmark(name, server, args.output.resolve() / str(size) / name, args)
+            print(f"\t exit {row['EXIT']} - wall time {row['WALL_TIME']}s - {row.get('API_CALLS', '?')} API calls")
+            rows.append(row)
+        server.shutdown()
+        server.server_close()
+
+    print()
+    print_table(rows)
+    results_csv = args.output / "results.csv"
+    with open(results_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULTS_HEADER_CSV)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nResults written to {results_csv}")
+
+
+if __name__ == "__main__":
+    main()
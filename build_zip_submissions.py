@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Build one zip file per submission (Python replacement of build-zip-submissions.sh).
+
+For each submission folder in <submissions>, the files in its <project> subfolder are
+zipped (with paths junked, as `zip -j` does) into <output>/<submission>.zip.
+
+Zips are built in parallel and a zip is only rebuilt when the content of its source
+tree changed since the last build (the hash of each tree is kept in <output>/.zip_hashes.json).
+
+e.g.:
+
+    $ python build_zip_submissions.py git-submissions-p4 pacman zips
+
+    or, store-only (no compression) and keeping the subfolders of the project:
+
+    $ python build_zip_submissions.py git-submissions-p4 pacman zips --store --recursive
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+HASHES_FILE = ".zip_hashes.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Build a zip file for each submission with the files of a project folder inside it."
+    )
+    parser.add_argument(
+        "submissions",
+        type=Path,
+        help="Folder containing one subfolder per (non-zipped) submission.",
+    )
+    parser.add_argument(
+        "project",
+        help="Folder inside each submission where the project of interest is located ('.' for the whole submission).",
+    )
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="Folder where zip files will be saved.",
+    )
+    parser.add_argument(
+        "-l", "--level",
+        type=int,
+        default=6,
+        choices=range(0, 10),
+        metavar="[0-9]",
+        help="Compression level (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Store files without compression (fastest).",
+    )
+    parser.add_argument(
+        "-r", "--recursive",
+        action="store_true",
+        help="Include files in subfolders, keeping their path relative to the project folder (default: only top-level files, paths junked).",
+    )
+    parser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="Rebuild all zips, even if their source tree has not changed.",
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of zips to build in parallel (default: %(default)s).",
+    )
+    return parser.parse_args()
+
+
+def source_files(project_dir: Path, recursive: bool) -> list:
+    """Files to zip from the project folder, as (path, name in zip) sorted by name."""
+    if recursive:
+        files = [p for p in project_dir.rglob("*") if p.is_file()]
+        return sorted((p, p.relative_to(project_dir).as_posix()) for p in files)
+    return sorted((p, p.name) for p in project_dir.iterdir() if p.is_file())
+
+
+def tree_hash(files: list, settings: str) -> str:
+    """Hash of the names and contents of the files to zip (and the zip settings used)."""
+    sha = hashlib.sha256(settings.encode())
+    for path, arcname in files:
+        sha.update(arcname.encode() + b"\0")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def build_zip(files: list, zip_file: Path, store: bool, level: int):
+    """Build the zip file (via a temporary file, so a failed build leaves no broken zip)."""
+    compression = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED
+    tmp_file = zip_file.with_name(zip_file.name + ".tmp")
+    with zipfile.ZipFile(tmp_file, "w", compression=compression, compresslevel=None if store else level) as zf:
+        for path, arcname in files:
+            zf.write(path, arcname)
+    os.replace(tmp_file, zip_file)
+
+
+def process_submission(submission_dir: Path, project: str, zip_file: Path, store: bool, level: int,
+                       recursive: bool, old_hash: str):
+    """Zip one submission if its source tree changed (run in a worker process).
+
+    :return: status (built, unchanged, missing) and the hash of the source tree
+    """
+    project_dir = submission_dir / project
+    if not project_dir.is_dir():
+        return "missing", old_hash
+    files = source_files(project_dir, recursive)
+    new_hash = tree_hash(files, f"{store}:{level}:{recursive}")
+    if new_hash == old_hash and zip_file.exists():
+        return "unchanged", new_hash
+    build_zip(files, zip_file, store, level)
+    return "built", new_hash
+
+
+def main():
+    args = parse_args()
+
+    submissions_dir = args.submissions.resolve()
+    output_dir = args.output.resolve()
+    if not submissions_dir.is_dir():
+        raise SystemExit(f"Submissions directory not found: {submissions_dir}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    submission_dirs = sorted(p for p in submissions_dir.iterdir() if p.is_dir())
+    if not submission_dirs:
+        print("No submission folders found. Nothing to do.")
+        return
+
+    hashes_file = output_dir / HASHES_FILE
+    hashes = json.loads(hashes_file.read_text()) if hashes_file.exists() and not args.force else {}
+
+    counts = {"built": 0, "unchanged": 0, "missing": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                process_submission,
+                d,
+                args.project,
+                output_dir / f"{d.name}.zip",
+                args.store,
+                args.level,
+                args.recursive,
+                hashes.get(d.name),
+            ): d.name
+            for d in submission_dirs
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                status, new_hash = future.result()
+            except Exception as e:
+                print(f"[ERROR] {name}: {type(e).__name__} ({e})")
+                counts["failed"] += 1
+                continue
+            counts[status] += 1
+            if new_hash is not None:
+                hashes[name] = new_hash
+            if status == "built":
+                print(f"[OK] {name}: zipped into '{output_dir / f'{name}.zip'}'")
+            elif status == "unchanged":
+                print(f"[SKIP] {name}: unchanged since last build")
+            else:
+                print(f"[SKIP] {name}: no folder '{args.project}' in submission")
+
+    hashes_file.write_text(json.dumps(hashes, indent=4, sort_keys=True))
+    print(
+        f"\nDone: {counts['built']} built, {counts['unchanged']} unchanged, "
+        f"{counts['missing']} missing, {counts['failed']} failed."
+    )
+
+
+if __name__ == "__main__":
+    main()
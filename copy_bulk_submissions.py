@@ -8,12 +8,22 @@ e.g.:
     or
 
     $ python copy_bulk_submissions.py asp-automarker.git/results/idm26/01-slots-f1 submissions marking/test-01
+
+    or, to only copy what changed since a previous run (hardlinking files when possible):
+
+    $ python copy_bulk_submissions.py asp-automarker.git/results/idm26/01-slots-f1 submissions marking --sync --link hardlink
 """
 
 import argparse
+import hashlib
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+FICLONE = 0x40049409  # Linux ioctl to reflink (copy-on-write clone) a file
+CHUNK_SIZE = 1024 * 1024
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -38,9 +48,145 @@ def parse_args():
         action="store_true",
         help="Preserve basename of the result folder.",
     )
+    parser.add_argument(
+        "-s", "--sync",
+        action="store_true",
+        help="Incremental sync: only copy changed files into existing destinations (and delete stale ones), no prompting.",
+    )
+    parser.add_argument(
+        "-c", "--checksum",
+        action="store_true",
+        help="In sync mode, compare files by content hash instead of size and modification time.",
+    )
+    parser.add_argument(
+        "-l", "--link",
+        choices=["copy", "hardlink", "reflink"],
+        default="copy",
+        help="How to create files in sync mode; falls back to copy if the filesystem does not allow it (default: %(default)s). "
+        "Note hardlinked files share content with the results folder.",
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=8,
+        help="Number of submissions to sync in parallel (default: %(default)s).",
+    )
     return parser.parse_args()
 
 
+def file_hash(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def is_same_file(src: Path, dst: Path, checksum: bool) -> bool:
+    """Check if dst is already up to date with src (same size and mtime, or same content)."""
+    if not dst.is_file() or dst.is_symlink():
+        return False
+    if os.path.samefile(src, dst):  # hardlinked in a previous sync
+        return True
+    src_stat, dst_stat = src.stat(), dst.stat()
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if checksum:
+        return file_hash(src) == file_hash(dst)
+    return int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+
+
+def reflink(src: Path, dst: Path):
+    """Clone src into dst sharing its data blocks (copy-on-write), if the filesystem allows it."""
+    import fcntl  # not available on Windows
+
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        dst.unlink(missing_ok=True)
+        raise
+    shutil.copystat(src, dst)
+
+
+def place_file(src: Path, dst: Path, link: str):
+    """Create dst from src by hardlink, reflink or copy (falling back to copy)."""
+    # never write into an existing dst: it may be hardlinked to an older result
+    dst.unlink(missing_ok=True)
+    try:
+        if link == "hardlink":
+            os.link(src, dst)
+            return
+        if link == "reflink":
+            reflink(src, dst)
+            return
+    except (OSError, ImportError):
+        pass  # e.g., cross-device link or no reflink support
+    shutil.copy2(src, dst)
+
+
+def sync_folder(src_dir: Path, dest_dir: Path, checksum=False, link="copy") -> dict:
+    """
+    Make dest_dir a copy of src_dir, only touching the files that differ.
+
+    :return: number of files updated, unchanged and removed
+    """
+    counts = {"updated": 0, "unchanged": 0, "removed": 0}
+    expected = set()
+    for root, dirs, files in os.walk(src_dir):
+        rel_root = Path(root).relative_to(src_dir)
+        (dest_dir / rel_root).mkdir(parents=True, exist_ok=True)
+        expected.add(rel_root)
+        for name in files:
+            rel = rel_root / name
+            expected.add(rel)
+            src, dst = src_dir / rel, dest_dir / rel
+            if dst.is_dir() and not dst.is_symlink():
+                shutil.rmtree(dst)
+            if is_same_file(src, dst, checksum):
+                counts["unchanged"] += 1
+            else:
+                place_file(src, dst, link)
+                counts["updated"] += 1
+
+    # remove what is not in the results anymore (deepest first)
+    for root, dirs, files in os.walk(dest_dir, topdown=False):
+        rel_root = Path(root).relative_to(dest_dir)
+        for name in files + dirs:
+            rel = rel_root / name
+            if rel not in expected:
+                path = dest_dir / rel
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+                counts["removed"] += 1
+    return counts
+
+
+def sync_all(pairs: list, checksum: bool, link: str, workers: int) -> int:
+    """Sync each (result folder, destination) pair in parallel; return number of folders synced."""
+    synced = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(sync_folder, result_folder, dest, checksum, link): result_folder.name
+            for result_folder, dest in pairs
+        }
+        for future in as_completed(futures):
+            submission_name = futures[future]
+            try:
+                counts = future.result()
+            except Exception as e:
+                print(f"[ERROR] {submission_name}: {type(e).__name__} ({e})")
+                continue
+            print(
+                f"[SYNC] {submission_name}: {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged, {counts['removed']} removed"
+            )
+            synced += 1
+    return synced
+
+
 def main():
     args = parse_args()
 
@@ -64,6 +210,7 @@ def main():
     skipped = 0
     overwrite_all = False
     skip_all = False
+    to_sync = []
 
     for result_folder in result_folders:
         submission_name = result_folder.name
@@ -76,6 +223,10 @@ def main():
 
         dest = submission_dir / dest_folder
 
+        if args.sync:
+            to_sync.append((result_folder, dest))
+            continue
+
         if dest.exists():
             if skip_all:
                 print(f"[SKIP] {submission_name}: '{dest}' already exists (skipping all).")
@@ -97,6 +248,9 @@ def main():
         shutil.copytree(result_folder, dest)
         copied += 1
 
+    if to_sync:
+        copied += sync_all(to_sync, args.checksum, args.link, args.workers)
+
     print(f"\nDone: {copied} copied, {skipped} skipped.")
 
 
@@ -1,10 +1,14 @@
 import argparse
+import hashlib
+import json
 import os
 import shutil
 import sys
 import zipfile
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
 
 
 # logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.DEBUG, datefmt='%a, %d %b %Y %H:%M:%S')
@@ -14,8 +18,110 @@ logging.basicConfig(format='%(asctime)s %(levelname)-8s %(message)s',
 
 """
 This script takes a list of zip files submitted (sXXXXXX_2017-03-25T10:35:06.132000+11:00) and unzips its content into XXXXXX
+
+Archives are expanded in parallel (one process per archive) into a temporary folder that
+replaces the student folder only when extraction succeeds. Archives exceeding the limits on
+total uncompressed size or number of entries (e.g., zip bombs) are rejected.
+
+A manifest file in the output folder records the sha256 of each archive expanded, so
+re-runs skip archives that have not changed since they were last expanded.
 """
 
+MANIFEST_FILE = 'files2dirs_manifest.json'
+MAX_SIZE_MB = 500     # max total uncompressed size of an archive
+MAX_ENTRIES = 10000   # max number of entries in an archive
+CHUNK_SIZE = 1024 * 1024
+
+
+class ArchiveLimitError(Exception):
+    pass
+
+
+def hash_file(path):
+    """Compute the sha256 hex digest of a file."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def extract_zip(path_file, dest_dir, max_size, max_entries):
+    """
+    Extract a zip file into dest_dir, enforcing the limits on size and number of entries.
+
+    Sizes declared in the archive are checked first, and the bytes actually written are
+    counted while extracting, as declared sizes can be forged.
+
+    :return: number of entries and total uncompressed size extracted
+    """
+    with zipfile.ZipFile(path_file) as zf:
+        members = zf.infolist()
+        if len(members) > max_entries:
+            raise ArchiveLimitError(
+                f'{len(members)} entries (limit {max_entries})')
+        declared_size = sum(m.file_size for m in members)
+        if declared_size > max_size:
+            raise ArchiveLimitError(
+                f'{declared_size} bytes uncompressed (limit {max_size})')
+
+        total_size = 0
+        for member in members:
+            # no absolute paths or .. allowed, then stream the content
+            path_member = os.path.join(dest_dir, *_sanitize(member.filename))
+            if member.is_dir():
+                os.makedirs(path_member, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(path_member), exist_ok=True)
+            with zf.open(member) as src, open(path_member, 'wb') as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    total_size += len(chunk)
+                    if total_size > max_size:
+                        raise ArchiveLimitError(
+                            f'more than {max_size} bytes uncompressed (limit {max_size})')
+                    dst.write(chunk)
+    return len(members), total_size
+
+
+def _sanitize(filename):
+    """Split an archive member name into safe path components (as zipfile.extract does)."""
+    parts = filename.replace('\\', '/').split('/')
+    return [p for p in parts if p not in ('', '.', '..')] or ['_']
+
+
+def expand_submission(path_file, dest_dir, max_size, max_entries):
+    """
+    Expand one submission archive into dest_dir (run in a worker process).
+
+    The archive is extracted into a temporary sibling folder first, so a failed
+    extraction never leaves a half-expanded (or deleted) student folder behind.
+
+    :return: a dictionary with the outcome of the extraction
+    """
+    result = {'dir': dest_dir, 'sha256': hash_file(path_file)}
+    tmp_dir = f'{dest_dir}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        try:
+            result['entries'], result['size'] = extract_zip(
+                path_file, tmp_dir, max_size, max_entries)
+            result['status'] = 'expanded'
+        except zipfile.BadZipFile:
+            shutil.copy(path_file, tmp_dir)
+            result['status'] = 'copied'
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        os.rename(tmp_dir, dest_dir)
+    except ArchiveLimitError as e:
+        result['status'] = 'rejected'
+        result['error'] = str(e)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f'{type(e).__name__} ({e})'
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return result
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -46,7 +152,31 @@ if __name__ == '__main__':
         '--overwrite',
         action='store_true',
         default=False,
-        help='Overwrite destination if exists.'
+        help='Overwrite destination if exists (archives unchanged since last expanded are still skipped).'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        default=False,
+        help='Re-expand every archive, even if unchanged since last expanded (implies --overwrite).'
+    )
+    parser.add_argument(
+        '--max-size',
+        type=int,
+        default=MAX_SIZE_MB,
+        help='Max total uncompressed size (in MB) allowed per archive.'
+    )
+    parser.add_argument(
+        '--max-entries',
+        type=int,
+        default=MAX_ENTRIES,
+        help='Max number of entries allowed per archive.'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of archives to expand in parallel.'
     )
     args = parser.parse_args()
     print(args)
@@ -61,36 +191,82 @@ if __name__ == '__main__':
             f'Submission output directory not found or correct: {args.OUTPUTDIR}.')
         sys.exit(1)
 
+    # load manifest of previous runs: archive file name -> result (incl. sha256)
+    path_manifest = os.path.join(args.OUTPUTDIR, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(path_manifest):
+        with open(path_manifest, 'r') as f:
+            manifest = json.load(f).get('archives', {})
+
     # e.g., s3900792_2021-06-16T20:39:25.689000+10:00.zip
     # we will keep whatever is before the first _, that is s3900792
     sub_filename_pattern = re.compile(rf'(.+)_(.+).{args.ext}')
 
-    # get all file names in submission folder
-    file_names = next(os.walk(args.SUBDIR))[2]
+    # get all file names in submission folder, and keep the latest archive of each student
+    #   (the timestamp in the name sorts chronologically)
+    file_names = sorted(next(os.walk(args.SUBDIR))[2])
+    student_files = dict()
     for file_name in file_names:
-        try:
-            match = re.match(sub_filename_pattern, file_name)
-            # keep the prefix "s3900792" from filename
-            student_dir = match.group(1)
-            path_file = os.path.join(args.SUBDIR, file_name)
-            path_dest_student_dir = os.path.join(args.OUTPUTDIR, student_dir)
-            if not os.path.exists(path_dest_student_dir) or args.overwrite:
-                if not os.path.exists(path_dest_student_dir):
-                    os.mkdir(path_dest_student_dir)
-                try:
-                    student_zip_file = zipfile.ZipFile(path_file)
-                    student_zip_file.extractall(path_dest_student_dir)
-                    logging.info(
-                        f'Submission zip {file_name} EXPANDED into {path_dest_student_dir}')
-                except zipfile.BadZipFile:
-                    logging.info(
-                        f'Submission {file_name} COPIED into {path_dest_student_dir}')
-                    shutil.copy(path_file, path_dest_student_dir)
-                except Exception as e:
-                    logging.error(
-                        f'Unable to process file {file_name}: {type(e)} ({e})')
-                    os.rmdir(path_dest_student_dir)
-        except Exception as e:
-            print(type(e))
+        match = re.match(sub_filename_pattern, file_name)
+        if match is None:
             logging.warning(
-                f"File {file_name} cannot be processed at all (not maching pattern?): {e}")
+                f"File {file_name} cannot be processed at all (not maching pattern?)")
+            continue
+        # keep the prefix "s3900792" from filename
+        student_dir = match.group(1)
+        if student_dir in student_files:
+            logging.info(
+                f'Submission {student_files[student_dir]} IGNORED: newer submission {file_name}')
+        student_files[student_dir] = file_name
+
+    max_size = args.max_size * 1024 * 1024
+    jobs = dict()
+    for student_dir, file_name in student_files.items():
+        path_file = os.path.join(args.SUBDIR, file_name)
+        path_dest_student_dir = os.path.join(args.OUTPUTDIR, student_dir)
+        if os.path.exists(path_dest_student_dir) and not (args.overwrite or args.force):
+            logging.info(
+                f'Submission {file_name} SKIPPED: {path_dest_student_dir} exists')
+            continue
+        previous = manifest.get(file_name)
+        if (not args.force and previous is not None
+                and previous.get('status') in ('expanded', 'copied')
+                and os.path.exists(path_dest_student_dir)
+                and previous['sha256'] == hash_file(path_file)):
+            logging.info(
+                f'Submission {file_name} SKIPPED: unchanged since {previous["at"]}')
+            continue
+        jobs[file_name] = (path_file, path_dest_student_dir)
+
+    now = datetime.now().astimezone().isoformat()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(expand_submission, path_file, dest, max_size, args.max_entries): file_name
+            for file_name, (path_file, dest) in jobs.items()
+        }
+        for future in as_completed(futures):
+            file_name = futures[future]
+            result = future.result()
+            result['at'] = now
+            manifest[file_name] = result
+            if result['status'] == 'expanded':
+                logging.info(
+                    f'Submission zip {file_name} EXPANDED into {result["dir"]}')
+            elif result['status'] == 'copied':
+                logging.info(
+                    f'Submission {file_name} COPIED into {result["dir"]}')
+            elif result['status'] == 'rejected':
+                logging.error(
+                    f'Submission zip {file_name} REJECTED (over limits): {result["error"]}')
+            else:
+                logging.error(
+                    f'Unable to process file {file_name}: {result["error"]}')
+
+    # write manifest with summary of all archives processed so far
+    summary = {}
+    for result in manifest.values():
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    with open(path_manifest, 'w') as f:
+        json.dump({'updated_at': now, 'summary': summary, 'archives': manifest},
+                  f, indent=4)
+    logging.info(f'Manifest written to {path_manifest}: {summary}')
@@ -28,67 +28,12 @@ from pytz import timezone
 from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
 
+import utils_gg
+
 TIMEZONE_STR = "Australia/Melbourne"
 CREDENTIALS_FILE = "storage.json"
 
 
-def get_path_pieces_reversed(path):
-    """
-    Breaks a given path into a list (of str) of components in reversed order.
-    :param path: The path to be broken
-    :return: The pieces of the path in reverse order
-    """
-    pieces_reversed = []
-    cur_path, cur_file = path, None
-    while cur_path != "":
-        cur_path, cur_file = os.path.split(cur_path)
-        pieces_reversed.append(cur_file)
-    return pieces_reversed
-
-
-def get_children_by_id(drive, parent_id):
-    """
-    Gets a list of Google Drive files that are children of the parent with the given id.
-    :param parent_id: The id of the parent directory
-    :return:a list of Google Drive files that are children of the parent with the given id
-    """
-    return drive.ListFile(
-        {"q": f"'{parent_id}' in parents and trashed=false"}
-    ).GetList()
-
-
-def get_id_by_absolute_path(path):
-    """
-    Given a path as a string, retrieves the id of the innermost component.
-    :param path: The path to be analysed
-    :return: The id of the innermost component
-    """
-    pieces_reversed = get_path_pieces_reversed(path)
-
-    cur_list = get_children_by_id("root")
-    final_id = None
-    while pieces_reversed:
-        target = pieces_reversed.pop()
-        found = False
-        for f in cur_list:
-            if f["title"] == target:
-                found = True
-                if not pieces_reversed:
-                    final_id = f["id"]
-                else:
-                    if f["mimeType"] == "application/vnd.google-apps.folder":
-                        cur_list = get_children_by_id(f["id"])
-                        break
-                    else:
-                        raise Exception(
-                            "File encountered where a directory was expected: %s"
-                            % target
-                        )
-        if not found:
-            raise Exception("Directory not found: %s" % target)
-    return final_id
-
-
 """
 Download latest submission files in Google Drive folder with id gdrive_id with submission extension sub_ext (e.g., zip) 
 to directory dir_destination. 
@@ -137,6 +82,12 @@ if __name__ == "__main__":
         type=str,
         help="Rename the downloaded name to this",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=utils_gg.MAX_WORKERS,
+        help="Number of concurrent downloads (Default: %(default)s).",
+    )
 
     args = parser.parse_args()
     print(args)
@@ -176,7 +127,7 @@ if __name__ == "__main__":
         # An absolute GDrive path was given, get the GDrive ID
         if args.folder_path.endswith("/"):
             args.folder_path = args.folder_path[:-1]
-        folder_id = get_id_by_absolute_path(args.folder_path)
+        folder_id = utils_gg.get_id_by_path(drive, args.folder_path)
     else:
         folder_id = args.FOLDER_ID
 
@@ -184,11 +135,16 @@ if __name__ == "__main__":
 
     # Iterate thought all submitted files in the GDrive and extract the latest submission for each student
     #   Store that into latest_submissions
-    files_in_submission_folder = get_children_by_id(drive, folder_id)
+    #   Only the fields needed are requested, streaming through all result pages
+    files_in_submission_folder = utils_gg.list_children(drive, folder_id)
 
     # TODO: rename to latest_submissions
     latest_submissions = defaultdict(submission_entry)
+    files_meta = dict()  # keep size/md5 of each file to avoid re-fetching them
     for f in files_in_submission_folder:
+        files_meta[f["id"]] = {
+            k: f[k] for k in ["title", "fileSize", "md5Checksum"] if k in f
+        }
         email = f["lastModifyingUser"]["emailAddress"]
         submission_timestamp = iso8601.parse_date(f["createdDate"]).astimezone(
             timezone(TIMEZONE_STR)
@@ -207,24 +163,23 @@ if __name__ == "__main__":
     print(f"Number of submissions identified: {no_submissions}")
     # print(latest_submissions.keys())
 
-    # Next, we download everything in latest_submissions form Gdrive
-    for i, email in enumerate(
-        latest_submissions
-    ):  # i is 0,1,2,3... and student_id is "s3844647"
-        # get submission timestamp and Google Drive id to the document
-        latest_submission_timestamp, gdrive_id = latest_submissions[email]
-
-        gdrive_file = drive.CreateFile({"id": latest_submissions[email].gdrive_id})
-        destination_folder = os.path.join(output_dir, email)
-        file_name = (
-            args.file_name if args.file_name is not None else gdrive_file["title"]
-        )
-        destination_file = os.path.join(destination_folder, file_name)
-
-        if not os.path.exists(destination_folder):
-            os.makedirs(destination_folder)
-
-        print(
-            f"Downloading submission {i}/{no_submissions} for {email} to {destination_file}: https://drive.google.com/open?id={gdrive_id}"
+    # Next, we download everything in latest_submissions form Gdrive, concurrently
+    download_jobs = []
+    for email, (latest_submission_timestamp, gdrive_id) in latest_submissions.items():
+        download_jobs.append(
+            {
+                "id": gdrive_id,
+                "folder": os.path.join(output_dir, email),
+                "name": args.file_name,
+                "meta": files_meta[gdrive_id],
+                "label": email,
+            }
         )
-        gdrive_file.GetContentFile(destination_file)
+    results = utils_gg.download_files(drive, download_jobs, max_workers=args.workers)
+
+    for status in ["downloaded", "skipped", "failed"]:
+        jobs_status = [j for j in results if j["status"] == status]
+        print(f"Submissions {status}: {len(jobs_status)}")
+        if status == "failed":
+            for j in jobs_status:
+                print(f"\t {j['label']}: https://drive.google.com/open?id={j['id']}")
@@ -42,6 +42,7 @@ __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024"
 
 from argparse import ArgumentParser
+import csv
 from datetime import datetime
 import os
 from zoneinfo import ZoneInfo  # this should work Python 3.9+
@@ -55,6 +56,8 @@ from gsheets import Sheets
 from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
 
+import utils_gg
+
 CREDENTIALS_FILE = "storage.json"
 
 
@@ -123,6 +126,12 @@ if __name__ == "__main__":
         default="G",
         help="Column where the link to the file to download is located (Default: %(default)s).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=utils_gg.MAX_WORKERS,
+        help="Number of concurrent downloads (Default: %(default)s).",
+    )
 
     args = parser.parse_args()
 
@@ -161,31 +170,45 @@ if __name__ == "__main__":
     no_rows = sheet.nrows
     print(f"Number of rows in sheet {sheet_name}: ", no_rows)
 
-    for i in range(2, no_rows + 1):
-        timestamp = sheet[f"A{i}"]
-        email = sheet[f"B{i}"]
-        student_no = str(sheet[f"{args.column_id}{i}"])
-        file_link = sheet[
-            f"{args.column_file}{i}"
-        ]  # https://drive.google.com/open?id=1D8TPBz3o9Klu2wwlKKxCpvxNFSCaPPhb
-        file_id = file_link.split("=")[
-            1
-        ]  # extract the id 1D8TPBz3o9Klu2wwlKKxCpvxNFSCaPPhb
-        # print(f"Row {i}:", timestamp, email, student_no, file_id)
-
-        gdrive_file = gg_drive.CreateFile({"id": file_id})
-        file_title = gdrive_file["title"]
-
-        destination_folder = os.path.join(output_dir, student_no)
-        file_name = args.file_name if args.file_name is not None else file_title
-        destination_file = os.path.join(destination_folder, file_name)
-
-        if not os.path.exists(destination_folder):
-            os.makedirs(destination_folder)
-
-        print(
-            f"Downloading submission {i}/{no_rows} for {email} ({student_no}) to {destination_file}: {file_link}"
+    # read the columns needed straight from the exported CSV (no per-cell access)
+    #   and stream each row as a download job to the downloader
+    col_id = utils_gg.column_index(args.column_id)
+    col_file = utils_gg.column_index(args.column_file)
+
+    def submission_jobs(csv_file: str):
+        with open(csv_file, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f, dialect="excel")
+            next(reader, None)  # skip header row
+            for row in reader:
+                if len(row) <= max(col_id, col_file):
+                    continue  # empty or incomplete row
+                email = row[1]
+                student_no = row[col_id]
+                file_link = row[
+                    col_file
+                ]  # https://drive.google.com/open?id=1D8TPBz3o9Klu2wwlKKxCpvxNFSCaPPhb
+                if "=" not in file_link:
+                    logging.warning(f"No file link for {email} ({student_no}); skipping")
+                    continue
+                file_id = file_link.split("=")[
+                    1
+                ]  # extract the id 1D8TPBz3o9Klu2wwlKKxCpvxNFSCaPPhb
+
+                # title and checksum of the file are fetched by the download workers
+                yield {
+                    "id": file_id,
+                    "folder": os.path.join(output_dir, student_no),
+                    "name": args.file_name,
+                    "label": f"{email} ({student_no})",
+                }
+
+    logging.info(f"Downloading submissions with {args.workers} workers")
+    results = utils_gg.download_files(
+        gg_drive, submission_jobs(csv_file), max_workers=args.workers
+    )
+    for status in ["downloaded", "skipped", "failed"]:
+        logging.info(
+            f"Submissions {status}: {len([j for j in results if j['status'] == status])}"
         )
-        gdrive_file.GetContentFile(destination_file)
 
     logging.info(f"Finished...")
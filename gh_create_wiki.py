@@ -4,12 +4,23 @@ Script to push a Wiki template to repos in a CSV file
  $ python3 gh_create_wiki.py ../ai20-contest-repos.csv ~/AI20/assessments/project-contest/updated-src/wiki-template/
 
 Uses GitPython https://gitpython.readthedocs.io/en/stable/index.html
+
+With --parallel, the template commit is built once as a tree object (in a temporary bare
+repo) and then each wiki is processed in its own temporary directory by a pool of workers:
+the wiki is fetched shallowly, the template tree is overlaid on it in a temporary index
+(same result as copying the template on top of the wiki), and the new commit is pushed.
+No template files are copied or staged per wiki.
+
+ $ python3 gh_create_wiki.py ../ai20-contest-repos.csv wiki-template/ --parallel --workers 8
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2019-2022"
 
 import os
 import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from argparse import ArgumentParser
 import git
@@ -17,6 +28,9 @@ import util, utils_gh
 
 
 WIKI_DIR = 'wiki'
+WIKI_BRANCH = 'master'
+COMMIT_MESSAGE = 'Init Wiki template. Enjoy!'
+MAX_WORKERS = 8
 
 REPOS_EXCEPT = []
 # REPOS_EXCEPT = ['math-club-2',
@@ -31,6 +45,89 @@ REPOS_EXCEPT = []
 #                 'loginquitas-duo',
 #                 'alphabetagamma']
 
+
+def run_git(git_dir, *args, input=None, env=None, cwd=None):
+    """Run a git command on the (bare) repo at git_dir and return its stdout."""
+    result = subprocess.run(['git', f'--git-dir={git_dir}', *args], input=input,
+                            capture_output=True, text=True, env=env, cwd=cwd)
+    if result.returncode != 0:
+        raise Exception(f'git {args[0]} failed: {result.stderr.strip()}')
+    return result.stdout.strip()
+
+
+def build_template_tree(template_dir, git_dir):
+    """
+    Write the wiki template as a tree object in the bare repo git_dir (once for all wikis).
+    As with `cp -rf template/*`, hidden top-level files are not included.
+
+    :return: the tree id and its entries in `git update-index --index-info` format
+    """
+    run_git(git_dir, 'init', '--bare', '-q')
+    entries = [e for e in os.listdir(template_dir) if not e.startswith('.')]
+    env = dict(os.environ, GIT_INDEX_FILE=os.path.join(git_dir, 'template-index'))
+    run_git(git_dir, f'--work-tree={template_dir}', 'add', '-f', '--', *entries,
+            env=env, cwd=template_dir)
+    tree = run_git(git_dir, 'write-tree', env=env)
+    return tree, run_git(git_dir, 'ls-tree', '-r', '--full-tree', tree)
+
+
+def push_wiki_template(repo_id, template_git_dir, template_entries, force=False):
+    """
+    Push the template tree on top of the wiki of a repo, in a temporary directory.
+
+    :return: the status (pushed or skipped) and a message
+    """
+    wiki_repo = f'git@github.com:{repo_id}.wiki.git'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        git_dir = os.path.join(tmp_dir, 'wiki.git')
+        run_git(git_dir, 'init', '--bare', '-q')
+        # borrow the template objects instead of copying them
+        with open(os.path.join(git_dir, 'objects', 'info', 'alternates'), 'w') as f:
+            f.write(os.path.join(os.path.abspath(template_git_dir), 'objects') + '\n')
+
+        # two commits are enough to know if the wiki was already edited
+        run_git(git_dir, 'fetch', '-q', '--depth=2', wiki_repo, WIKI_BRANCH)
+        no_commits = int(run_git(git_dir, 'rev-list', '--count', 'FETCH_HEAD'))
+        if no_commits > 1 and not force:
+            author = run_git(git_dir, 'log', '-1', '--format=%an', 'FETCH_HEAD')
+            return 'skipped', f'created by user {author} and has {no_commits}+ commits'
+
+        # overlay the template on the current wiki tree, as `cp -rf template/* wiki/` would
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(tmp_dir, 'index'))
+        run_git(git_dir, 'read-tree', 'FETCH_HEAD', env=env)
+        run_git(git_dir, 'update-index', '--index-info', input=template_entries + '\n', env=env)
+        tree = run_git(git_dir, 'write-tree', env=env)
+        commit = run_git(git_dir, 'commit-tree', tree, '-p', 'FETCH_HEAD', '-m', COMMIT_MESSAGE)
+        run_git(git_dir, 'push', '-q', wiki_repo, f'{commit}:refs/heads/{WIKI_BRANCH}')
+    return 'pushed', f'https://github.com/{repo_id}/wiki'
+
+
+def push_wikis_parallel(list_repos, template_dir, force=False, workers=MAX_WORKERS):
+    """Push the wiki template to all repos with a pool of workers, building the template tree once."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        template_git_dir = os.path.join(tmp_dir, 'template.git')
+        tree, template_entries = build_template_tree(os.path.abspath(template_dir), template_git_dir)
+        print(f'*** Template tree {tree} built from {template_dir}')
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(push_wiki_template, r['REPO_ID'], template_git_dir,
+                                template_entries, force): r['REPO_ID']
+                for r in list_repos
+            }
+            for future in as_completed(futures):
+                repo_id = futures[future]
+                try:
+                    status, message = future.result()
+                except Exception as e:
+                    print(f'*** Error pushing repo {repo_id}: {e}')
+                    continue
+                if status == 'pushed':
+                    print(f'*** Success pushing wiki template into {message}')
+                else:
+                    print(f'*** Skipping repo wiki {repo_id} as it was {message}')
+
+
 if __name__ == '__main__':
     parser = ArgumentParser(
         description="Push a template Wiki in GitHib Wiki pages form a list of repos")
@@ -44,6 +141,10 @@ if __name__ == '__main__':
         help='if given, only the team specified will be cloned/updated.')
     parser.add_argument('--force', action='store_true',
                         help='push it even if there exists a Wiki with commits.')
+    parser.add_argument('--parallel', action='store_true',
+                        help='build the template tree once and push it to the wikis concurrently.')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='number of wikis to process concurrently with --parallel (default: %(default)s).')
     args = parser.parse_args()
 
     # Get the list of TEAM + GIT REPO links from csv file
@@ -53,6 +154,9 @@ if __name__ == '__main__':
         print(f'No repos found in the mapping file "{args.REPO_CSV}". Stopping.')
         exit(0)
 
+    if args.parallel:
+        push_wikis_parallel(list_repos, args.WIKI_TEMPLATE, args.force, args.workers)
+        exit(0)
 
     # Process each repo in list_repos
     # push wiki template if
@@ -77,7 +181,7 @@ if __name__ == '__main__':
         if args.force or not skip:
             os.system(f"cp -rf {args.WIKI_TEMPLATE}/* {WIKI_DIR}/")
             repo.index.add(['*'])
-            repo.index.commit('Init Wiki template. Enjoy!')
+            repo.index.commit(COMMIT_MESSAGE)
             try:
                 repo.remotes.origin.push()
                 print(f'\t\t Success pushing wiki template into https://github.com/{r["REPO_ID"]}/wiki')
@@ -0,0 +1,463 @@
+"""
+Deadline compliance scan: in one sweep over a list of repos, get the commits done after a
+deadline, the last valid commit before it, and the commit/date of the submission tag.
+
+It gathers what gh_commits_after.py and gh_tags_after.py report, but with a single pass
+per repo, and writes both of their CSV files:
+
+    - late-commits-<NOW>.csv: repos with commits after the deadline (same columns as gh_commits_after.py)
+    - tags-repos-<NOW>.csv: repos whose tag points to a commit between the deadline and --until
+        (same columns as gh_tags_after.py)
+
+Each repo is scanned from a local clone if there is one in --clones (a folder with one
+clone per REPO_ID_SUFFIX, as produced by git_clone_submissions.py), with a few git
+commands and no API calls. Repos without a local clone are scanned via GitHub GraphQL,
+many repos per query (commit history since/until the deadline and the tag ref at once).
+
+Example:
+
+    $ python gh_deadline_scan.py repos.csv --since 2025-10-07T15:30 --tag submission \
+        --clones submissions -t ~/.ssh/keys/gh-token-ssardina.txt
+"""
+__author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
+__copyright__ = "Copyright 2024-2026"
+
+import csv
+import os
+import subprocess
+from argparse import ArgumentParser
+from datetime import datetime
+
+import util, utils_gh
+from util import (
+    TIMEZONE,
+    NOW,
+    NOW_TXT,
+    NOW_ISO,
+    GH_HTTP_URL_PREFIX,
+)
+
+SCRIPT_NAME = "gh_deadline_scan"
+
+# setup my own logger for this script, using the slogger/loguru backend
+from slogger.loguru_backend import logger, setup_logger
+
+setup_logger(source=SCRIPT_NAME, timezone=TIMEZONE.key)
+
+
+#####################################
+# LOCAL GLOBAL VARIABLES FOR SCRIPT
+#####################################
+COMMITS_CSV = f"late-commits-{NOW_TXT}.csv"
+COMMITS_HEADER_CSV = [
+    "REPO_ID_SUFFIX",
+    "AUTHOR",
+    "URL",
+    "NO_LATE",
+    "LAST_VALID_COMMIT",
+    "LAST_VALID_COMMIT_TIME",
+    "LAST_VALID_COMMIT_MESSAGE",
+    "LAST_VALID_COMMIT_URL",
+]
+TAGS_CSV = f"tags-repos-{NOW_TXT}.csv"
+TAGS_HEADER_CSV = ["REPO_ID_SUFFIX", "TAG", "COMMIT", "DATE"]
+
+TAG = "submission"
+BRANCH = "main"
+BATCH_SIZE = 20  # repos per GraphQL query
+MAX_LATE_COMMITS = 100  # late commits listed per repo (all are counted)
+
+COMMIT_FIELDS = "oid messageHeadline authoredDate author { name email user { login } }"
+SCAN_FIELD = f"""
+repository(owner: $owner, name: $name) {{
+    branch: ref(qualifiedName: $branch) {{
+        target {{
+            ... on Commit {{
+                late: history(since: $since, until: $until, first: {MAX_LATE_COMMITS}) {{
+                    totalCount
+                    nodes {{ {COMMIT_FIELDS} }}
+                }}
+                valid: history(until: $since, first: 1) {{ nodes {{ {COMMIT_FIELDS} }} }}
+            }}
+        }}
+    }}
+    tag: ref(qualifiedName: $tag) {{ {utils_gh.TAG_TARGET_FIELDS} }}
+}}
+"""
+
+# git log format: sha, author name, author email, author date, subject (separated by \x1f)
+GIT_LOG_FORMAT = "%H%x1f%an%x1f%ae%x1f%aI%x1f%s"
+# for-each-ref format for a tag, works for lightweight (%(...)) and annotated (%(*...)) tags
+GIT_TAG_FORMAT = "%(objectname)%1f%(*objectname)%1f%(authordate:iso-strict)%1f%(*authordate:iso-strict)%1f%(committerdate:iso-strict)%1f%(*committerdate:iso-strict)%1f%(taggerdate:iso-strict)%1f%(authorname)%1f%(*authorname)"
+
+
+def login_from_email(email: str) -> str:
+    """Get the GitHub login from a noreply email (e.g., 123+ssardina@users.noreply.github.com), if it is one."""
+    if email and email.endswith("@users.noreply.github.com"):
+        return email.split("@")[0].split("+")[-1]
+    return None
+
+
+#######################################
+# Scan from a local clone
+#######################################
+def git(repo_dir: str, *args) -> str:
+    """Run a git command in a repo and return its stdout (without the final newline)."""
+    result = subprocess.run(
+        ["git", "-C", repo_dir, *args], capture_output=True, text=True, check=True
+    )
+    # not strip(): it would also drop trailing \x1f separators of empty last fields
+    return result.stdout.rstrip("\n")
+
+
+def parse_git_log(output: str) -> list[dict]:
+    """Parse the output of git log with GIT_LOG_FORMAT into commit dictionaries."""
+    commits = []
+    for line in output.splitlines():
+        sha, name, email, date, message = line.split("\x1f", 4)
+        commits.append(
+            {
+                "sha": sha,
+                "author": name,
+                "login": login_from_email(email),
+                "email": email,
+                "date": datetime.fromisoformat(date),
+                "message": message,
+            }
+        )
+    return commits
+
+
+def scan_local(repo_dir: str, branch: str, tag: str, since_dt: datetime, until_dt: datetime,
+               fetch=False) -> dict:
+    """
+    Scan a repo from its local clone, with three git commands.
+
+    The branch is taken from the remote-tracking branch (origin/<branch>) if there is
+    one, as clones made at a tag have a detached HEAD.
+
+    :return: the scan of the repo (see scan_repos())
+    """
+    if fetch:
+        git(repo_dir, "fetch", "--quiet", "--tags", "--force", "origin")
+    ref = f"refs/remotes/origin/{branch}"
+    if subprocess.run(["git", "-C", repo_dir, "rev-parse", "--verify", "-q", ref], capture_output=True).returncode != 0:
+        ref = "HEAD"
+
+    late = parse_git_log(
+        git(repo_dir, "log", f"--format={GIT_LOG_FORMAT}", f"--since={since_dt.isoformat()}",
+            f"--until={until_dt.isoformat()}", ref)
+    )
+    valid = parse_git_log(
+        git(repo_dir, "log", "-1", f"--format={GIT_LOG_FORMAT}", f"--until={since_dt.isoformat()}", ref)
+    )
+
+    tag_info = None
+    line = git(repo_dir, "for-each-ref", f"--format={GIT_TAG_FORMAT}", f"refs/tags/{tag}")
+    if line:
+        sha, tag_sha, authored, tag_authored, committed, tag_committed, tagged, author, tag_author = line.split("\x1f")
+        tag_info = {
+            "sha": tag_sha or sha,
+            "author": tag_author or author,
+            "authored_date": datetime.fromisoformat(tag_authored or authored),
+            "committed_date": datetime.fromisoformat(tag_committed or committed),
+            "tagged_date": tagged and datetime.fromisoformat(tagged) or None,
+        }
+
+    return {
+        "source": "local",
+        "late": late,
+        "late_total": len(late),
+        "last_valid": valid[0] if valid else None,
+        "tag": tag_info,
+        "error": None,
+    }
+
+
+#######################################
+# Scan via GraphQL
+#######################################
+def parse_graphql_commit(node: dict) -> dict:
+    """Convert a commit queried with COMMIT_FIELDS into a commit dictionary."""
+    author = node["author"] or {}
+    return {
+        "sha": node["oid"],
+        "author": author.get("name"),
+        "login": (author.get("user") or {}).get("login") or login_from_email(author.get("email")),
+        "email": author.get("email"),
+        "date": datetime.fromisoformat(node["authoredDate"]),
+        "message": node["messageHeadline"],
+    }
+
+
+def scan_graphql(repo_names: list[str], branch: str, tag: str, since_dt: datetime,
+                 until_dt: datetime) -> dict:
+    """
+    Scan a batch of repos with one GraphQL query.
+
+    :return: dictionary repo name -> scan of the repo (see scan_repos())
+    """
+    var_types = {
+        "owner": "String!",
+        "name": "String!",
+        "branch": "String!",
+        "tag": "String!",
+        "since": "GitTimestamp!",
+        "until": "GitTimestamp!",
+    }
+    items = []
+    for repo_name in repo_names:
+        owner, name = util.parse_full_repo(repo_name)
+        items.append(
+            {
+                "owner": owner,
+                "name": name,
+                "branch": f"refs/heads/{branch}",
+                "tag": f"refs/tags/{tag}",
+                "since": since_dt.isoformat(),
+                "until": until_dt.isoformat(),
+            }
+        )
+    results = utils_gh.call_with_retry(utils_gh.run_aliased, "query", SCAN_FIELD, var_types, items)
+
+    scans = dict()
+    for repo_name, (data, error) in zip(repo_names, results):
+        scan = {"source": "graphql", "late": [], "late_total": 0, "last_valid": None, "tag": None, "error": None}
+        scans[repo_name] = scan
+        repo_data = data  # each aliased result is the repository itself (None if not found)
+        if repo_data is None:
+            scan["error"] = error or "repository not found"
+            continue
+        if repo_data["branch"] is None:
+            scan["error"] = f"no branch {branch}"
+            continue
+        history = repo_data["branch"]["target"]
+        scan["late"] = [parse_graphql_commit(c) for c in history["late"]["nodes"]]
+        scan["late_total"] = history["late"]["totalCount"]
+        valid = history["valid"]["nodes"]
+        scan["last_valid"] = parse_graphql_commit(valid[0]) if valid else None
+        scan["tag"] = parse_tag(repo_data["tag"], tag)
+    return scans
+
+
+def parse_tag(ref: dict, tag: str) -> dict:
+    """Parse the tag ref of a repo; a tag that cannot be parsed is reported and taken as missing."""
+    tag_info = utils_gh.parse_tag_ref(ref, tag)
+    if tag_info is not None and "error" in tag_info:
+        logger.warning(tag_info["error"])
+        return None
+    return tag_info
+
+
+def scan_repos(repos: list[dict], clones_dir: str, branch: str, tag: str, since_dt: datetime,
+               until_dt: datetime, fetch=False, workers=utils_gh.MAX_WORKERS) -> dict:
+    """
+    Scan all repos, from their local clone when available and via batched GraphQL otherwise.
+
+    :return: dictionary repo name -> scan of the repo, with keys:
+        - source: "local" or "graphql"
+        - late: commits after the deadline (up to MAX_LATE_COMMITS for GraphQL), newest first
+        - late_total: total number of commits after the deadline
+        - last_valid: last commit before the deadline (None if none)
+        - tag: info of the commit tagged (sha, author, authored_date, committed_date,
+            tagged_date), None if no tag
+        - error: error message if the repo could not be scanned, None otherwise
+        Each commit is a dictionary with keys sha, author, login, email, date and message.
+    """
+    local_repos, remote_repos = [], []
+    for r in repos:
+        repo_dir = os.path.join(clones_dir, r["REPO_ID_SUFFIX"]) if clones_dir else None
+        if repo_dir is not None and os.path.isdir(os.path.join(repo_dir, ".git")):
+            local_repos.append((r["REPO_ID"], repo_dir))
+        else:
+            remote_repos.append(r["REPO_ID"])
+    logger.info(f"Scanning {len(local_repos)} repos from local clones and {len(remote_repos)} via GraphQL...")
+
+    scans = dict()
+    for (repo_name, _), scan, e in utils_gh.run_concurrently(
+        lambda job: scan_local(job[1], branch, tag, since_dt, until_dt, fetch), local_repos, workers
+    ):
+        if e is not None:
+            stderr = getattr(e, "stderr", None)
+            scan = {"source": "local", "error": (stderr or str(e)).strip()}
+        scans[repo_name] = scan
+
+    for batch, batch_scans, e in utils_gh.run_concurrently(
+        lambda batch: scan_graphql(batch, branch, tag, since_dt, until_dt),
+        utils_gh.chunks(remote_repos, BATCH_SIZE),
+        workers,
+    ):
+        if e is not None:
+            batch_scans = {repo_name: {"source": "graphql", "error": str(e)} for repo_name in batch}
+        scans.update(batch_scans)
+        logger.info(f"Scanned {len(scans)}/{len(repos)} repos...")
+    return scans
+
+
+def is_ignored(commit: dict, ignore: list) -> bool:
+    """Check if the author of a commit (login, name or email) is to be ignored."""
+    return any(x in ignore for x in (commit["login"], commit["author"], commit["email"]) if x)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Get late commits and submission tags of repos in one sweep")
+    parser.add_argument("REPO_CSV", help="List of repositories to get data from.")
+    parser.add_argument(
+        "--repos", nargs="+", help="if given, only the teams specified will be parsed."
+    )
+    parser.add_argument(
+        "-t",
+        "--token",
+        help="File or string containing GitHub authorization token/password (needed for repos without local clone).",
+    )
+    parser.add_argument(
+        "--since",
+        required=True,
+        type=str,
+        help="Deadline: get commits after this date. Datetime in ISO format, e.g., 2025-04-09T15:30.",
+    )
+    parser.add_argument(
+        "--until",
+        type=str,
+        help="Get commits and tags before this date (Default: now). Datetime in ISO format, e.g., 2025-04-09T15:30.",
+    )
+    parser.add_argument(
+        "--tag",
+        default=TAG,
+        help="Tag to look for (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--branch",
+        default=BRANCH,
+        help="Branch to get commits from (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--clones",
+        help="Folder with local clones of the repos, one per REPO_ID_SUFFIX (e.g., from git_clone_submissions.py).",
+    )
+    parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help="Fetch the local clones from their remote before scanning them.",
+    )
+    parser.add_argument(
+        "--ignore",
+        nargs="+",
+        type=str,
+        default=[],
+        help="Authors (login, name or email) whose commits are not counted as late (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=utils_gh.MAX_WORKERS,
+        help="Number of repos (local) or GraphQL batches (remote) to scan concurrently (Default: %(default)s).",
+    )
+    args = parser.parse_args()
+    logger.info(f"Starting script {SCRIPT_NAME} on {TIMEZONE}: {NOW_ISO}")
+    logger.info(args, depth=1)
+
+    ###############################################
+    # Filter repos as desired
+    ###############################################
+    repos = util.get_repos_from_csv(args.REPO_CSV, args.repos)
+    if len(repos) == 0:
+        logger.error(f'No repos found in the mapping file "{args.REPO_CSV}". Stopping.')
+        exit(0)
+
+    since_dt = datetime.fromisoformat(args.since)
+    if since_dt.tzinfo is None:
+        since_dt = since_dt.replace(tzinfo=TIMEZONE)
+    until_dt = NOW
+    if args.until is not None:
+        until_dt = datetime.fromisoformat(args.until)
+        if until_dt.tzinfo is None:
+            until_dt = until_dt.replace(tzinfo=TIMEZONE)
+    logger.info(f"Scanning between {since_dt.isoformat()} and {until_dt.isoformat()}")
+
+    ###############################################
+    # Authenticate to GitHub (only needed for repos without local clone)
+    ###############################################
+    if not args.clones or any(
+        not os.path.isdir(os.path.join(args.clones, r["REPO_ID_SUFFIX"], ".git")) for r in repos
+    ):
+        try:
+            utils_gh.open_gitHub(token=args.token)
+        except Exception:
+            logger.error(
+                "Something wrong happened during GitHub authentication. Check credentials."
+            )
+            exit(1)
+
+    ###############################################
+    # Scan all repos in one sweep
+    ###############################################
+    scans = scan_repos(
+        repos, args.clones, args.branch, args.tag, since_dt, until_dt, args.fetch, args.workers
+    )
+
+    commits_csv = []
+    tags_csv = []
+    no_errors = 0
+    for r in repos:
+        repo_id = r["REPO_ID_SUFFIX"]
+        repo_url = f"{GH_HTTP_URL_PREFIX}/{r['REPO_ID']}"
+        scan = scans[r["REPO_ID"]]
+        if scan["error"] is not None:
+            logger.error(f"{repo_id}: cannot scan repo ({scan['source']}): {scan['error']}")
+            no_errors += 1
+            continue
+
+        # late commits (those in the list beyond MAX_LATE_COMMITS are counted as not ignored)
+        late = [c for c in scan["late"] if not is_ignored(c, args.ignore)]
+        no_late = len(late) + scan["late_total"] - len(scan["late"])
+        if no_late > 0:
+            for c in late:
+                logger.info(
+                    f"{repo_id}: late commit {c['sha']} - '{c['message']}' - {c['login'] or c['author']} - {c['date'].astimezone(TIMEZONE)}"
+                )
+            valid = scan["last_valid"]
+            commits_csv.append(
+                {
+                    "REPO_ID_SUFFIX": repo_id,
+                    "AUTHOR": late[0]["login"] or late[0]["author"] if late else "",
+                    "URL": f"{repo_url}/commits/",
+                    "NO_LATE": no_late,
+                    "LAST_VALID_COMMIT": valid["sha"] if valid else "",
+                    "LAST_VALID_COMMIT_TIME": valid["date"].astimezone(TIMEZONE).isoformat() if valid else "",
+                    "LAST_VALID_COMMIT_MESSAGE": valid["message"] if valid else "",
+                    "LAST_VALID_COMMIT_URL": f"{repo_url}/commit/{valid['sha']}" if valid else "",
+                }
+            )
+
+        # submission tag within the date range
+        tag = scan["tag"]
+        if tag is not None:
+            tag_date = tag["authored_date"].astimezone(TIMEZONE)
+            if since_dt <= tag_date <= until_dt:
+                logger.info(f"{repo_id}: tag '{args.tag}' on commit {tag['sha'][:7]} with commit date {tag_date}")
+                tags_csv.append(
+                    {
+                        "REPO_ID_SUFFIX": repo_id,
+                        "TAG": args.tag,
+                        "COMMIT": tag["sha"][:7],
+                        "DATE": tag_date.isoformat(),
+                    }
+                )
+
+    with open(COMMITS_CSV, mode="w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=COMMITS_HEADER_CSV, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writeheader()
+        writer.writerows(commits_csv)
+    with open(TAGS_CSV, mode="w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=TAGS_HEADER_CSV)
+        writer.writeheader()
+        writer.writerows(tags_csv)
+
+    no_local = len([s for s in scans.values() if s["source"] == "local"])
+    logger.info(
+        f"Finished! No of repos scanned: {len(repos)} ({no_local} from local clones) - "
+        f"With late commits: {len(commits_csv)} - Tagged in range: {len(tags_csv)} - Errors: {no_errors}"
+    )
+    logger.info(f"Output written to {COMMITS_CSV} and {TAGS_CSV}")
@@ -14,6 +14,11 @@ Example:
 
     $ python gh_issue_labels.py push harry-honours-2025/honours-software -tf  ~/.ssh/keys/gh-token-ssardina.txt --file labels.json --replace
 
+To apply the labels to every repo in a REPOS CSV file (e.g., as produced by gh_classroom_collect.py),
+computing the changes needed per repo from a single listing and applying them concurrently:
+
+    $ python gh_issue_labels.py sync repos.csv -tf  ~/.ssh/keys/gh-token-ssardina.txt --file labels-ssardina.json --replace
+
 In the ends, this is doing something equivalent to:
 
     $ curl -X POST -H "Authorization: token YOUR_TOKEN" \
@@ -29,6 +34,10 @@ import json
 from github import Github
 from github.GithubException import GithubException
 
+import util, utils_gh
+
+MAX_WORKERS = 4  # keep low: concurrent writes may trigger GitHub secondary rate limits
+
 
 def read_token(token_str: str, token_file: str) -> str:
     if token_str:
@@ -60,49 +69,123 @@ def download_labels(repo, output_file):
     print(f"✅ Labels downloaded to {output_file}")
 
 
-def push_labels(repo, input_file, replace=False):
+def load_labels(input_file):
     with open(input_file, "r") as f:
-        new_labels = json.load(f)
+        return json.load(f)
+
 
-    new_label_names = {lbl["name"] for lbl in new_labels}
-    existing_labels = {label.name: label for label in repo.get_labels()}
+def diff_labels(repo, new_labels, replace=False):
+    """
+    Compute the operations needed for a repo to have the new labels, from a single listing.
 
+    Label names are matched case-insensitively (as GitHub does), so a label differing only in
+    case is renamed with an update rather than deleted and created again.
+
+    :return: list of (op, repo, label data, existing label) with op in create, update, delete
+    """
+    existing_labels = {label.name.lower(): label for label in repo.get_labels()}
+    new_label_names = {lbl["name"].lower() for lbl in new_labels}
+
+    ops = []
     if replace:
-        print("🧹 Checking for labels to delete...")
         for name, label in existing_labels.items():
             if name not in new_label_names:
-                try:
-                    label.delete()
-                    print(f"❌ Deleted label: {name}")
-                except GithubException as e:
-                    print(f"⚠️ Could not delete label '{name}': {e}")
-
-    # Refresh labels after deletion (important if modifying in-place)
-    existing_labels = {label.name: label for label in repo.get_labels()}
+                ops.append(("delete", repo, {"name": label.name}, label))
 
     for label_data in new_labels:
-        name = label_data["name"]
-        color = label_data.get("color", "ffffff")
-        description = label_data.get("description", "")
+        data = {
+            "name": label_data["name"],
+            "color": label_data.get("color", "ffffff"),
+            "description": label_data.get("description", ""),
+        }
+        label = existing_labels.get(data["name"].lower())
+        if label is None:
+            ops.append(("create", repo, data, None))
+        elif (label.name, label.color, label.description or "") != (
+            data["name"],
+            data["color"],
+            data["description"],
+        ):
+            ops.append(("update", repo, data, label))
+    return ops
+
+
+def apply_label_op(op):
+    action, repo, data, label = op
+    if action == "delete":
+        label.delete()
+    elif action == "update":
+        label.edit(**data)
+    else:
+        repo.create_label(**data)
+
+
+OP_MESSAGES = {
+    "delete": "❌ Deleted label",
+    "update": "🔄 Updated label",
+    "create": "➕ Created label",
+}
 
+
+def push_labels(repo, input_file, replace=False):
+    ops = diff_labels(repo, load_labels(input_file), replace)
+    if not ops:
+        print("✅ Labels already up to date")
+    for op in ops:
         try:
-            if name in existing_labels:
-                label = existing_labels[name]
-                label.edit(name=name, color=color, description=description)
-                print(f"🔄 Updated label: {name}")
-            else:
-                repo.create_label(name=name, color=color, description=description)
-                print(f"➕ Created label: {name}")
+            apply_label_op(op)
+            print(f"{OP_MESSAGES[op[0]]}: {op[2]['name']}")
         except GithubException as e:
-            print(f"❌ Error updating/creating label '{name}': {e}")
+            print(f"⚠️ Could not {op[0]} label '{op[2]['name']}': {e}")
+
+
+def sync_labels(g, repos_csv, input_file, replace=False, workers=MAX_WORKERS, dry_run=False):
+    """Push the labels in input_file to every repo in a REPOS CSV, concurrently."""
+    new_labels = load_labels(input_file)
+    repos = util.get_repos_from_csv(repos_csv)
+    print(f"🔎 Computing label changes for {len(repos)} repos...")
+
+    def get_ops(r):
+        return diff_labels(g.get_repo(r["REPO_ID"]), new_labels, replace)
+
+    ops = []
+    for r, repo_ops, e in utils_gh.run_concurrently(get_ops, repos, workers):
+        if e is not None:
+            print(f"❌ Failed to access repository {r['REPO_ID']}: {e}")
+            continue
+        ops += repo_ops
+    print(f"🔧 {len(ops)} label changes needed across {len(repos)} repos")
+    if dry_run:
+        for action, repo, data, _ in ops:
+            print(f"[DRY-RUN] {action} label '{data['name']}' in {repo.full_name}")
+        return
+
+    utils_gh.check_rate_limit(g, len(ops))
+    errors = 0
+    # all deletes go first, so no create can race the delete of a label it clashes with
+    deletes = [op for op in ops if op[0] == "delete"]
+    others = [op for op in ops if op[0] != "delete"]
+    for stage in (deletes, others):
+        for (action, repo, data, _), _, e in utils_gh.run_concurrently(
+            lambda op: utils_gh.call_with_retry(apply_label_op, op), stage, workers
+        ):
+            if e is not None:
+                errors += 1
+                print(f"⚠️ Could not {action} label '{data['name']}' in {repo.full_name}: {e}")
+            else:
+                print(f"{OP_MESSAGES[action]} in {repo.full_name}: {data['name']}")
+    print(f"✅ Done: {len(ops) - errors} changes applied, {errors} errors")
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Download or push issue labels from/to a GitHub repo using PyGithub."
     )
-    parser.add_argument("action", choices=["get", "push"], help="Action to perform")
-    parser.add_argument("repo_name", help="Repository name in the format 'owner/repo'")
+    parser.add_argument("action", choices=["get", "push", "sync"], help="Action to perform")
+    parser.add_argument(
+        "repo_name",
+        help="Repository name in the format 'owner/repo' (or a REPOS CSV file for sync)",
+    )
     parser.add_argument(
         "--token",
         "-t",
@@ -121,9 +204,26 @@ def main():
         action="store_true",
         help="When pushing: delete labels not in the file",
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=MAX_WORKERS,
+        help=f"When syncing: number of concurrent API calls (default: {MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="When syncing: only report the changes needed",
+    )
     args = parser.parse_args()
     token = read_token(args.token, args.token_file)
 
+    if args.action == "sync":
+        g = utils_gh.open_gitHub(token)
+        sync_labels(g, args.repo_name, args.file, args.replace, args.workers, args.dry_run)
+        return
+
     # g = Github(auth=Auth.Token(token))
     g = Github(token)
     try:
@@ -21,12 +21,20 @@ This uses the GitHub GraphQL API, which is more efficient for transferring issue
 
 We use PyGithub (https://github.com/PyGithub/PyGithub) as API to GitHub to create the temp repo
 
+Issues are listed with cursor-based pagination (no 100-issue limit) and transferred in
+batches of aliased `transferIssue` mutations per GraphQL request (--batch), with a bounded
+number of concurrent requests (--workers). Progress is checkpointed in a JSON file, so an
+interrupted run can be re-run and resumes without transferring issues twice.
+
 Example:
 
 $ python gh_transfer_issues.py  RMIT-COSC2780-2973-IDM25/project-exam-timetabling-solution RMIT-COSC2780-2973-IDM26/test -t ~/.ssh/keys/gh-token-ssardina.txt
 """
 
 import argparse
+import json
+import os
+import threading
 import time
 import requests
 from github.GithubException import GithubException
@@ -51,25 +59,65 @@ setup_logging(
 )
 logger.remove(0)  # Remove default logger to prevent duplicate logs.
 
+BATCH_SIZE = 10  # transferIssue mutations per GraphQL request
+MAX_WORKERS = 2  # concurrent GraphQL requests (mutations are subject to secondary rate limits)
+CHECKPOINT_FILE = "transfer-{source}--{dest}.json"
+
+TRANSFER_FIELD = """
+transferIssue(input: {issueId: $issueId, repositoryId: $repositoryId}) {
+    issue { url number }
+}
+"""
+
+
+class Checkpoint:
+    """
+    Progress of a transfer, saved to a JSON file after every change so a re-run resumes:
+        - stage: last stage completed of the transfer (via temp repo or not)
+        - done: ids of the issues already transferred, for each source repo
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.lock = threading.Lock()
+        self.data = {"stage": None, "done": {}}
+        if os.path.exists(file_name):
+            with open(file_name, "r") as f:
+                self.data = json.load(f)
+            logger.info(f"Resuming transfer from checkpoint {file_name} (stage: {self.data['stage']})")
+
+    def save(self):
+        with open(self.file_name, "w") as f:
+            json.dump(self.data, f, indent=2)
+
+    def done(self, repo):
+        return set(self.data["done"].get(repo, []))
+
+    def add_done(self, repo, issue_ids):
+        with self.lock:
+            self.data["done"].setdefault(repo, []).extend(issue_ids)
+            self.save()
+
+    def set_stage(self, stage):
+        with self.lock:
+            self.data["stage"] = stage
+            self.save()
+
+    def stage(self):
+        return self.data["stage"]
+
 
 # ==========================
 # Helpers
 # ==========================
 
-def transfer_issue(issue_id, target_repo_id):
-    """Executes the transfer mutation for a single issue."""
-    mutation = """
-    mutation($issueId: ID!, $repositoryId: ID!) {
-      transferIssue(input: {issueId: $issueId, repositoryId: $repositoryId}) {
-        issue { url }
-      }
-    }
+def transfer_issues(repo1, repo2, closed=False, checkpoint=None, batch_size=BATCH_SIZE,
+                    workers=MAX_WORKERS, dry_run=False) -> int:
     """
-    logger.debug(f"Running mutation to transfer issue {issue_id} to repo {target_repo_id} on mutation: {mutation}")
-    return utils_gh.run_query(mutation, {"issueId": issue_id, "repositoryId": target_repo_id})
-
+    Transfer the issues of repo1 to repo2, in batches of aliased transferIssue mutations.
 
-def transfer_issues(repo1, repo2, closed=False):
+    :return: the number of issues that failed to be transferred
+    """
     org1, name1 = repo1.split("/")
     org2, name2 = repo2.split("/")
 
@@ -81,24 +129,51 @@ def transfer_issues(repo1, repo2, closed=False):
     except Exception as e:
         raise Exception(f"❌ Initialization of issue transferring failed: {e}")
 
+    # skip issues already transferred in a previous (interrupted) run
+    if checkpoint is not None:
+        done = checkpoint.done(repo1)
+        issues = [i for i in issues if i["id"] not in done]
+
     if not issues:
         logger.info(f"✅ No open issues found to transfer in repo {repo1}.")
-        return
-
-    logger.info(f"📋 Found {len(issues)} issues. Beginning transfer...")
-
-    # 2. Loop and Transfer
-    for issue in issues:
-        try:
-            logger.info(f"🔄 Transferring issue #{issue['number']}: {issue['title']}...")
-            transfer_issue(issue['id'], repo2_id)
-            logger.info("✅ Done!", depth=1)
-            # Small sleep to avoid hitting secondary rate limits
-            time.sleep(0.5)
-        except Exception as e:
-            logger.error(f"Failed! ❌\n   Error: {e}")
+        return 0
+
+    logger.info(f"📋 Found {len(issues)} issues. Beginning transfer in batches of {batch_size}...")
+    if dry_run:
+        for issue in issues:
+            logger.info(f"[DRY-RUN] Transfer issue #{issue['number']}: {issue['title']}", depth=1)
+        return 0
+
+    # 2. Transfer in batches of aliased mutations, a few batches at a time
+    batches = [issues[i:i + batch_size] for i in range(0, len(issues), batch_size)]
+
+    def transfer_batch(batch):
+        items = [{"issueId": issue["id"], "repositoryId": repo2_id} for issue in batch]
+        return utils_gh.call_with_retry(
+            utils_gh.run_aliased,
+            "mutation",
+            TRANSFER_FIELD,
+            {"issueId": "ID!", "repositoryId": "ID!"},
+            items,
+        )
 
-    logger.info("🎉 Bulk transfer complete.")
+    failed = 0
+    for batch, results, e in utils_gh.run_concurrently(transfer_batch, batches, workers):
+        if e is not None:
+            results = [(None, str(e))] * len(batch)
+        transferred = []
+        for issue, (data, error) in zip(batch, results):
+            if data is not None and data.get("issue") is not None:
+                transferred.append(issue["id"])
+                logger.info(f"✅ Transferred issue #{issue['number']}: {issue['title']} -> {data['issue']['url']}")
+            else:
+                failed += 1
+                logger.error(f"Failed transferring issue #{issue['number']}: {issue['title']} ❌\n   Error: {error}")
+        if checkpoint is not None and transferred:
+            checkpoint.add_done(repo1, transferred)
+
+    logger.info(f"🎉 Bulk transfer complete: {len(issues) - failed} transferred, {failed} failed.")
+    return failed
 
 
 def wait_for_repo(gh, full_name, timeout=10):
@@ -135,6 +210,12 @@ def main():
     parser.add_argument(
         "--token-file", "-t", required=True, help="File containing GitHub token"
     )
+    parser.add_argument(
+        "--batch", type=int, default=BATCH_SIZE, help="Issues transferred per GraphQL request (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=MAX_WORKERS, help="Concurrent GraphQL requests (default: %(default)s)"
+    )
     args = parser.parse_args()
     logger.info(args)
 
@@ -161,7 +242,7 @@ def main():
         logger.error("No token file for authentication provided, quitting....")
         exit(1)
     try:
-        gh = utils_gh.open_gitHub(token_file=args.token_file)
+        gh = utils_gh.open_gitHub(token=args.token_file)
     except:
         logger.error(
             "Something wrong happened during GitHub authentication. Check credentials."
@@ -177,12 +258,32 @@ def main():
         logger.error(f"Error accessing source/destination repositories: {e}")
         exit(1)
 
+    checkpoint = Checkpoint(
+        CHECKPOINT_FILE.format(
+            source=source_repo_full.replace("/", "_"), dest=dest_repo_full.replace("/", "_")
+        )
+    )
+    transfer_opts = dict(
+        checkpoint=None if args.dry_run else checkpoint,
+        batch_size=args.batch,
+        workers=args.workers,
+        dry_run=args.dry_run,
+    )
+
     # we use a temp repo to transfer issues from
     #  if same org, then temp is just the source repo
     #  otherwise, create temp in source to get all issues, then transfer ownership to dest org, then transfer issues to dest repo, then delete temp
     if same_org:
         logger.info("Source and destination repos are in the same organization. No need for temporary repo.")
         gh_temp_repo = gh.get_repo(source_repo_full)
+    elif checkpoint.stage() == "temp_transferred":
+        # interrupted after the temp repo was moved to the destination org
+        gh_temp_repo = wait_for_repo(gh, f"{dest_org_name}/temp")
+        logger.info(f"Using temporary repo {gh_temp_repo.full_name} from previous run.")
+    elif args.dry_run:
+        # just report the issues that would be transferred (no temp repo created)
+        transfer_issues(source_repo_full, dest_repo_full, closed=args.closed, **transfer_opts)
+        exit(0)
     else:
         # ==========================
         # 1. Create temporary repo in source org
@@ -206,16 +307,21 @@ def main():
         # # 2. Transfer issues A -> T
         # # ==========================
         logger.info(f"Transferring ALL issues {args.SOURCE_REPO} ---> {gh_temp_repo.full_name}")
-        transfer_issues(args.SOURCE_REPO, gh_temp_repo.full_name, closed=args.closed)
+        failed = transfer_issues(args.SOURCE_REPO, gh_temp_repo.full_name, closed=args.closed, **transfer_opts)
+        # do not move the temp repo on with issues missing: keep the checkpoint to resume
+        if failed > 0:
+            logger.error(
+                f"{failed} issues could not be transferred to {gh_temp_repo.full_name}: keeping it and "
+                f"checkpoint {checkpoint.file_name}. Run again to resume."
+            )
+            exit(1)
 
         # ==========================
         # 3. Transfer repo T to destination org
         # ==========================
         # easier and clearner to do via REST API than GraphQL, as there is a specific endpoint for this: https://docs.github.com/rest/repos/repos#transfer-a-repository
         logger.info(f"Transferring repo {gh_temp_repo.full_name} to organization {dest_org_name}")
-        transfer_url = (
-            f"https://api.github.com/repos/{source_org_name}/temp/transfer"
-        )
+        transfer_url = f"{utils_gh.API_URL}/repos/{source_org_name}/temp/transfer"
         response = requests.post(
             transfer_url, headers={"Authorization": f"token {utils_gh.TOKEN}"}, json={"new_owner": dest_org_name}
         )
@@ -224,6 +330,7 @@ def main():
 
         # Wait until repo appears in destination org
         gh_temp_repo = wait_for_repo(gh, f"{dest_org_name}/temp")
+        checkpoint.set_stage("temp_transferred")
 
     # # ==========================
     # # 4. Transfer issues T -> B
@@ -233,7 +340,17 @@ def main():
     logger.info(
         f"Transferring ALL issues in {gh_temp_repo.full_name} ---> {gh_repo_dest.full_name}"
     )
-    transfer_issues(gh_temp_repo.full_name, gh_repo_dest.full_name, closed=True)
+    failed = transfer_issues(gh_temp_repo.full_name, gh_repo_dest.full_name, closed=True, **transfer_opts)
+    if args.dry_run:
+        exit(0)
+
+    # keep the temp repo (with the issues left in it) and the checkpoint to resume
+    if failed > 0:
+        logger.error(
+            f"{failed} issues could not be transferred from {gh_temp_repo.full_name}: keeping it and "
+            f"checkpoint {checkpoint.file_name}. Run again to resume."
+        )
+        exit(1)
 
     # ==========================
     # 5. Delete temporary repo if was needed
@@ -243,6 +360,10 @@ def main():
         gh_temp_repo.delete()
         logger.info("Issue transfer completed successfully. 🏆")
 
+    # all done: no need to resume anymore
+    if os.path.exists(checkpoint.file_name):
+        os.remove(checkpoint.file_name)
+
 
 if __name__ == "__main__":
     main()
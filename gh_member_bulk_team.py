@@ -9,6 +9,13 @@ Uses PyGithub (https://github.com/PyGithub/PyGithub) as API to GitHub:
 
 Some usage help on PyGithub:
     https://www.thepythoncode.com/article/using-github-api-in-python
+
+With --sync, memberships are reconciled against a CSV file with columns "username" and
+"team" (team name or slug, or * for all teams): current members of all teams are fetched
+in bulk via GraphQL, and only the needed additions (and removals of listed users from
+teams not listed for them, unless --no-prune) are applied, concurrently:
+
+    $ python gh_member_bulk_team.py RMIT-COSC1127-1125-AI24 - --sync tutors.csv --dry-run
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024"
@@ -20,10 +27,44 @@ import pytz
 
 from argparse import ArgumentParser
 
+import csv
 import util, utils_gh
 
 CSV_GITHUB_USERNAME = "github_username"
 CSV_GITHUB_IDENTIFIER = "identifier"
+CSV_SYNC_USERNAME = "username"
+CSV_SYNC_TEAM = "team"
+
+QUERY_TEAMS_MEMBERS = """
+query($org: String!, $cursor: String) {
+  organization(login: $org) {
+    teams(first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        slug
+        members(first: 100, membership: IMMEDIATE) {
+          pageInfo { hasNextPage endCursor }
+          nodes { login }
+        }
+      }
+    }
+  }
+}
+"""
+
+QUERY_TEAM_MEMBERS = """
+query($org: String!, $slug: String!, $cursor: String) {
+  organization(login: $org) {
+    team(slug: $slug) {
+      members(first: 100, after: $cursor, membership: IMMEDIATE) {
+        pageInfo { hasNextPage endCursor }
+        nodes { login }
+      }
+    }
+  }
+}
+"""
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -40,6 +81,98 @@ def get_time_now():
     return datetime.datetime.now(tz=TIMEZONE).strftime("%Y-%m-%d-%H-%M-%S")
 
 
+def get_teams_members(org_name: str) -> dict:
+    """
+    Get all teams of an org with their (direct) members via GraphQL, 100 teams per request.
+
+    :return: a dictionary team slug -> {"name": team name, "members": set of logins (lowercase)}
+    """
+    teams = dict()
+    for t in utils_gh.iter_query_pages(
+        QUERY_TEAMS_MEMBERS,
+        {"org": org_name},
+        lambda data: data["organization"]["teams"],
+    ):
+        members = {m["login"].lower() for m in t["members"]["nodes"]}
+        if t["members"]["pageInfo"]["hasNextPage"]:
+            more = utils_gh.iter_query_pages(
+                QUERY_TEAM_MEMBERS,
+                {"org": org_name, "slug": t["slug"], "cursor": t["members"]["pageInfo"]["endCursor"]},
+                lambda data: data["organization"]["team"]["members"],
+            )
+            members |= {m["login"].lower() for m in more}
+        teams[t["slug"]] = {"name": t["name"], "members": members}
+    return teams
+
+
+def load_sync_csv(csv_file: str, teams: dict) -> dict:
+    """
+    Load the desired memberships from a CSV with columns username and team (name, slug or *).
+
+    :return: a dictionary username (lowercase) -> set of team slugs
+    """
+    slugs = {t["name"].lower(): slug for slug, t in teams.items()}
+    slugs.update({slug.lower(): slug for slug in teams})
+
+    desired = dict()
+    with open(csv_file, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            username = row[CSV_SYNC_USERNAME].strip().lower()
+            team = row[CSV_SYNC_TEAM].strip()
+            user_teams = desired.setdefault(username, set())
+            if team == "*":
+                user_teams.update(teams.keys())
+            elif team.lower() in slugs:
+                user_teams.add(slugs[team.lower()])
+            else:
+                logging.warning(f"Team {team} (for user {username}) not found in the organization")
+    return desired
+
+
+def sync_memberships(g, org_name: str, teams: dict, desired: dict, prune=True,
+                     dry_run=False, workers=utils_gh.MAX_WORKERS) -> list:
+    """
+    Apply the membership changes needed so that the users in desired are exactly in their teams.
+
+    :return: list of operations done as (op, username, team slug, error or None)
+    """
+    ops = []
+    for username, user_teams in desired.items():
+        for slug, t in teams.items():
+            if slug in user_teams and username not in t["members"]:
+                ops.append(("add", username, slug))
+            elif prune and slug not in user_teams and username in t["members"]:
+                ops.append(("remove", username, slug))
+    logging.info(
+        f"Changes needed: {len([o for o in ops if o[0] == 'add'])} additions, "
+        f"{len([o for o in ops if o[0] == 'remove'])} removals"
+    )
+    if not dry_run:
+        utils_gh.check_rate_limit(g, len(ops))
+
+    def apply(op):
+        action, username, slug = op
+        url = f"/orgs/{org_name}/teams/{slug}/memberships/{username}"
+        if dry_run:
+            return
+        if action == "add":
+            utils_gh.call_with_retry(
+                g.requester.requestJsonAndCheck, "PUT", url, input={"role": "member"}
+            )
+        else:
+            utils_gh.call_with_retry(g.requester.requestJsonAndCheck, "DELETE", url)
+
+    done = []
+    for op, _, e in utils_gh.run_concurrently(apply, ops, workers):
+        action, username, slug = op
+        if e is not None:
+            logging.error(f"Failed to {action} user **{username}** in team {slug}: {e}")
+        else:
+            print(f"{'Adding' if action == 'add' else 'Deleting'} user **{username}** {'to' if action == 'add' else 'from'} team {slug}")
+        done.append((action, username, slug, e))
+    return done
+
+
 if __name__ == "__main__":
     parser = ArgumentParser(
         description="Add a username to a list of teams in an organization"
@@ -50,7 +183,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-t",
         "--token",
-        default=os.environ["GHTOKEN"] if os.environ["GHTOKEN"] is not None else None,
+        default=os.environ.get("GHTOKEN"),
         help="File containing GitHub authorization token/password. Defaults to GHTOKEN env variable.",
     )
     parser.add_argument(
@@ -85,6 +218,24 @@ if __name__ == "__main__":
         default=False,
         help="Just list the teams available; nothing more (Default: %(default)s)",
     )
+    parser.add_argument(
+        "--sync",
+        metavar="CSV",
+        help="Reconcile memberships with a CSV file of username,team rows (USERNAME is ignored).",
+    )
+    parser.add_argument(
+        "--no-prune",
+        action="store_true",
+        default=False,
+        help="In sync mode, only add memberships, never remove (Default: %(default)s)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=utils_gh.MAX_WORKERS,
+        help="Number of membership changes to apply concurrently in sync mode (Default: %(default)s)",
+    )
     args = parser.parse_args()
     print(args)
     print(f"Running the script on: {get_time_now()}", flush=True)
@@ -93,12 +244,7 @@ if __name__ == "__main__":
         logging.error("No authentication provided, quitting....")
         exit(1)
     try:
-        g = utils_gh.open_gitHub(
-            token=args.token,
-            token_file=args.token_file,
-            user=args.user,
-            password=args.password,
-        )
+        g = utils_gh.open_gitHub(token=args.token_file or args.token)
     except Exception:
         logging.error("Something went wrong during GitHub authentication.")
         exit(1)
@@ -106,6 +252,22 @@ if __name__ == "__main__":
     logging.info(f"Getting organization {args.ORG_NAME}...")
     org = g.get_organization(args.ORG_NAME)
 
+    if args.sync:
+        teams = get_teams_members(args.ORG_NAME)
+        logging.info(f"Teams available: {len(teams)}")
+        # limit the scope of the sync to the teams selected, if any
+        if args.nteams:
+            teams = {k: t for k, t in teams.items() if t["name"] not in args.nteams}
+        elif args.teams:
+            teams = {k: t for k, t in teams.items() if t["name"] in args.teams}
+        desired = load_sync_csv(args.sync, teams)
+        done = sync_memberships(
+            g, args.ORG_NAME, teams, desired, not args.no_prune, args.dry_run, args.workers
+        )
+        errors = [d for d in done if d[3] is not None]
+        logging.info(f"Finished sync: {len(done) - len(errors)} changes applied, {len(errors)} errors.")
+        exit(1 if errors else 0)
+
     logging.info(f"Getting GH user for {args.USERNAME}...")
     user = g.get_user(args.USERNAME)
 
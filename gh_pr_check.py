@@ -14,12 +14,20 @@ Uses PyGithub (https://github.com/PyGithub/PyGithub) as API to GitHub:
 PyGithub documentation: https://pygithub.readthedocs.io/en/latest/introduction.html
 Other doc on PyGithub: https://www.thepythoncode.com/article/using-github-api-in-python
 
+With --graphql, the merged state and the force-push timeline events of the PR are fetched
+for many repos per GraphQL request (--batch). Adding --incremental only reports what changed
+since the last scan (newly merged PRs, force pushes after the last scan, newly missing PRs),
+using the state saved in pr_check_state.json, so the check can be run hourly near deadlines:
+
+    $ python gh_pr_check.py repos.csv --no 1 -t ~/.ssh/keys/gh-token-ssardina.txt --graphql --incremental
 
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024-2026"
 
 import csv
+import json
+import os
 from argparse import ArgumentParser
 import traceback
 
@@ -42,6 +50,117 @@ setup_logger(source=SCRIPT_NAME, timezone=TIMEZONE.key)
 # Application global variables
 CSV_HEADER = ["REPO_ID_SUFFIX", "REPO_ID", "PR_URL", "RESULT", "DETAILS"]
 CSV_CHECK = "pr_check.csv"
+STATE_FILE = "pr_check_state.json"
+BATCH_SIZE = 25  # repos per GraphQL request
+
+PR_FIELDS = """
+number
+title
+url
+merged
+timelineItems(itemTypes: [HEAD_REF_FORCE_PUSHED_EVENT], last: 10, since: $since) {
+    nodes { ... on HeadRefForcePushedEvent { createdAt actor { login } } }
+}
+"""
+PR_BY_NUMBER_FIELD = f"""
+repository(owner: $owner, name: $name) {{
+    pullRequest(number: $number) {{ {PR_FIELDS} }}
+}}
+"""
+PR_BY_TITLE_FIELD = f"""
+repository(owner: $owner, name: $name) {{
+    pullRequests(first: 20, orderBy: {{field: CREATED_AT, direction: ASC}}) {{
+        nodes {{ {PR_FIELDS} }}
+    }}
+}}
+"""
+
+
+def scan_prs_graphql(list_repos: list, pr_no: int, pr_title: str, since: str = None,
+                     batch_size=BATCH_SIZE) -> dict:
+    """
+    Get the state of the PR (by number or title) of each repo, many repos per GraphQL request.
+
+    :param since: only get force-push events after this ISO timestamp (None for all)
+    :return: dictionary repo id -> {"pr": PR data or None, "error": error or None}
+    """
+    if pr_no is not None:
+        field, var_types = PR_BY_NUMBER_FIELD, {"number": "Int!"}
+    else:
+        field, var_types = PR_BY_TITLE_FIELD, {}
+    var_types = {"owner": "String!", "name": "String!", "since": "DateTime", **var_types}
+
+    scan = dict()
+    for batch in utils_gh.chunks(list_repos, batch_size):
+        items = []
+        for r in batch:
+            owner, name = util.parse_full_repo(r["REPO_ID"])
+            items.append({"owner": owner, "name": name, "since": since, "number": pr_no})
+        results = utils_gh.call_with_retry(utils_gh.run_aliased, "query", field, var_types, items)
+        for r, (data, error) in zip(batch, results):
+            pr = None
+            if data is not None and pr_no is not None:
+                pr = data["pullRequest"]
+            elif data is not None:
+                pr = next((p for p in data["pullRequests"]["nodes"] if pr_title in p["title"]), None)
+            if pr is None and error is not None and "Could not resolve to a PullRequest" not in error:
+                scan[r["REPO_ID"]] = {"pr": None, "error": error}
+            else:
+                scan[r["REPO_ID"]] = {"pr": pr, "error": None}
+        logger.info(f"Scanned {len(scan)}/{len(list_repos)} repos...")
+    return scan
+
+
+def check_prs_graphql(list_repos: list, pr_no: int, pr_title: str, incremental=False,
+                      batch_size=BATCH_SIZE) -> list:
+    """
+    Check the feedback PR of all repos via GraphQL; with incremental, only report changes
+    since the last scan recorded in STATE_FILE (which is then updated).
+
+    :return: the rows for the CSV report
+    """
+    state = {"scanned_at": None, "repos": {}}
+    if incremental and os.path.exists(STATE_FILE):
+        with open(STATE_FILE, "r") as f:
+            state = json.load(f)
+        logger.info(f"Reporting changes since last scan at {state['scanned_at']}")
+    since = state["scanned_at"] if incremental else None
+    scanned_at = util.date_to_utc(util.NOW).isoformat()
+
+    scan = scan_prs_graphql(list_repos, pr_no, pr_title, since, batch_size)
+
+    rows_csv = []
+    for r in list_repos:
+        row, repo_name, repo_url = r["REPO_ID_SUFFIX"], r["REPO_ID"], r["REPO_HTTP"]
+        result = scan[repo_name]
+        previous = state["repos"].get(repo_name, {})
+        pr = result["pr"]
+        if result["error"] is not None:
+            logger.error(f"Error in repo {repo_name}: {result['error']}", indent=1)
+            rows_csv.append([row, repo_name, "", "error", result["error"]])
+            continue
+        if pr is None:
+            if not previous.get("missing"):
+                logger.error(f"No PR {pr_no or pr_title} in repo {repo_name}.", indent=1)
+                rows_csv.append([row, repo_name, "", "missing", pr_no or pr_title])
+            state["repos"][repo_name] = {"missing": True}
+            continue
+
+        pr_url = f"{repo_url}/pull/{pr['number']}"
+        if pr["merged"] and not previous.get("merged"):
+            logger.warning(f"PR Feedback merged!!! {repo_name} - URL: {pr_url}", indent=1)
+            rows_csv.append([row, repo_name, pr_url, "merged", ""])
+        events = pr["timelineItems"]["nodes"]
+        if events:
+            actor = events[-1]["actor"]["login"] if events[-1]["actor"] else ""
+            logger.warning(f"PR Feedback forced pushed!!! {repo_name} - actor: {actor} - URL: {pr_url}", indent=1)
+            rows_csv.append([row, repo_name, pr_url, "push_forced", actor])
+        state["repos"][repo_name] = {"missing": False, "merged": pr["merged"]}
+
+    state["scanned_at"] = scanned_at
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+    return rows_csv
 
 
 if __name__ == "__main__":
@@ -58,6 +177,22 @@ if __name__ == "__main__":
     )
     parser.add_argument("--no", type=int, help="number of the PR to merge.")
     parser.add_argument("--title", help="title of PR to merge.")
+    parser.add_argument(
+        "--graphql",
+        action="store_true",
+        help="scan many repos per request via GraphQL.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"with --graphql, only report changes since the last scan (state in {STATE_FILE}).",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=BATCH_SIZE,
+        help="with --graphql, number of repos per GraphQL request (Default: %(default)s).",
+    )
     args = parser.parse_args()
     logger.info(f"Starting script {SCRIPT_NAME} on {TIMEZONE}: {NOW_ISO}")
     logger.info(args, indent=1)
@@ -93,6 +228,9 @@ if __name__ == "__main__":
     authors_stats = []
     no_repos = len(list_repos)
     rows_csv = []
+    if args.graphql:
+        rows_csv = check_prs_graphql(list_repos, args.no, args.title, args.incremental, args.batch)
+        list_repos = []  # all done already
     for k, r in enumerate(list_repos, start=1):
         row = r["REPO_ID_SUFFIX"]
         repo_name = r["REPO_ID"]
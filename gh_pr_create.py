@@ -11,15 +11,25 @@ For each repo listed in REPO_CSV:
      upstream commit, and open a pull request from that branch into the target branch
      (or fast-forward the target branch directly when create_pr=False).
 
+The upstream SHA is resolved once for the whole cohort. The repos are then compared
+with it concurrently, and only the repos that are behind are synced, also concurrently,
+by a bounded pool of workers (after checking the rate limit left for it).
+
 Usage:
     python3 gh_pr_create.py REPO_CSV REPO [--branch main] [--title TITLE]
                              [--repos ID [ID ...]] [-t TOKEN] [--csv]
+                             [--ff] [-w WORKERS] [--dry-run]
 
     REPO_CSV    CSV file listing the repos to process. Must have (at least) the
                 columns REPO_ID_SUFFIX, REPO_ID (owner/name) and REPO_HTTP, as
                 produced by util.get_repos_from_csv().
     REPO        Upstream/source repo, in "owner/name" form, that all listed repos
                 should be synced with.
+    --ff        Fast-forward the target branch of repos with no commits of their own
+                (i.e., strictly behind upstream) instead of opening a PR. Repos with
+                their own commits still get a PR.
+    -w          Number of repos to compare/sync concurrently.
+    --dry-run   Only compare the repos and report which ones would be synced.
 
 Requires PyGithub (https://github.com/PyGithub/PyGithub) as the GitHub API client:
 
@@ -31,13 +41,15 @@ Other doc on PyGithub: https://www.thepythoncode.com/article/using-github-api-in
 sync_fork() returns a (status, detail) tuple per repo, appended to a results list and,
 if --csv is passed, written/appended to CSV_OUTPUT ("pr_create.csv"). Possible status
 values: up_to_date, pr_created, pr_exists (an open sync PR was already there, skipped
-to avoid duplicates), fast_forwarded, error_branch, error_pr, error_ff.
+to avoid duplicates), fast_forwarded, dry-run, error_compare, error_branch, error_pr,
+error_ff, error_unexpected.
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024-2025"
 
 import csv
 from argparse import ArgumentParser
+from collections import namedtuple
 import traceback
 
 # https://pygithub.readthedocs.io/en/latest/introduction.html
@@ -67,6 +79,8 @@ CSV_OUTPUT = "pr_create.csv"
 CSV_HEADER = ["REPO_ID_SUFFIX", "REPO_URL", "RESULT", "DETAILS"]
 
 PR_TITLE = "Sync Assignment"
+CALLS_PER_SYNC_ESTIMATE = 4  # rough estimate of API calls to sync a repo that is behind
+MAX_WORKERS = 4  # keep low: many concurrent writes trigger GitHub secondary rate limits
 PR_MESSAGE = """
 :wave:! This pull request was automatically generated by the instructor to sync with the upstream assignment repository.
 
@@ -77,6 +91,11 @@ If you have any questions or concerns, please contact your instructor via the fo
 Attention: @{GH_USERNAME}
 """
 
+# comparison of a fork branch (base) with the upstream commit (head), as in GitHub compare:
+# ahead_by = upstream commits the fork lacks, behind_by = commits of the fork's own, and
+# status "ahead" means the fork is strictly behind upstream (i.e., can be fast-forwarded)
+ForkComparison = namedtuple("ForkComparison", ["status", "ahead_by", "behind_by"])
+
 
 def sync_fork(
     repo,   # fork repo (PyGitHub object)
@@ -86,12 +105,17 @@ def sync_fork(
     create_pr=False,  # if True, create PR instead of direct update
     pr_title=PR_TITLE,
     pr_message=PR_MESSAGE,
+    source_sha=None,  # upstream commit to sync to, if already known
+    compare=None,  # comparison of the fork with source_sha, if already known
 ):
     """
     Sync repo (fork) from repo_source (upstream).
 
     Via ChatGPT: https://chatgpt.com/s/t_69cc800eb2d881919841d4dea86a6a06
 
+    When syncing many repos, pass source_sha (and compare) so the upstream branch is
+    resolved only once for all of them, instead of once per repo.
+
     :return: (status, detail) tuple. status is one of "up_to_date", "pr_created",
         "pr_exists", "fast_forwarded", "error_branch", "error_pr", "error_ff".
     """
@@ -101,23 +125,24 @@ def sync_fork(
         f"with {repo_source.full_name}:{source_branch}"
     , depth=1)
 
-    # --- Step 1: Compare (correct cross-fork comparison)
+    # --- Step 1: Get latest upstream commit SHA
+    if source_sha is None:
+        source_sha = repo_source.get_branch(source_branch).commit.sha
+        logger.info(f"Upstream latest SHA: {source_sha}")
+
+    # --- Step 2: Compare (correct cross-fork comparison)
     # compare = repo_source.compare(f"{repo.owner.login}:{target_branch}", source_branch)
-    commit_source = repo_source.get_branch(source_branch).commit.sha
-    compare = repo.compare(target_branch, commit_source)
+    if compare is None:
+        compare = repo.compare(target_branch, source_sha)
 
     logger.info(f"Status: {compare.status}", depth=1)
-    logger.info(f"Behind by: {compare.behind_by}, Ahead by: {compare.ahead_by}", depth=1)
+    logger.info(f"Missing upstream commits: {compare.ahead_by}, own commits: {compare.behind_by}", depth=1)
 
-    if compare.behind_by == 0:
+    if compare.ahead_by == 0:
         logger.info("✅ Fork is already up-to-date. Nothing to do.", depth=1)
         return "up_to_date", ""
 
-    logger.info(f"⚠️ Fork is {compare.behind_by} commits behind upstream.", depth=1)
-
-    # --- Step 2: Get latest upstream commit SHA
-    source_sha = repo_source.get_branch(source_branch).commit.sha
-    logger.info(f"Upstream latest SHA: {source_sha}")
+    logger.info(f"⚠️ Fork is {compare.ahead_by} commits behind upstream.", depth=1)
 
     # --- Step 3: Create/update sync branch in fork
     sync_branch = f"sync-{source_branch}"
@@ -168,7 +193,7 @@ def sync_fork(
 
         try:
             ref = repo.get_git_ref(f"heads/{target_branch}")
-            ref.edit(source_sha, force=True)
+            ref.edit(source_sha, force=False)  # GitHub rejects it if not a fast-forward
             logger.info(f"✅ {target_branch} updated to upstream.", depth=1)
             return "fast_forwarded", target_branch
 
@@ -177,6 +202,24 @@ def sync_fork(
             return "error_ff", str(e)
 
 
+def compare_fork(g: Github, repo_name: str, source_sha: str, target_branch="main"):
+    """
+    Compare the target branch of a repo with the upstream commit.
+
+    PyGithub comparisons are lazy (fetched on first attribute access), so the values
+    are read here, under the retry, and returned as a plain ForkComparison.
+
+    :return: the repo (PyGitHub object) and the ForkComparison
+    """
+
+    def get_comparison(repo):
+        compare = repo.compare(target_branch, source_sha)
+        return ForkComparison(compare.status, compare.ahead_by, compare.behind_by)
+
+    repo = utils_gh.call_with_retry(g.get_repo, repo_name)
+    return repo, utils_gh.call_with_retry(get_comparison, repo)
+
+
 if __name__ == "__main__":
     parser = ArgumentParser(description="Merge PRs in multiple repos")
     parser.add_argument("REPO_CSV", help="List of repositories to get data from.")
@@ -210,6 +253,25 @@ if __name__ == "__main__":
         default=False,
         help="Dump results into CSV files (Default: %(default)s.)",
     )
+    parser.add_argument(
+        "--ff",
+        action="store_true",
+        default=False,
+        help="Fast-forward repos strictly behind upstream instead of creating a PR (Default: %(default)s.)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=MAX_WORKERS,
+        help="Number of repos to compare/sync concurrently (Default: %(default)s.)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        default=False,
+        help="Only compare repos and report which ones would be synced (Default: %(default)s.)",
+    )
     args = parser.parse_args()
     logger.info(f"Starting on {TIMEZONE}: {NOW_ISO} - {args}")
 
@@ -244,26 +306,66 @@ if __name__ == "__main__":
 
     no_repos = len(list_repos)
     output_csv = []
-    for k, r in enumerate(list_repos, start=1):
-        repo_no = r["NO"]
-        repo_id = r["REPO_ID_SUFFIX"]
-        repo_name = r["REPO_ID"]
-        repo_url = r["REPO_HTTP"]
+
+    # first compare all repos with the upstream commit concurrently
+    logger.info(f"Comparing {no_repos} repos with upstream...")
+    to_sync = []
+    for k, (r, result, e) in enumerate(
+        utils_gh.run_concurrently(
+            lambda r: compare_fork(g, r["REPO_ID"], commit_source, args.branch),
+            list_repos,
+            args.workers,
+        ),
+        start=1,
+    ):
+        if e is not None:
+            logger.error(f"[{k}/{no_repos}] {r['REPO_ID']}: cannot compare with upstream: {e}")
+            output_csv.append([r["REPO_ID_SUFFIX"], r["REPO_HTTP"], "error_compare", str(e)])
+            continue
+        repo, compare = result
+        if compare.ahead_by == 0:
+            logger.info(f"[{k}/{no_repos}] {r['REPO_ID']}: up-to-date.")
+            output_csv.append([r["REPO_ID_SUFFIX"], r["REPO_HTTP"], "up_to_date", ""])
+            continue
         logger.info(
-            f"Processing repo {k}/{no_repos}: {repo_no}:{repo_id} ({repo_url})..."
+            f"[{k}/{no_repos}] {r['REPO_ID']}: behind by {compare.ahead_by}, with {compare.behind_by} own commits."
         )
-
-        repo = g.get_repo(repo_name)    # repo to create PR into (i.e., the student repo)
-
-        status, detail = sync_fork(
+        to_sync.append((r, repo, compare))
+    logger.info(f"{len(to_sync)} repos behind upstream need to be synced.")
+
+    if args.dry_run:
+        for r, repo, compare in to_sync:
+            action = "fast-forward" if args.ff and compare.status == "ahead" else "create PR"
+            logger.warning(f"Dry run!!!: Would {action} in {repo.full_name}.")
+            output_csv.append([r["REPO_ID_SUFFIX"], r["REPO_HTTP"], "dry-run", action])
+        to_sync = []
+    elif to_sync:
+        utils_gh.check_rate_limit(g, len(to_sync) * CALLS_PER_SYNC_ESTIMATE)
+
+    # then sync the repos that are behind with a bounded pool of workers
+    def sync(job):
+        r, repo, compare = job
+        return sync_fork(
             repo,  # fork repo (PyGitHub object)
             repo_source,  # upstream repo (PyGitHub object)
             source_branch=args.branch,  # branch in upstream
             target_branch=args.branch,  # branch in fork
-            create_pr=True,  # if True, create PR instead of direct update
+            create_pr=not (args.ff and compare.status == "ahead"),  # only fast-forward repos strictly behind upstream
             pr_title=args.title,
+            source_sha=commit_source,
+            compare=compare,
         )
-        output_csv.append([repo_id, repo_url, status, detail])
+
+    for k, ((r, repo, _), result, e) in enumerate(
+        utils_gh.run_concurrently(sync, to_sync, args.workers), start=1
+    ):
+        if e is not None:
+            logger.error(f"[{k}/{len(to_sync)}] {repo.full_name}: unexpected error: {e}")
+            status, detail = "error_unexpected", str(e)
+        else:
+            status, detail = result
+            logger.info(f"[{k}/{len(to_sync)}] {repo.full_name}: {status} {detail}")
+        output_csv.append([r["REPO_ID_SUFFIX"], r["REPO_HTTP"], status, detail])
 
     # print summary stats
     no_errors = len([x for x in output_csv if str(x[2]).startswith("error")])
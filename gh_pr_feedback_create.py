@@ -37,9 +37,23 @@ WHAT IT DOES, per repo in the input CSV:
          d. Opens the PR: title "Feedback", head `main` -> base `feedback`, body filled in
             from MESSAGE_PR (welcome message, autograding link, notes-for-teachers block).
 
+GRAPHQL PRE-CHECK (--graphql)
+    Steps 1 and 2 above page through the whole history of `main` (to find its first
+    commit) and through the PRs of every repo. With --graphql, both checks are instead
+    done for BATCH_SIZE repos per GraphQL request, before processing any repo:
+      - the force-push check becomes an ancestry check: BASE_SHA must be an ancestor of
+        (or equal to) the head of `main`, as reported by comparing `main` against
+        BASE_SHA (no history is walked);
+      - the number of commits on `main` is read from the history `totalCount`;
+      - the first 100 PRs (oldest first) are searched for the Feedback PR (the REST
+        listing is only used for repos with more PRs than that).
+    So a healthy repo costs a fraction of a request. Repos needing a new PR are then
+    processed as usual; if no BASE_SHA is given, only those repos walk `main` to find
+    its first commit.
+
 USAGE
     python3 gh_pr_feedback_create.py REPO_CSV [BASE_SHA] [--repos ID ...] [-t TOKEN]
-                                      [--dry-run] [--csv]
+                                      [--dry-run] [--csv] [--graphql]
 
     REPO_CSV   CSV with (at least) columns REPO_ID_SUFFIX, REPO_ID, REPO_HTTP — see
                util.get_repos_from_csv() / util.REPOS_HEADER_CSV for the expected shape
@@ -53,6 +67,7 @@ USAGE
                (if omitted) the GHTOKEN/GH_TOKEN environment variable. Needs repo scope
                (create branches/files/PRs) on the target org.
     --dry-run  Report what would happen without creating branches, files, or PRs.
+    --graphql  Pre-check all repos with batched GraphQL queries (see above).
     --csv      Also present for interface consistency with sibling scripts; note that a
                CSV report (CSV_OUTPUT, default "pr_create.csv") is currently always
                appended regardless of this flag (see suggested improvements below).
@@ -103,6 +118,18 @@ setup_logger(source=SCRIPT_NAME, timezone=TIMEZONE.key)
 
 PR_TITLE = "Feedback"
 CALLS_PER_REPO_ESTIMATE = 5  # rough estimate of API calls per repo for this script
+BATCH_SIZE = 25  # repos per GraphQL request in --graphql mode
+
+MAIN_FIELDS = """
+main: ref(qualifiedName: "refs/heads/main") {{
+    target {{ oid ... on Commit {{ history(first: 0) {{ totalCount }} }} }}
+    {COMPARE}
+}}
+pullRequests(first: 100, orderBy: {{field: CREATED_AT, direction: ASC}}) {{
+    pageInfo {{ hasNextPage }}
+    nodes {{ number title merged }}
+}}
+"""
 
 #####################################
 # LOCAL GLOBAL VARIABLES FOR SCRIPT
@@ -137,6 +164,79 @@ The base branch (`feedback`) is frozen at the starter so the diff always reflect
 Subscribed: @{GH_USERNAME}
 """
 
+def find_pr_rest(repo, title: str):
+    """Find the first PR (any state, oldest first) with the given title, listing all PRs of the repo."""
+    pr = next(
+        (
+            pr
+            for pr in repo.get_pulls(state="all", sort="created", direction="asc")
+            if pr.title == title
+        ),
+        None,
+    )
+    return None if pr is None else {"number": pr.number, "merged": pr.merged}
+
+
+def first_commit_rest(repo) -> tuple:
+    """Get the first commit of main and the number of commits in it (pages through all history!)."""
+    commits = repo.get_commits("main")
+    return commits[commits.totalCount - 1].sha, commits.totalCount
+
+
+def precheck_repos_graphql(list_repos: list, base_sha: str, title: str, batch_size=BATCH_SIZE) -> dict:
+    """
+    Check main and the Feedback PR of each repo, many repos per GraphQL request.
+
+    :param base_sha: the expected base SHA, checked to be an ancestor of main (None to skip the check)
+    :return: dictionary repo name -> dict with keys:
+        - head: the SHA of the head of main
+        - commits: number of commits in main
+        - base_ok: whether base_sha is an ancestor of (or equal to) main (True if no base_sha)
+        - pr: {"number", "merged"} of the Feedback PR, None if not found
+        - more_prs: True if the repo has more PRs than the ones searched
+        - error: error message if the repo could not be checked, None otherwise
+    """
+    var_types = {"owner": "String!", "name": "String!"}
+    compare = ""
+    if base_sha is not None:
+        var_types["base"] = "String!"
+        compare = "compare(headRef: $base) { status }"
+    field = "repository(owner: $owner, name: $name) {" + MAIN_FIELDS.format(COMPARE=compare) + "}"
+
+    precheck = dict()
+    for batch in utils_gh.chunks(list_repos, batch_size):
+        items = []
+        for r in batch:
+            owner, name = util.parse_full_repo(r["REPO_ID"])
+            items.append({"owner": owner, "name": name, "base": base_sha})
+        results = utils_gh.call_with_retry(utils_gh.run_aliased, "query", field, var_types, items)
+        for r, (data, error) in zip(batch, results):
+            info = {"head": None, "commits": None, "base_ok": False, "pr": None, "more_prs": False, "error": None}
+            precheck[r["REPO_ID"]] = info
+            repo_data = data  # each aliased result is the repository itself (None if not found)
+            if repo_data is None:
+                info["error"] = error or "repository not found"
+                continue
+            main = repo_data["main"]
+            if main is None:
+                info["error"] = "no main branch"
+                continue
+            info["head"] = main["target"]["oid"]
+            info["commits"] = main["target"]["history"]["totalCount"]
+            # main BEHIND/IDENTICAL to base means base is an ancestor of main
+            # (an unknown base SHA gives no comparison at all)
+            comparison = main.get("compare")
+            info["base_ok"] = base_sha is None or (
+                comparison is not None and comparison["status"] in ("BEHIND", "IDENTICAL")
+            )
+            pr = next((p for p in repo_data["pullRequests"]["nodes"] if p["title"] == title), None)
+            if pr is not None:
+                info["pr"] = {"number": pr["number"], "merged": pr["merged"]}
+            info["more_prs"] = repo_data["pullRequests"]["pageInfo"]["hasNextPage"]
+        logger.info(f"Pre-checked {len(precheck)}/{len(list_repos)} repos...")
+    return precheck
+
+
 if __name__ == "__main__":
     parser = ArgumentParser(description="Merge PRs in multiple repos")
     parser.add_argument("REPO_CSV", help="List of repositories to get data from.")
@@ -169,6 +269,12 @@ if __name__ == "__main__":
         default=False,
         help="Dump results into CSV files (Default: %(default)s.)",
     )
+    parser.add_argument(
+        "--graphql",
+        action="store_true",
+        default=False,
+        help=f"pre-check main and the Feedback PR of all repos in batched GraphQL requests ({BATCH_SIZE} repos each).",
+    )
     args = parser.parse_args()
     logger.info(f"Starting on {TIMEZONE}: {NOW_ISO} - {args}")
 
@@ -210,6 +316,10 @@ if __name__ == "__main__":
             indent=2,
         )
 
+    precheck = dict()
+    if args.graphql:
+        precheck = precheck_repos_graphql(list_repos, args.BASE_SHA, args.title)
+
     ###############################################
     # Process each repo in list_repos
     ###############################################
@@ -225,54 +335,68 @@ if __name__ == "__main__":
                 f"Processing repo {k}/{no_repos}: {repo_no}:{repo_id} ({repo_url})..."
             )
 
-            repo = g.get_repo(repo_name)
-
-            # first check that no force-pushed has over-written main branch
-            commits = repo.get_commits("main")
-            no_commits = commits.totalCount
-            first_commit_main = commits[commits.totalCount - 1]
-
-            # if no sha given, use the first commit in main
-            base_sha = args.BASE_SHA if args.BASE_SHA else first_commit_main.sha
-
-            if first_commit_main.sha != base_sha:
-                logger.error(
-                    f"First commit is different from expected, forced pushed?", indent=2
-                )
-                output_csv.append([repo_id, repo_url, "error_forced", first_commit_main.sha])
-                continue
+            if args.graphql:
+                info = precheck[repo_name]
+                if info["error"] is not None:
+                    logger.error(f"Error checking repo: {info['error']}", indent=2)
+                    output_csv.append([repo_id, repo_url, "exception_get_pr", info["error"]])
+                    continue
+                if not info["base_ok"]:
+                    logger.error(
+                        "Base SHA is not an ancestor of main, forced pushed?", indent=2
+                    )
+                    output_csv.append([repo_id, repo_url, "error_forced", info["head"]])
+                    continue
+                repo = None  # only fetched if the PR needs to be created
+                no_commits = info["commits"]
+                base_sha = args.BASE_SHA
+                pr_feedback = info["pr"]
+            else:
+                repo = g.get_repo(repo_name)
+
+                # first check that no force-pushed has over-written main branch
+                first_commit_sha, no_commits = first_commit_rest(repo)
+
+                # if no sha given, use the first commit in main
+                base_sha = args.BASE_SHA if args.BASE_SHA else first_commit_sha
+
+                if first_commit_sha != base_sha:
+                    logger.error(
+                        "First commit is different from expected, forced pushed?", indent=2
+                    )
+                    output_csv.append([repo_id, repo_url, "error_forced", first_commit_sha])
+                    continue
+                pr_feedback = None
 
             # check if a Feedback PR already exists (search by title, not PR number,
             # since an earlier issue/PR can shift the Feedback PR's number away from 1)
-            try:
-                pr_feedback = next(
-                    (
-                        pr
-                        for pr in repo.get_pulls(state="all", sort="created", direction="asc")
-                        if pr.title == args.title
-                    ),
-                    None,
-                )
-            except GithubException as e:
-                logger.error(f"Unknown exception listing PRs: {e}", indent=2)
-                output_csv.append([repo_id, repo_url, "exception_get_pr", e])
-                continue
+            if pr_feedback is None and (not args.graphql or info["more_prs"]):
+                try:
+                    repo = repo or g.get_repo(repo_name)
+                    pr_feedback = find_pr_rest(repo, args.title)
+                except GithubException as e:
+                    logger.error(f"Unknown exception listing PRs: {e}", indent=2)
+                    output_csv.append([repo_id, repo_url, "exception_get_pr", e])
+                    continue
 
             if pr_feedback is not None:
                 # Feedback PR already exists, check if it was merged
-                if pr_feedback.merged:
+                if pr_feedback["merged"]:
                     logger.info(
-                        f"PR Feedback (#{pr_feedback.number}) merged!!! {pr_feedback}",
+                        f"PR Feedback (#{pr_feedback['number']}) merged!!! {pr_feedback}",
                         indent=2,
                     )
                     output_csv.append([repo_id, repo_url, "error_merged", ""])
                 else:
-                    logger.info(f"Feedback PR already exists (#{pr_feedback.number}). Nothing to do.", indent=2)
+                    logger.info(f"Feedback PR already exists (#{pr_feedback['number']}). Nothing to do.", indent=2)
                 continue
 
             logger.info(f"No Feedback PR found in repo {repo_name}. We will create it...", indent=2)
 
             # HERE WE KNOW PR IS MISSING, SO WE WILL CREATE IT!
+            repo = repo or g.get_repo(repo_name)
+            if base_sha is None:
+                base_sha, _ = first_commit_rest(repo)
 
             # get the slug to @mentioning in PR text
             slug = repo_id
@@ -309,7 +433,7 @@ if __name__ == "__main__":
             # SECOND, create a PR for feedback branch
             # there must be at least one commit in the main to be able to PR into a feedback PR - create a dummy commit otherwise
             if no_commits == 1:
-                logger.warning(f"No commits in main branch yet, need to create a dummy one to create PR.", indent=2)
+                logger.warning("No commits in main branch yet, need to create a dummy one to create PR.", indent=2)
                 keep_file = ".github/keep"
                 keep_content = " "
                 # Check if the file already exists
@@ -352,7 +476,7 @@ if __name__ == "__main__":
                 logger.error(f"Exception when creating PR in repo {repo_name}: {e}", indent=2)
                 if e.data["message"] == "Validation Failed":
                     # This should not happen anymore as we create a dummy commit in main to be able to PR into feedback
-                    logger.error(f"Perhaps no commits exist in repo.", indent=2)
+                    logger.error("Perhaps no commits exist in repo.", indent=2)
                     output_csv.append(
                         [repo_id, repo_url, "exception_validation", e]
                     )
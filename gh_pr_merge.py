@@ -11,11 +11,22 @@ Library uses REST API: https://docs.github.com/en/rest
 
 Some usage help on PyGithub:
     https://www.thepythoncode.com/article/using-github-api-in-python
+
+With --graphql, the number, state, merged flag and mergeable state of the PR of
+BATCH_SIZE repos are fetched in a single GraphQL query. Then `mergePullRequest` is run
+concurrently, and only on PRs that can be merged: open and not in conflict.
+
+A repo with a problem (no such PR, conflicts, failed merge) never stops the run. Its
+outcome is logged and, with --csv, appended to CSV_OUTPUT together with the outcomes of
+all other repos.
+
+    $ python gh_pr_merge.py repos.csv --title Feedback -t ~/.ssh/keys/gh-token-ssardina.txt --graphql --csv
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2019-2026"
 
 from argparse import ArgumentParser
+import csv
 import os
 from pathlib import Path
 import sys
@@ -30,6 +41,8 @@ from util import (
     TIMEZONE,
     NOW_ISO,
     GH_HTTP_URL_PREFIX,
+    NOW_TXT,
+    add_csv,
 )
 
 SCRIPT_NAME = "gh_merge_pr"
@@ -42,6 +55,174 @@ logger = Slogger(
     timezone=TIMEZONE.key
 )
 
+CSV_OUTPUT = "pr_merge.csv"
+CSV_HEADER = ["REPO_ID_SUFFIX", "REPO_URL", "RESULT", "DETAILS"]
+BATCH_SIZE = 25  # repos per GraphQL query
+
+PR_FIELDS = "id number title url state merged mergeable"
+PR_BY_NUMBER_FIELD = f"""
+repository(owner: $owner, name: $name) {{
+    pullRequest(number: $number) {{ {PR_FIELDS} }}
+}}
+"""
+PR_BY_TITLE_FIELD = f"""
+repository(owner: $owner, name: $name) {{
+    pullRequests(first: 20, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+        nodes {{ {PR_FIELDS} }}
+    }}
+}}
+"""
+MERGE_FIELD = """
+mergePullRequest(input: {pullRequestId: $id, mergeMethod: MERGE}) {
+    pullRequest { merged }
+}
+"""
+
+
+def get_prs_graphql(list_repos: list, pr_no: int, pr_title: str, batch_size=BATCH_SIZE) -> dict:
+    """
+    Get the PR (by number or title) of each repo, many repos per GraphQL query.
+
+    :return: dictionary repo name -> (PR data or None, error or None)
+    """
+    if pr_no is not None:
+        field, var_types = PR_BY_NUMBER_FIELD, {"owner": "String!", "name": "String!", "number": "Int!"}
+    else:
+        field, var_types = PR_BY_TITLE_FIELD, {"owner": "String!", "name": "String!"}
+
+    prs = dict()
+    for batch in utils_gh.chunks(list_repos, batch_size):
+        items = []
+        for r in batch:
+            owner, name = util.parse_full_repo(r["REPO_ID"])
+            items.append({"owner": owner, "name": name, "number": pr_no})
+        results = utils_gh.call_with_retry(utils_gh.run_aliased, "query", field, var_types, items)
+        for r, (data, error) in zip(batch, results):
+            # each aliased result is the repository itself (None if not found)
+            pr = None
+            if data is not None:
+                if pr_no is not None:
+                    pr = data["pullRequest"]
+                else:
+                    nodes = data["pullRequests"]["nodes"]
+                    pr = next((p for p in nodes if pr_title in p["title"]), None)
+            if pr is None and error is not None and "Could not resolve to a PullRequest" not in error:
+                prs[r["REPO_ID"]] = (None, error)
+            else:
+                prs[r["REPO_ID"]] = (pr, None)
+        logger.info(f"Fetched PRs of {len(prs)}/{len(list_repos)} repos...")
+    return prs
+
+
+def merge_pr_graphql(pr: dict) -> bool:
+    """Merge a PR (given its GraphQL data) with mergePullRequest; raise an exception if it fails."""
+    [(data, error)] = utils_gh.run_aliased("mutation", MERGE_FIELD, {"id": "ID!"}, [{"id": pr["id"]}])
+    if error is not None:
+        raise Exception(error)
+    return data["pullRequest"]["merged"]
+
+
+def merge_prs_graphql(list_repos: list, pr_no: int, pr_title: str, workers: int) -> list:
+    """
+    Merge the PR of each repo: find all PRs in batched queries, then merge the eligible ones concurrently.
+
+    :return: list of [repo id, repo url, outcome, details] for each repo
+    """
+    prs = get_prs_graphql(list_repos, pr_no, pr_title)
+
+    outcomes = []
+    eligible = []
+    for r in list_repos:
+        repo_url = f"{GH_HTTP_URL_PREFIX}/{r['REPO_ID']}"
+        pr, error = prs[r["REPO_ID"]]
+        if error is not None:
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "error_query", error])
+        elif pr is None:
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "no_pr", ""])
+        elif pr["merged"]:
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "already_merged", pr["url"]])
+        elif pr["state"] != "OPEN":
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "closed", pr["url"]])
+        elif pr["mergeable"] == "CONFLICTING":
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "conflicting", pr["url"]])
+        else:
+            # MERGEABLE, or UNKNOWN if GitHub has not computed it yet: just try
+            eligible.append((r, pr))
+    logger.info(f"{len(eligible)} PRs eligible to merge out of {len(list_repos)} repos.")
+
+    for k, ((r, pr), merged, e) in enumerate(
+        utils_gh.run_concurrently(lambda job: merge_pr_graphql(job[1]), eligible, workers), start=1
+    ):
+        repo_url = f"{GH_HTTP_URL_PREFIX}/{r['REPO_ID']}"
+        if e is not None:
+            logger.error(f"[{k}/{len(eligible)}] {r['REPO_ID']}: MERGING FAILED: {e}")
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "error_merge", str(e)])
+        elif not merged:
+            logger.error(f"[{k}/{len(eligible)}] {r['REPO_ID']}: MERGING DIDN'T WORK: {pr['url']}")
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "error_merge", pr["url"]])
+        else:
+            logger.info(f"[{k}/{len(eligible)}] {r['REPO_ID']}: merged {pr['url']}")
+            outcomes.append([r["REPO_ID_SUFFIX"], repo_url, "merged", pr["url"]])
+    return outcomes
+
+
+def merge_prs_rest(g: Github, list_repos: list, pr_number: int, pr_title: str) -> list:
+    """
+    Merge the PR of each repo, one repo at a time, via the REST API.
+
+    :return: list of [repo id, repo url, outcome, details] for each repo
+    """
+    no_repos = len(list_repos)
+    outcomes = []
+    for k, r in enumerate(list_repos, start=1):
+        repo_id = r["REPO_ID_SUFFIX"]
+        repo_name = r["REPO_ID"]
+        repo_url = f"{GH_HTTP_URL_PREFIX}/{repo_name}"
+        logger.info(f"Processing repo {k}/{no_repos}: {repo_id} ({repo_url})...")
+
+        try:
+            repo = g.get_repo(repo_name)
+            pr_selected = None
+            if pr_number is not None:
+                pr_selected = repo.get_pull(pr_number)
+            else:
+                for pr in repo.get_pulls(state="all", direction="desc"):
+                    if pr_title in pr.title:
+                        pr_selected = pr
+                        break
+        except GithubException as e:
+            if e.status != 404:
+                logger.error(f"Cannot get PR: {e}", depth=1)
+                outcomes.append([repo_id, repo_url, "error_query", str(e)])
+                continue
+            pr_selected = None
+
+        if pr_selected is None:
+            logger.warning(f"No PR {pr_number if pr_number is not None else f'containing {pr_title!r} in title'}.", depth=1)
+            outcomes.append([repo_id, repo_url, "no_pr", ""])
+            continue
+
+        logger.info(f"Found relevant PR: {pr_selected}", depth=1)
+
+        if pr_selected.merged:
+            logger.info("PR already merged.", depth=1)
+            outcomes.append([repo_id, repo_url, "already_merged", pr_selected.html_url])
+            continue
+
+        logger.info(f"PR is still not merged - will try to merge it: {pr_selected}", depth=1)
+        try:
+            status = pr_selected.merge(merge_method="merge")
+            if status.merged:
+                logger.info("Successful merging...", depth=1)
+                outcomes.append([repo_id, repo_url, "merged", pr_selected.html_url])
+            else:
+                logger.error(f"MERGING DIDN'T WORK - STATUS: {status}", depth=1)
+                outcomes.append([repo_id, repo_url, "error_merge", str(status)])
+        except GithubException as e:
+            logger.error(f"MERGING FAILED WITH EXCEPTION: {e}", depth=1)
+            outcomes.append([repo_id, repo_url, "error_merge", str(e)])
+    return outcomes
+
 
 if __name__ == "__main__":
     parser = ArgumentParser(description="Merge PRs in multiple repos")
@@ -59,6 +240,23 @@ if __name__ == "__main__":
         # default=os.environ.get("GHTOKEN") or os.environ.get("GH_TOKEN"),
         help="File or string containing GitHub authorization token/password.",
     )
+    parser.add_argument(
+        "--graphql",
+        action="store_true",
+        help=f"find PRs in batched GraphQL queries ({BATCH_SIZE} repos each) and merge the eligible ones concurrently.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=utils_gh.MAX_WORKERS,
+        help="number of PRs to merge concurrently with --graphql (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help=f"append the outcome of each repo to {CSV_OUTPUT}.",
+    )
     args = parser.parse_args()
     logger.info(f"Starting script {SCRIPT_NAME} on {TIMEZONE}: {NOW_ISO}")
     logger.info(args, depth=1)
@@ -99,58 +297,30 @@ if __name__ == "__main__":
     ###############################################
     # Process each repo in list_repos
     ###############################################
-    authors_stats = []
+    if args.start is not None:
+        list_repos = list_repos[args.start - 1 :]
     no_repos = len(list_repos)
-    no_merged = 0
-    no_errors = 0
-    for k, r in enumerate(list_repos, start=1):
-        if args.start is not None and k < args.start:
-            continue
-        repo_id = r["REPO_ID_SUFFIX"]
-        repo_name = r["REPO_ID"]
-        repo_url = f"{GH_HTTP_URL_PREFIX}/{repo_name}"
-        logger.info(f"Processing repo {k}/{no_repos}: {repo_id} ({repo_url})...")
-
-        repo = g.get_repo(repo_name)
-        prs = repo.get_pulls(state="all", direction="desc")
-
-        pr_selected = None
-        if pr_number is not None:
-            if prs.totalCount < pr_number:
-                logger.error(
-                    f"No PR with number {pr_number} - Repo has only {prs.totalCount} PRs.", depth=1
-                )
-                exit(1)
-            else:
-                pr_selected = repo.get_pull(pr_number)
-        else:
-            for pr in prs:
-                if pr_title in pr.title:
-                    pr_selected = pr
-                    break
-            if pr_selected is None:
-                logger.warning(f"No PR containing '{pr_title}' in title.", depth=1)
-                continue
-
-        logger.info(f"Found relevant PR: {pr_selected}", depth=1)
-
-        if pr_selected.merged:
-            logger.info("PR already merged.", depth=1)
-            continue
-
-        logger.info(f"PR is still not merged - will try to merge it: {pr_selected}", depth=1)
-        try:
-            status = pr_selected.merge(merge_method="merge")
-            if status.merged:
-                logger.info("Successful merging...", depth=1)
-                no_merged += 1
-            else:
-                logger.error(f"MERGING DIDN'T WORK - STATUS: {status}", depth=1)
-                no_errors += 1
-        except GithubException as e:
-            logger.error(f"MERGING FAILED WITH EXCEPTION: {e}", depth=1)
-            no_errors += 1
+    if args.graphql:
+        outcomes = merge_prs_graphql(list_repos, pr_number, pr_title, args.workers)
+    else:
+        outcomes = merge_prs_rest(g, list_repos, pr_number, pr_title)
 
+    no_merged = len([x for x in outcomes if x[2] == "merged"])
+    no_errors = len([x for x in outcomes if x[2].startswith("error")])
     logger.info(
         f"Finished! Total repos: {no_repos} - Merged successfully: {no_merged} - Failed to merge: {no_errors}."
     )
+    for result in sorted({x[2] for x in outcomes}):
+        repos = sorted(x[0] for x in outcomes if x[2] == result)
+        logger.info(f"{result.upper()} ({len(repos)}): {', '.join(repos)}")
+
+    if args.csv:
+        add_csv(
+            CSV_OUTPUT,
+            CSV_HEADER,
+            sorted(outcomes, key=lambda x: x[2]),
+            append=True,
+            timestamp=NOW_TXT,
+            quoting=csv.QUOTE_NONNUMERIC,
+        )
+        logger.info(f"Output written to CSV file: {CSV_OUTPUT}.")
@@ -15,6 +15,10 @@ Some usage help on PyGithub:
 Example:
 
     $  python ./tools/git-teaching-tools.git/gh_tags_after.py repos.csv submission -t ~/.ssh/keys/gh-token-ssardina.txt --since 2025-10-07T15:30
+
+With --graphql, only the ref refs/tags/<TAG> (and the date of the commit it points to) is
+resolved, for many repos per GraphQL query, instead of listing all tags of each repo and
+then fetching the tagged commit. A whole cohort is checked in a handful of requests.
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024-2025"
@@ -57,6 +61,29 @@ SLEEP_RATE = 10  # number of repos to process before sleeping
 SLEEP_TIME = 5  # sleep time in seconds between API calls
 
 
+def get_tag_rest(g, repo_name: str, tag_name: str) -> dict:
+    """
+    Look up a tag in a repo via the REST API, listing all its tags.
+
+    :return: the tag info (sha, author, authored_date), None if there is no such tag
+    """
+    repo = g.get_repo(repo_name)
+
+    # Retrieve all tags (this is usually a paginated list)
+    tags = list(repo.get_tags())
+
+    # Try to find your tag
+    tag = next((t for t in tags if t.name == tag_name), None)
+    if tag is None:
+        return None
+    commit = tag.commit
+    return {
+        "sha": commit.sha,
+        "author": commit.commit.author.name,
+        "authored_date": commit.commit.author.date,
+    }
+
+
 if __name__ == "__main__":
     parser = ArgumentParser(description="Handle automarking workflows")
     parser.add_argument("REPO_CSV", help="List of repositories to get data from.")
@@ -81,6 +108,11 @@ if __name__ == "__main__":
         type=str,
         help="Get tags before this date. Datetime in ISO format, e.g., 2025-04-09T15:30.",
     )
+    parser.add_argument(
+        "--graphql",
+        action="store_true",
+        help=f"look up only refs/tags/TAG, for {utils_gh.TAG_BATCH_SIZE} repos per GraphQL query.",
+    )
     args = parser.parse_args()
     logger.info(f"Starting script {SCRIPT_NAME} on {TIMEZONE}: {NOW_ISO}")
     logger.info(args, depth=1)
@@ -97,11 +129,8 @@ if __name__ == "__main__":
     ###############################################
     # Authenticate to GitHub
     ###############################################
-    if not args.token_file and not (args.user or args.password):
-        logger.error("No authentication provided, quitting....")
-        exit(1)
     try:
-        g = utils_gh.open_gitHub(token_file=args.token_file)
+        g = utils_gh.open_gitHub(token=args.token_file)
     except Exception:
         logger.error(
             "Something wrong happened during GitHub authentication. Check credentials."
@@ -127,8 +156,11 @@ if __name__ == "__main__":
     no_repos = len(repos)
     output_csv = []
     no_found = 0
+    if args.graphql:
+        logger.info(f"Looking up tag '{args.TAG}' in {no_repos} repos...")
+        repo_tags = utils_gh.get_tag_commits([r["REPO_ID"] for r in repos], args.TAG)
     for k, r in enumerate(repos, start=1):
-        if k % SLEEP_RATE == 0 and k > 0:
+        if not args.graphql and k % SLEEP_RATE == 0 and k > 0:
             logger.info(f"Sleep for {SLEEP_TIME} seconds...")
             time.sleep(SLEEP_TIME)
 
@@ -140,38 +172,36 @@ if __name__ == "__main__":
         logger.info(
             f"Processing repo {k}/{no_repos}: {repo_no}:{repo_id} ({repo_url})..."
         )
-        repo = g.get_repo(repo_name)
-
-        # Retrieve all tags (this is usually a paginated list)
-        tags = list(repo.get_tags())
-        
-        # Try to find your tag
-        tag = next((t for t in tags if t.name == args.TAG), None)
-        if tag:
-            commit = tag.commit
-            tag_date = commit.commit.author.date.astimezone(TIMEZONE)
-            
-            if not (since_dt <= tag_date <= until_dt):
-                logger.warning(f"⛔ Tag '{args.TAG}' found but outside date range ({tag_date}).", depth=1)
-                continue
-            
-            tag_sha = commit.sha[:7]
-            tag_author = commit.commit.author.name
-            tag_name = tag.name            
-            logger.info(f"✅ Found tag '{tag_name}' on commit {tag_sha} with commit date {tag_date}", depth=1)
-
-            output_csv.append(
-                    {
-                        "REPO_ID_SUFFIX": repo_id,
-                        "TAG": tag_name,
-                        "COMMIT": tag_sha,
-                        "DATE": tag_date.isoformat(),
-                    }
-                )
+        if args.graphql:
+            tag = repo_tags[repo_name]
         else:
+            tag = get_tag_rest(g, repo_name, args.TAG)
+
+        if tag is None:
             logger.warning(f"⛔ Tag '{args.TAG}' not found.", depth=1)
             continue
-   
+        if "error" in tag:
+            logger.error(f"⛔ Cannot look up tag '{args.TAG}': {tag['error']}", depth=1)
+            continue
+
+        tag_date = tag["authored_date"].astimezone(TIMEZONE)
+        if not (since_dt <= tag_date <= until_dt):
+            logger.warning(f"⛔ Tag '{args.TAG}' found but outside date range ({tag_date}).", depth=1)
+            continue
+
+        tag_sha = tag["sha"][:7]
+        no_found += 1
+        logger.info(f"✅ Found tag '{args.TAG}' on commit {tag_sha} with commit date {tag_date}", depth=1)
+
+        output_csv.append(
+                {
+                    "REPO_ID_SUFFIX": repo_id,
+                    "TAG": args.TAG,
+                    "COMMIT": tag_sha,
+                    "DATE": tag_date.isoformat(),
+                }
+            )
+
     # Write output_csv to a CSV file
     with open(OUT_CSV, mode="w", newline="", encoding="utf-8") as csvfile:
         writer = csv.DictWriter(
@@ -9,6 +9,10 @@ So we first get the node-id of the issue/PR via the REST API and PyGitHub, and t
 * PyGithub documentation: https://pygithub.readthedocs.io/en/latest/introduction.html
 * GitHub REST API: https://docs.github.com/en/rest
 * GitHub GraphQL API: https://docs.github.com/en/graphql
+
+With --bulk, the node ids of the PRs in all repos are resolved with aliased GraphQL queries
+(--batch repos per request) and the unsubscribe mutations are sent in batches too, so a
+whole cohort takes a handful of requests instead of two per repo.
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com  + ChatGPT friend"
 __copyright__ = "Copyright 2026"
@@ -35,6 +39,63 @@ logger = setup_logging(SCRIPT_NAME, rotating_file="app.log", timezone=TIMEZONE,
 logger.setLevel(logging.INFO)  # set the level of the application logger
 logger.root.setLevel(logging.WARNING)  # root logger above info: no 3rd party logs
 
+BATCH_SIZE = 50  # repos per GraphQL request in bulk mode
+
+NODE_ID_FIELD = """
+repository(owner: $owner, name: $name) {
+    issueOrPullRequest(number: $number) {
+        ... on PullRequest { id }
+        ... on Issue { id }
+    }
+}
+"""
+
+UNSUBSCRIBE_FIELD = """
+updateSubscription(input: {subscribableId: $id, state: UNSUBSCRIBED}) {
+    subscribable { viewerSubscription }
+}
+"""
+
+
+def unsubscribe_bulk(list_repos: list, pr_number: int, batch_size=BATCH_SIZE) -> tuple[int, int]:
+    """
+    Unsubscribe from PR pr_number in all repos, using batched GraphQL queries and mutations.
+
+    :return: number of repos unsubscribed and failed
+    """
+    # 1. resolve the node ids of all PRs
+    node_ids = []
+    for batch in utils_gh.chunks(list_repos, batch_size):
+        items = []
+        for r in batch:
+            owner, name = util.parse_full_repo(r["REPO_ID"])
+            items.append({"owner": owner, "name": name, "number": pr_number})
+        results = utils_gh.call_with_retry(
+            utils_gh.run_aliased, "query", NODE_ID_FIELD, {"owner": "String!", "name": "String!", "number": "Int!"}, items
+        )
+        for r, (data, error) in zip(batch, results):
+            node = data and data["issueOrPullRequest"]
+            if node is None:
+                logger.warning(f"PR {pr_number} not found in repo {r['REPO_ID']}: {error}", depth=2)
+                continue
+            node_ids.append((r, node["id"]))
+    logger.info(f"Found node ids for PR {pr_number} in {len(node_ids)} repos")
+
+    # 2. unsubscribe from all of them
+    no_unsubscribed = 0
+    for batch in utils_gh.chunks(node_ids, batch_size):
+        # unsubscribing is idempotent, so a failed batch can be safely sent again
+        results = utils_gh.call_with_retry(
+            utils_gh.run_aliased, "mutation", UNSUBSCRIBE_FIELD, {"id": "ID!"}, [{"id": node_id} for _, node_id in batch]
+        )
+        for (r, _), (data, error) in zip(batch, results):
+            if data is None:
+                logger.error(f"Failed to unsubscribe from PR {pr_number} in {r['REPO_ID']}: {error}", depth=2)
+                continue
+            no_unsubscribed += 1
+            logger.info(f"Unsubscribed from PR {pr_number} in {r['REPO_ID']}: {data['subscribable']}", depth=2)
+    return no_unsubscribed, len(list_repos) - no_unsubscribed
+
 
 if __name__ == "__main__":
     parser = ArgumentParser(description=SCRIPT_DESC)
@@ -52,6 +113,17 @@ if __name__ == "__main__":
         required=True,
         help="File containing GitHub authorization token/password.",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Resolve and unsubscribe all PRs with batched GraphQL requests.",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=BATCH_SIZE,
+        help="Repos per GraphQL request in bulk mode (default: %(default)s).",
+    )
     args = parser.parse_args()
     logger.info(f"Starting script {SCRIPT_NAME} on {TIMEZONE}: {NOW_ISO}")
     logger.info(args, depth=1)
@@ -81,13 +153,25 @@ if __name__ == "__main__":
         logger.error("No authentication provided, quitting....")
         exit(1)
     try:
-        g: Github = utils_gh.open_gitHub(token_file=args.token_file)
+        g: Github = utils_gh.open_gitHub(token=args.token_file)
     except Exception as e:
         logger.error(
             f"Something wrong happened during GitHub authentication. Check credentials. Exception: {e}"
         )
         exit(1)
 
+    if args.bulk:
+        if args.start is not None:
+            list_repos = list_repos[args.start - 1 :]
+        if pr_number is None:
+            logger.error("Bulk mode needs the PR number (--no).")
+            exit(1)
+        no_unsubscribed, no_errors = unsubscribe_bulk(list_repos, pr_number, args.batch)
+        logger.info(
+            f"Finished! Total repos: {len(list_repos)} - Unsubscribed successfully: {no_unsubscribed} - Failed to unsubscribe: {no_errors}."
+        )
+        exit(0)
+
     ###############################################
     # Process each repo in list_repos
     ###############################################
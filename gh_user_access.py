@@ -17,10 +17,17 @@ Example:
     $ python ../../tools/git-hw-submissions.git/gh_workflow.py -t ~/.ssh/keys/gh-token-ssardina.txt \
         --name Autograding --until 2025-04-08T12:00 --run-name "Automarking up April 8 12pm" -- \
             start repos.csv |& tee -a autograde-2025-04-08T1200.log
+
+With --index, the user -> repo -> permission map of the whole organization is built with a
+few batched GraphQL queries (all repos and their collaborators, 100 per page) and cached in
+a local JSON file, so later queries for any user are lookups in the cached index:
+
+    $ python gh_user_access.py list RMIT-COSC1127-1125-AI24 ssardina -t ~/.ssh/keys/gh-token-ssardina.txt --index
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024-2025"
 import csv
+import json
 import os
 from argparse import ArgumentParser
 import time
@@ -56,6 +63,98 @@ IGNORE_USERS = ["ssardina", "scott-robshaw", "axelahmer", "gourdoni"]
 SLEEP_RATE = 10  # number of repos to process before sleeping
 SLEEP_TIME = 5  # sleep time in seconds between API calls
 
+INDEX_FILE = "gh-access-index-{org}.json"
+INDEX_MAX_AGE = 24  # hours before a cached index is rebuilt
+REPOS_PAGE_SIZE = 50  # repos per GraphQL page (each with up to 100 collaborators)
+
+QUERY_ORG_ACCESS = """
+query($org: String!, $cursor: String, $size: Int!) {
+  organization(login: $org) {
+    repositories(first: $size, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        url
+        collaborators(first: 100) {
+          pageInfo { hasNextPage endCursor }
+          edges { permission node { login } }
+        }
+      }
+    }
+  }
+}
+"""
+
+QUERY_REPO_COLLABORATORS = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    collaborators(first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes: edges { permission node { login } }
+    }
+  }
+}
+"""
+
+
+def build_access_index(org: str) -> dict:
+    """
+    Build the map user -> repo -> permission of all repos in an org via GraphQL.
+
+    :return: the index, as {"org", "built_at", "repos": {repo: url}, "users": {user: {repo: permission}}}
+    """
+    index = {"org": org, "built_at": NOW_ISO, "repos": {}, "users": {}}
+
+    def add(repo_name: str, edges: list):
+        for e in edges:
+            if e["node"] is None:
+                continue
+            index["users"].setdefault(e["node"]["login"], {})[repo_name] = e["permission"].lower()
+
+    repos = utils_gh.iter_query_pages(
+        QUERY_ORG_ACCESS,
+        {"org": org, "size": REPOS_PAGE_SIZE},
+        lambda data: data["organization"]["repositories"],
+    )
+    for k, repo in enumerate(repos, start=1):
+        index["repos"][repo["nameWithOwner"]] = repo["url"]
+        collaborators = repo["collaborators"]
+        if collaborators is None:  # no access to see collaborators
+            logger.warning(f"Cannot get collaborators of {repo['nameWithOwner']}")
+            continue
+        add(repo["nameWithOwner"], collaborators["edges"])
+        if collaborators["pageInfo"]["hasNextPage"]:  # rare: more than 100 collaborators
+            more = utils_gh.iter_query_pages(
+                QUERY_REPO_COLLABORATORS,
+                {"owner": org, "name": repo["name"], "cursor": collaborators["pageInfo"]["endCursor"]},
+                lambda data: data["repository"]["collaborators"],
+            )
+            add(repo["nameWithOwner"], list(more))
+        if k % 500 == 0:
+            logger.info(f"Indexed {k} repos...")
+
+    logger.info(f"Index built for {len(index['repos'])} repos and {len(index['users'])} users")
+    return index
+
+
+def load_access_index(org: str, refresh=False, max_age=INDEX_MAX_AGE) -> dict:
+    """Load the cached access index of the org, (re)building it if missing, old or refresh asked."""
+    index_file = INDEX_FILE.format(org=org)
+    if not refresh and os.path.exists(index_file):
+        with open(index_file, "r") as f:
+            index = json.load(f)
+        age = (NOW - datetime.fromisoformat(index["built_at"])).total_seconds() / 3600
+        if age <= max_age:
+            logger.info(f"Using cached access index {index_file} built at {index['built_at']}")
+            return index
+
+    index = build_access_index(org)
+    with open(index_file, "w") as f:
+        json.dump(index, f)
+    logger.info(f"Access index saved in {index_file}")
+    return index
+
 
 if __name__ == "__main__":
     parser = ArgumentParser(description="Handle automarking workflows")
@@ -91,6 +190,24 @@ if __name__ == "__main__":
         default=False,
         help="Do not push to repos, just report on console %(default)s.",
     )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        default=False,
+        help="Use a cached org-wide access index (built via GraphQL) instead of checking each repo %(default)s.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        default=False,
+        help="Rebuild the access index even if the cached one is recent %(default)s.",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=INDEX_MAX_AGE,
+        help="Hours after which the cached access index is rebuilt. Default %(default)s.",
+    )
     args = parser.parse_args()
     logger.info(f"Starting script on {TIMEZONE}: {NOW_ISO} - {args}")
 
@@ -101,13 +218,25 @@ if __name__ == "__main__":
         logger.error("No authentication provided, quitting....")
         exit(1)
     try:
-        g = utils_gh.open_gitHub(token_file=args.token_file)
+        g = utils_gh.open_gitHub(token=args.token_file)
     except Exception:
         logger.error(
             "Something wrong happened during GitHub authentication. Check credentials."
         )
         exit(1)
 
+    if args.index:
+        index = load_access_index(args.ORG, refresh=args.refresh, max_age=args.max_age)
+        user_repos = index["users"].get(args.USER, {})
+        logger.info(f"User {args.USER} has access to {len(user_repos)} repos in org {args.ORG}")
+        with open(OUTPUT_CSV, "w") as csvfile:
+            writer = csv.writer(csvfile, quoting=csv.QUOTE_NONNUMERIC)
+            writer.writerow(OUTPUT_HEADER_CSV)
+            for repo_name, u_perm in sorted(user_repos.items()):
+                logger.info(f"\t User {args.USER} has {u_perm} access to {repo_name}")
+                writer.writerow([repo_name, index["repos"][repo_name], args.USER, u_perm])
+        exit(0)
+
     # Get the org and user
     org = g.get_organization(args.ORG)
     user = g.get_user(args.USER)
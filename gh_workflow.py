@@ -180,21 +180,21 @@ def start_workflow(
                 if commits.totalCount == 0:
                     logger.info(f"\t No commits found before {until_dt.isoformat()}.")
                     continue
-                commit = commits[0]  # last commit before until_dt
+                repo_commit = commits[0]  # last commit before until_dt
             else:
                 # get the actual commit object (because commit may be just "main")
-                commit = repo.get_commit(commit)
+                repo_commit = repo.get_commit(commit)
 
-            commit_sha = commit.sha
+            commit_sha = repo_commit.sha
             commit_sha_sort = commit_sha[:7]
-            commit_date = commit.commit.author.date.astimezone(until_dt.tzinfo if until_dt else TIMEZONE).isoformat()
+            commit_date = repo_commit.commit.author.date.astimezone(until_dt.tzinfo if until_dt else TIMEZONE).isoformat()
             logger.debug(
                 f"\t Commit SHA to run workflow: {commit_sha_sort} - {commit_date}"
             )
 
             # check the commit has not been marked already
             if not args.remark:
-                commit_statuses = commit.get_statuses()
+                commit_statuses = repo_commit.get_statuses()
                 if commit_statuses is not None and commit_statuses.totalCount > 0:
                     logger.info(
                         f"\t Already marked with state: {commit_statuses[0].state}"
@@ -300,8 +300,7 @@ def start_workflow(
                 writer = csv.DictWriter(file, fieldnames=error_csv[0].keys(), quoting=csv.QUOTE_NONNUMERIC)
                 writer.writeheader()
                 writer.writerows(error_csv)
-
-        logger.info(f"Workflow error data written to {error_file}.")
+            logger.info(f"Workflow error data written to {error_file}.")
 
 
 def get_jobs(
@@ -589,7 +588,7 @@ if __name__ == "__main__":
         logger.error("No authentication provided, quitting....")
         exit(1)
     try:
-        g = utils_gh.open_gitHub(token_file=args.token_file)
+        g = utils_gh.open_gitHub(token=utils_gh.get_token(None, args.token_file))
     except Exception:
         logger.error(
             "Something wrong happened during GitHub authentication. Check credentials."
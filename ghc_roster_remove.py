@@ -35,15 +35,31 @@ Example:
 
 Errors and successful removals are appended (timestamped) to
 roster_remove_errors.csv and roster_removed.csv respectively.
+
+Usernames are processed concurrently (--workers) and `gh` calls that fail with a
+transient error (rate limit, network, 5xx) are retried with exponential backoff.
+
+With --api, no `gh` process is spawned per user: the roster file
+(ORG/classroom50/CLASSROOM/roster.csv) is updated in a single commit, and team
+(classroom50-CLASSROOM) and org memberships are removed with direct REST API calls,
+concurrently. A token is needed (-t or GHTOKEN/GH_TOKEN env variable).
+
+    $ python gh_roster_remove.py RMIT-COSC1127-3117-AI ai26 --csv drop_list.csv --remove-org --api -t ~/.ssh/keys/gh-token.txt
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2024-2026"
 
 import csv
+import io
+import re
 import subprocess
 import sys
+import time
 from argparse import ArgumentParser
 
+from github import GithubException
+
+import utils_gh
 from util import NOW_TXT, TIMEZONE, add_csv
 
 SCRIPT_NAME = "gh_roster_remove"
@@ -61,6 +77,17 @@ CSV_ERRORS_HEADER = ["USERNAME", "STAGE", "ERROR"]
 CSV_REMOVED = "roster_removed.csv"
 CSV_REMOVED_HEADER = ["USERNAME", "ORG", "CLASSROOM"]
 
+CLASSROOM_REPO = "classroom50"  # repo in the org where classroom rosters are kept
+ROSTER_FILE = "{classroom}/roster.csv"
+ROSTER_USERNAME_COLUMNS = ["github_username", "username"]  # column of the GitHub usernames in the roster
+CLASSROOM_TEAM = "classroom50-{classroom}"
+
+MAX_RETRIES = 3
+TRANSIENT_GH_ERRORS = re.compile(
+    r"rate limit|HTTP 5\d\d|HTTP 429|timed? ?out|connection (reset|refused)|EOF",
+    re.IGNORECASE,
+)
+
 
 def load_usernames_csv(file_path: str, col_key: str = "username") -> list[str]:
     """
@@ -97,6 +124,146 @@ def run_gh(*args: str, dry_run: bool = False) -> tuple[bool, str]:
     return result.returncode == 0, output
 
 
+def run_gh_retry(*args: str, dry_run: bool = False, retries=MAX_RETRIES) -> tuple[bool, str]:
+    """
+    Run a `gh` CLI command, retrying with exponential backoff on transient failures.
+    """
+    for attempt in range(retries + 1):
+        ok, output = run_gh(*args, dry_run=dry_run)
+        if ok or attempt == retries or not TRANSIENT_GH_ERRORS.search(output):
+            return ok, output
+        wait = utils_gh.RETRY_BACKOFF * 2**attempt
+        logger.warning(f"\t Transient error running gh {args[:2]}; retrying in {wait}s: {output}")
+        time.sleep(wait)
+
+
+def remove_user_gh(username: str, org: str, classroom: str, remove_org: bool, dry_run: bool):
+    """
+    Remove a username from the classroom roster (and optionally the org) via `gh teacher`.
+
+    :return: lists of removed and error rows for the CSV reports
+    """
+    removed, errors = [], []
+    ok, output = run_gh_retry(
+        "teacher", "roster", "remove", org, classroom, username, dry_run=dry_run,
+    )
+    if output:
+        logger.info(f"\t {username}: {output}")
+    if not ok:
+        logger.error(f"\t Failed to remove {username} from classroom roster.")
+        errors.append([username, "roster", output])
+        return removed, errors
+    removed.append([username, org, classroom])
+
+    if remove_org:
+        ok, output = run_gh_retry("teacher", "remove", org, username, dry_run=dry_run)
+        if output:
+            logger.info(f"\t {username}: {output}")
+        if not ok:
+            logger.error(f"\t Failed to remove {username} from organization.")
+            errors.append([username, "org", output])
+        else:
+            removed.append([username, org, ""])
+    return removed, errors
+
+
+def remove_from_roster_api(g, org: str, classroom: str, usernames: list[str], dry_run: bool) -> set:
+    """
+    Remove all usernames from the classroom roster CSV file in a single commit.
+    A roster row is removed if its GitHub username (column github_username or username) is one
+    of the usernames (case insensitive); other columns (e.g., identifier) are not looked at.
+
+    :return: the set of (lowercase) usernames found and removed from the roster
+    """
+    repo = g.get_repo(f"{org}/{CLASSROOM_REPO}")
+    path = ROSTER_FILE.format(classroom=classroom)
+    contents = repo.get_contents(path)
+    rows = list(csv.reader(io.StringIO(contents.decoded_content.decode("utf-8"))))
+
+    targets = {u.lower() for u in usernames}
+    header, body = rows[:1], rows[1:]
+    columns = [c.strip().lower() for c in header[0]] if header else []
+    col = next((columns.index(c) for c in ROSTER_USERNAME_COLUMNS if c in columns), None)
+    if col is None:
+        raise Exception(f"No GitHub username column ({'/'.join(ROSTER_USERNAME_COLUMNS)}) in roster {path}: {columns}")
+
+    username = lambda r: r[col].strip().lower() if col < len(r) else ""
+    keep = [r for r in body if username(r) not in targets]
+    found = {username(r) for r in body} & targets
+    if not found:
+        return found
+
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows(header + keep)
+    if dry_run:
+        print(f"[DRY-RUN] update {org}/{CLASSROOM_REPO}/{path}: remove {len(body) - len(keep)} row(s)")
+    else:
+        utils_gh.call_with_retry(
+            repo.update_file,
+            path,
+            f"Remove {len(found)} user(s) from roster",
+            out.getvalue(),
+            contents.sha,
+        )
+    return found
+
+
+def remove_membership_api(g, url: str, dry_run: bool) -> bool:
+    """
+    DELETE a membership via REST API; return False if the user was not a member (404).
+    """
+    if dry_run:
+        print(f"[DRY-RUN] DELETE {url}")
+        return True
+    try:
+        utils_gh.call_with_retry(g.requester.requestJsonAndCheck, "DELETE", url)
+    except GithubException as e:
+        if e.status == 404:
+            return False
+        raise
+    return True
+
+
+def remove_users_api(g, org: str, classroom: str, usernames: list[str], remove_org: bool,
+                     dry_run: bool, workers: int):
+    """
+    Remove usernames from the roster (one commit), and from the classroom team
+    and org (REST API, concurrently).
+
+    :return: lists of removed and error rows for the CSV reports
+    """
+    removed, errors = [], []
+    in_roster = remove_from_roster_api(g, org, classroom, usernames, dry_run)
+    for username in usernames:
+        if username.lower() not in in_roster:
+            logger.warning(f"\t {username} not found in roster {ROSTER_FILE.format(classroom=classroom)}")
+
+    team = CLASSROOM_TEAM.format(classroom=classroom)
+
+    def remove(username: str):
+        # removing from the org removes from all its teams as well
+        if remove_org:
+            url = f"/orgs/{org}/members/{username}"
+        else:
+            url = f"/orgs/{org}/teams/{team}/memberships/{username}"
+        return remove_membership_api(g, url, dry_run)
+
+    for username, was_member, e in utils_gh.run_concurrently(remove, usernames, workers):
+        if e is not None:
+            logger.error(f"\t Failed to remove {username}: {e}")
+            errors.append([username, "org" if remove_org else "team", str(e)])
+            continue
+        logger.info(
+            f"\t {username}: removed from {'org ' + org if remove_org else 'team ' + team}"
+            + ("" if was_member else " (was not a member)")
+        )
+        if username.lower() in in_roster or was_member:
+            removed.append([username, org, classroom])
+            if remove_org:
+                removed.append([username, org, ""])
+    return removed, errors
+
+
 if __name__ == "__main__":
     parser = ArgumentParser(
         description="Remove a list of GitHub usernames from a GitHub Classroom "
@@ -126,6 +293,24 @@ if __name__ == "__main__":
         default=False,
         help="Print the gh commands instead of running them (Default: %(default)s).",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=utils_gh.MAX_WORKERS,
+        help="Number of usernames to process concurrently (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--api",
+        action="store_true",
+        default=False,
+        help="Use direct GitHub API calls instead of one `gh` process per user (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "-t",
+        "--token",
+        help="File or string containing GitHub authorization token (--api only). Defaults to GHTOKEN/GH_TOKEN env variable.",
+    )
     args = parser.parse_args()
     logger.info(f"Starting on {TIMEZONE}: {NOW_TXT}")
 
@@ -149,36 +334,27 @@ if __name__ == "__main__":
 
     errors_csv = []
     removed_csv = []
-    removed_class = 0
-    removed_org = 0
-    for username in usernames:
-        logger.info(f"----> {username}")
-        ok, output = run_gh(
-            "teacher", "roster", "remove", args.ORG, args.CLASSROOM, username,
-            dry_run=args.dry_run,
+    if args.api:
+        g = utils_gh.open_gitHub(token=args.token)
+        removed_csv, errors_csv = remove_users_api(
+            g, args.ORG, args.CLASSROOM, usernames, args.remove_org, args.dry_run, args.workers
         )
-        if output:
-            print(output)
-        if not ok:
-            logger.error(f"\t Failed to remove {username} from classroom roster.")
-            errors_csv.append([username, args.ORG, args.CLASSROOM])
-            continue
-        removed_csv.append([username, args.ORG, args.CLASSROOM])
-        removed_class += 1
-
-        org_removed = False
-        if args.remove_org:
-            ok, output = run_gh(
-                "teacher", "remove", args.ORG, username, dry_run=args.dry_run
+    else:
+        def remove(username: str):
+            return remove_user_gh(
+                username, args.ORG, args.CLASSROOM, args.remove_org, args.dry_run
             )
-            if output:
-                print(output)
-            if not ok:
-                logger.error(f"\t Failed to remove {username} from organization.")
-                errors_csv.append([username, args.ORG, ""])
+
+        for username, result, e in utils_gh.run_concurrently(remove, usernames, args.workers):
+            if e is not None:
+                logger.error(f"\t Failed to remove {username}: {e}")
+                errors_csv.append([username, "roster", str(e)])
                 continue
-            removed_csv.append([username, args.ORG, ""])
-            removed_org += 1
+            removed_csv += result[0]
+            errors_csv += result[1]
+
+    removed_class = len([r for r in removed_csv if r[2]])
+    removed_org = len([r for r in removed_csv if not r[2]])
 
     logger.info(
         f"Finished! Total usernames: {len(usernames)} - Removed from roster/org: {removed_class}/{removed_org} - Errors: {len(errors_csv)}."
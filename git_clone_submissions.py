@@ -34,6 +34,10 @@ Manual debug via gitpython:
     >>> repo.git.pull()
     'Already up to date.'
 
+The times and commits of HEAD and tags, and the number of commits, are read with the
+plumbing helpers in utils_git.py (git cat-file --batch, or pygit2 if installed) instead of
+GitPython objects, as this is done for every repo.
+
 Example usage:
     $ python git_clone_submissions.py --file-timestamps timestamps.csv repos.csv main submissions
 """
@@ -53,7 +57,7 @@ import traceback
 import git
 
 # local utilities
-import util
+import util, utils_git
 from util import (
     TIMEZONE,
     NOW_ISO,
@@ -117,8 +121,8 @@ def clone_team_repos(repos:list, tag:str, output_folder:str):
             logger.info(f"Trying to clone NEW team repo from URL {repo_git_url}.", depth=1)
             try:
                 repo = git.Repo.clone_from(repo_git_url, repo_local_dir, branch=tag)
-                new_commit_time, new_commit, new_tagged_time = util.get_tag_info(
-                    repo, tag_str="head"
+                new_commit_time, new_commit, new_tagged_time = utils_git.get_ref_info(
+                    repo_local_dir, tag_str="head"
                 )
                 logger.info(
                     f"Repo {repo_name} cloned successfully with tag date {new_commit_time}.", depth=1
@@ -159,7 +163,7 @@ def clone_team_repos(repos:list, tag:str, output_folder:str):
                 )  # https://gitpython.readthedocs.io/en/stable/reference.html#module-git.repo.base
 
                 # get date of local head commit (where the local repo is pointing to)
-                local_commit_time, _, _ = util.get_tag_info(repo, tag_str="head")
+                local_commit_time, _, _ = utils_git.get_ref_info(repo_local_dir, tag_str="head")
 
                 logger.info(
                     f"Existing LOCAL submission for {repo_name} dated {local_commit_time} ({str(repo.commit())[:7]}); updating it...", depth=1
@@ -173,12 +177,12 @@ def clone_team_repos(repos:list, tag:str, output_folder:str):
                 if tag in ["master", "main"]:
                     repo.git.checkout(tag, force=True)
                     repo.git.pull()
-                    new_commit_time, new_commit, new_tagged_time = util.get_tag_info(
-                        repo, tag_str="head"
+                    new_commit_time, new_commit, new_tagged_time = utils_git.get_ref_info(
+                        repo_local_dir, tag_str="head"
                     )
                 else:
-                    new_commit_time, new_commit, new_tagged_time = util.get_tag_info(
-                        repo, tag
+                    new_commit_time, new_commit, new_tagged_time = utils_git.get_ref_info(
+                        repo_local_dir, tag
                     )
                     if new_commit_time is None:
                         # tag has been deleted! remove local repo, no more submission
@@ -235,15 +239,8 @@ def clone_team_repos(repos:list, tag:str, output_folder:str):
                 shutil.rmtree(repo_local_dir)
                 continue
 
-        # this just calls git rev-list --count /tags/<tag> to get the number of commits tracing to the tag
-        try:
-            no_commits = repo.git.rev_list(
-                "--count", tag
-            )  # get the no of commits tracing to the tag
-        except git.exc.GitCommandError:
-            no_commits = repo.git.rev_list(
-                "--count", f"tags/{tag}"
-            )  # get the no of commits tracing to the tag
+        # number of commits tracing to the tag (HEAD is at the tag/branch at this point)
+        no_commits = utils_git.count_commits(repo_local_dir, "head")
         repo.close()
         # Finally, write teams that have repos (new/updated/unchanged) into submission timestamp file
         repos_status["cloned"].append(
@@ -36,6 +36,14 @@ Manual debug via gitpython:
     1648214671
     >>> repo.git.pull()
     'Already up to date.'
+
+Bulk mode: with --repos-csv, REPO_FOLDER is a folder with one clone per REPO_ID_SUFFIX
+(missing clones are cloned from REPO_URL). Each repo is updated, reverted back to COMMIT and
+pushed in its own worker process, so many repos are reverted at once. There is no prompt in
+this mode (use --dry-run to see what would be reverted). One result record per repo is
+written to a CSV file, e.g.:
+
+    $ python git_revert.py submissions 3f2a9c1 --repos-csv repos.csv --keep README.md --workers 8
 """
 __author__ = "Sebastian Sardina - ssardina - ssardina@gmail.com"
 __copyright__ = "Copyright 2018-2025"
@@ -47,6 +55,7 @@ import argparse
 import csv
 import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # local utilities
 import util, utils_gh
@@ -77,6 +86,10 @@ LOGGING_LEVEL = logging.INFO
 logger = logging.getLogger(__name__)
 coloredlogs.install(level=LOGGING_LEVEL, fmt=LOGGING_FMT, datefmt=LOGGING_DATE)
 
+REVERT_CSV = f"revert-{NOW_TXT}.csv"
+REVERT_HEADER_CSV = ["repo", "status", "reverted", "head_before", "head_after", "error"]
+REVERT_MESSAGE = "Revert back to {commit}"
+
 TIMESTAMP_HEADER_CSV = [
         "repo",
         "submitted_at",
@@ -282,6 +295,112 @@ def clone_team_repos(repos:list, tag:str, output_folder:str):
     )
 
 
+def revert_repo(repo_dir: str, repo_url: str, commit: str, branch: str, keep: list = None,
+                dry_run=False) -> dict:
+    """
+    Update (or clone) a repo, revert it back to a commit and push it (run in a worker process).
+
+    The commits in commit..HEAD are reverted in a single new commit, except for the paths
+    to keep. If anything fails after reverting, the local repo is reset to where it was.
+
+    :param repo_dir: the local clone of the repo (cloned from repo_url if missing)
+    :param commit: the commit to revert back to
+    :param branch: the branch to revert and push
+    :param keep: paths not to revert
+    :param dry_run: revert without committing, report and undo it
+    :return: a result record with keys repo, status (reverted, dry-run, unchanged, nocommit,
+        nothing, failed), reverted (number of commits reverted), head_before, head_after, error
+    """
+    result = {"repo": os.path.basename(repo_dir), "status": "failed", "reverted": 0,
+              "head_before": None, "head_after": None, "error": ""}
+    repo = None
+    try:
+        if not os.path.exists(repo_dir):
+            repo = git.Repo.clone_from(repo_url, repo_dir, branch=branch)
+        else:
+            repo = git.Repo(repo_dir)
+            repo.remote("origin").fetch(tags=True, force=True)
+            repo.git.checkout(branch, force=True)
+            repo.git.pull("--ff-only")
+        head_sha = repo.head.commit.hexsha
+        result["head_before"] = result["head_after"] = head_sha
+
+        try:
+            repo.git.rev_parse("--verify", "-q", f"{commit}^{{commit}}")
+        except git.GitCommandError:
+            result["status"] = "nocommit"
+            return result
+        result["reverted"] = int(repo.git.rev_list("--count", f"{commit}..HEAD"))
+        if result["reverted"] == 0:
+            result["status"] = "unchanged"
+            return result
+
+        try:
+            repo.git.revert(f"{commit}..HEAD", no_commit=True)
+            for f in keep or []:
+                repo.git.restore("--source=HEAD", "--staged", "--worktree", f)
+            if not repo.index.diff("HEAD"):
+                result["status"] = "nothing"
+                repo.git.revert("--abort")
+                return result
+            if dry_run:
+                result["status"] = "dry-run"
+                result["error"] = repo.git.diff("--cached", "--shortstat")
+                repo.git.revert("--abort")
+                return result
+            repo.git.commit("-m", REVERT_MESSAGE.format(commit=commit))
+            repo.git.revert("--quit")
+            repo.git.push("origin", branch)
+        except git.GitCommandError:
+            repo.git.revert("--quit")
+            repo.git.reset("--hard", head_sha)
+            raise
+        result["head_after"] = repo.head.commit.hexsha
+        result["status"] = "reverted"
+    except git.GitCommandError as e:
+        result["error"] = (e.stderr or str(e)).strip()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__} ({e})"
+    finally:
+        if repo is not None:
+            repo.close()
+    return result
+
+
+def revert_repos(repos: list, repos_folder: str, commit: str, branch: str, keep: list = None,
+                 dry_run=False, workers=None) -> list:
+    """
+    Revert many repos back to a commit, each in its own worker process.
+
+    :return: the list of result records (see revert_repo())
+    """
+    no_repos = len(repos)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                revert_repo,
+                os.path.join(repos_folder, r["REPO_ID_SUFFIX"]),
+                r["REPO_URL"],
+                commit,
+                branch,
+                keep,
+                dry_run,
+            ): r
+            for r in repos
+        }
+        for k, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            if result["status"] in ["failed", "nocommit"]:
+                logger.error(f"{k}/{no_repos} {result['repo']}: {result['status']} {result['error']}")
+            else:
+                logger.info(
+                    f"{k}/{no_repos} {result['repo']}: {result['status']} ({result['reverted']} commits) {result['error']}"
+                )
+    return results
+
+
 def report_teams(type, teams):
     """
     Print the name of the teams for the class type
@@ -314,6 +433,30 @@ if __name__ == "__main__":
         nargs="+",
         help="Paths to keep and do not revert back.",
     )
+    parser.add_argument(
+        "--repos-csv",
+        help="CSV file with the repos to revert in bulk; REPO_FOLDER then contains one clone per REPO_ID_SUFFIX.",
+    )
+    parser.add_argument(
+        "--repos", nargs="+", help="with --repos-csv, only the repos specified will be reverted."
+    )
+    parser.add_argument(
+        "--branch",
+        default="main",
+        help="with --repos-csv, branch to revert and push (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="with --repos-csv, number of repos to revert in parallel (Default: %(default)s).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        default=False,
+        action="store_true",
+        help="with --repos-csv, report what would be reverted but do not commit or push (Default: %(default)s).",
+    )
     parser.add_argument(
         "--yes",
         default=False,
@@ -331,6 +474,26 @@ if __name__ == "__main__":
         print(f"Repo CSV database {args.REPO_FOLDER} does not exists!")
         exit(1)
 
+    ###############################################
+    # Bulk mode: revert all repos in the CSV in parallel
+    ###############################################
+    if args.repos_csv is not None:
+        repos = util.get_repos_from_csv(args.repos_csv, args.repos)
+        logger.info(f"Reverting {len(repos)} repos to commit {args.COMMIT} except {args.keep}")
+        results = revert_repos(
+            repos, args.REPO_FOLDER, args.COMMIT, args.branch, args.keep, args.dry_run, args.workers
+        )
+        with open(REVERT_CSV, "w") as f:
+            writer = csv.DictWriter(f, fieldnames=REVERT_HEADER_CSV)
+            writer.writeheader()
+            writer.writerows(sorted(results, key=lambda x: x["repo"]))
+
+        print("\n ============================================== \n")
+        for status in ["reverted", "dry-run", "unchanged", "nothing", "nocommit", "failed"]:
+            report_teams(status.upper(), sorted(x["repo"] for x in results if x["status"] == status))
+        logger.info(f"Results written to {REVERT_CSV}.")
+        exit(0)
+
     ###############################################
     # Get repos as desired
     ###############################################
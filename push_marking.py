@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Commit and push marking results into each submission's git repository (Python version of push_marking.sh).
+
+Same semantics as push_marking.sh, for each subdirectory in <submissions-folder>:
+  - If the remote already has a "marking" branch: check it out and pull.
+  - Otherwise: check out the "submission" branch/tag and create a new "marking" branch from it.
+    If neither exists on the remote, the repo is skipped.
+  - Stage everything under the "marking/" folder, commit, and push to origin.
+
+but:
+  - only one `git ls-remote` is done per repo (for both the marking branch and the submission ref);
+  - repos whose marking/ tree is the same as in the remote marking branch are skipped;
+  - repos are processed concurrently, with a bounded number of workers.
+
+e.g.:
+
+    $ python push_marking.py submissions --message "Add marking result: test 01" --workers 8
+
+    $ python push_marking.py submissions --repo ssardina --dry-run
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from util import TIMEZONE, NOW_ISO
+
+SCRIPT_NAME = "push_marking"
+
+# setup my own logger for this script, using the slogger/loguru backend
+from slogger.loguru_backend import logger, setup_logger
+
+setup_logger(source=SCRIPT_NAME, timezone=TIMEZONE.key)
+
+BRANCH = "marking"
+SUBMISSION_REF = "submission"
+MARKING_DIR = "marking"
+COMMIT_MESSAGE = "Add marking result"
+MAX_WORKERS = 4
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Commit and push marking results into each submission's git repository."
+    )
+    parser.add_argument(
+        "submissions",
+        type=Path,
+        help="Directory whose immediate subdirs are local clones of submission repos.",
+    )
+    parser.add_argument(
+        "--repo",
+        help="Only process the submission folder with this name.",
+    )
+    parser.add_argument(
+        "--one",
+        action="store_true",
+        help="Process only the first submission (to test).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print all git commands that change repos without executing them.",
+    )
+    parser.add_argument(
+        "--branch",
+        default=BRANCH,
+        help="Name of the branch to create/update (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--submission",
+        default=SUBMISSION_REF,
+        help="Branch/tag to create the marking branch from (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--marking-dir",
+        default=MARKING_DIR,
+        help="Folder in each repo with the marking results (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-m", "--message",
+        default=COMMIT_MESSAGE,
+        help="Commit message used when pushing results (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=MAX_WORKERS,
+        help="Number of repos to push concurrently (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="Commit and push even if the marking tree has not changed.",
+    )
+    return parser.parse_args()
+
+
+def git(repo_dir: Path, *args, env=None, check=True) -> str:
+    """Run a git command in a repo and return its stdout."""
+    result = subprocess.run(
+        ["git", "-C", str(repo_dir), *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, result.args, result.stdout, result.stderr
+        )
+    return result.stdout.strip()
+
+
+def remote_refs(repo_dir: Path, *names) -> dict:
+    """Get the remote refs (heads and tags) with the given names in one ls-remote: ref -> sha."""
+    output = git(repo_dir, "ls-remote", "--heads", "--tags", "origin", *names)
+    refs = dict()
+    for line in output.splitlines():
+        sha, ref = line.split("\t")
+        refs[ref] = sha
+    return refs
+
+
+def marking_tree(repo_dir: Path, marking_dir: str) -> str:
+    """
+    Hash of the marking folder as it is in the working tree, computed on a temporary index
+    (so nothing is staged in the repo index).
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(tmp_dir, "index"))
+        git(repo_dir, "add", "-f", f"{marking_dir}/", env=env)
+        return git(repo_dir, "write-tree", f"--prefix={marking_dir}/", env=env)
+
+
+def committed_tree(repo_dir: Path, commit: str, marking_dir: str) -> str:
+    """Hash of the marking folder in a commit (None if not available locally)."""
+    return git(repo_dir, "rev-parse", "--verify", "-q", f"{commit}:{marking_dir}", check=False) or None
+
+
+def push_marking(repo_dir: Path, args) -> str:
+    """
+    Create/update the marking branch of a repo with its marking folder and push it.
+
+    :return: the status of the repo (pushed, unchanged, noref, nomarking)
+    """
+    def run(*cmd, check=True):
+        if args.dry_run:
+            logger.info(f"[DRY-RUN] {repo_dir.name}: git {' '.join(cmd)}")
+            return ""
+        return git(repo_dir, *cmd, check=check)
+
+    if not (repo_dir / args.marking_dir).is_dir():
+        return "nomarking"
+
+    refs = remote_refs(repo_dir, args.branch, args.submission)
+    remote_branch_sha = refs.get(f"refs/heads/{args.branch}")
+
+    # skip if the marking tree is the same as the one already in the remote marking branch
+    if remote_branch_sha is not None and not args.force:
+        remote_tree = committed_tree(repo_dir, remote_branch_sha, args.marking_dir)
+        if remote_tree is not None and remote_tree == marking_tree(repo_dir, args.marking_dir):
+            return "unchanged"
+
+    # 1. Create or reuse the marking branch
+    if remote_branch_sha is not None:
+        logger.debug(f"{repo_dir.name}: branch '{args.branch}' exists on remote — checking out and pulling")
+        run("checkout", args.branch)
+        run("pull", "origin", args.branch)
+    elif any(ref.endswith(f"/{args.submission}") for ref in refs):
+        logger.debug(f"{repo_dir.name}: creating new branch '{args.branch}' from '{args.submission}'")
+        run("checkout", args.submission)
+        run("checkout", "-b", args.branch)
+    else:
+        return "noref"
+
+    # 2. Stage everything in the marking folder
+    run("add", "-f", f"{args.marking_dir}/")
+
+    # 3. Commit (no changes to commit is fine) and push!
+    run("commit", "-m", args.message, check=False)
+    run("push", "-u", "origin", args.branch)
+    return "pushed"
+
+
+def main():
+    args = parse_args()
+    logger.info(f"Starting script {SCRIPT_NAME} on {TIMEZONE}: {NOW_ISO}")
+    logger.info(args, depth=1)
+
+    submissions_dir = args.submissions
+    if not submissions_dir.is_dir():
+        raise SystemExit(f"Submissions directory not found: {submissions_dir}")
+
+    repo_dirs = sorted(p for p in submissions_dir.iterdir() if p.is_dir())
+    if args.repo is not None:
+        repo_dirs = [p for p in repo_dirs if p.name == args.repo]
+    if args.one:
+        repo_dirs = repo_dirs[:1]
+    no_repos = len(repo_dirs)
+
+    repos_status = {s: [] for s in ["pushed", "unchanged", "noref", "nomarking", "failed"]}
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(push_marking, d, args): d for d in repo_dirs}
+        for k, future in enumerate(as_completed(futures), start=1):
+            repo_dir = futures[future]
+            try:
+                status = future.result()
+            except subprocess.CalledProcessError as e:
+                status = "failed"
+                logger.error(f"[{k}/{no_repos}] {repo_dir.name}: {' '.join(e.cmd[3:])} failed: {e.stderr.strip()}")
+            except Exception as e:
+                status = "failed"
+                logger.error(f"[{k}/{no_repos}] {repo_dir.name}: {type(e).__name__} ({e})")
+            else:
+                logger.info(f"[{k}/{no_repos}] {repo_dir.name}: {status}")
+            repos_status[status].append(repo_dir.name)
+
+    print("\n ============================================== \n")
+    for status, names in repos_status.items():
+        print(f"{status.upper()}: {len(names)}")
+        for name in sorted(names):
+            print(f"\t {name}")
+    print(f"\nDone. Processed {no_repos} submission(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the scripts and utils_xxx.py modules are at the top of the repo
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
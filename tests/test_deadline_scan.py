@@ -0,0 +1,48 @@
+"""Scan of local clones by gh_deadline_scan.py, on small git repos made on the fly."""
+import os
+import subprocess
+from datetime import datetime, timezone
+
+import gh_deadline_scan
+
+SINCE = datetime(2026, 3, 1, tzinfo=timezone.utc)
+UNTIL = datetime(2026, 3, 10, tzinfo=timezone.utc)
+
+
+def commit(repo_dir, date, message):
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="Student",
+        GIT_AUTHOR_EMAIL="1+student@users.noreply.github.com",
+        GIT_COMMITTER_NAME="Student",
+        GIT_COMMITTER_EMAIL="1+student@users.noreply.github.com",
+        GIT_AUTHOR_DATE=date,
+        GIT_COMMITTER_DATE=date,
+    )
+    subprocess.run(
+        ["git", "-C", repo_dir, "commit", "-q", "--allow-empty", "--allow-empty-message", "-m", message],
+        env=env,
+        check=True,
+    )
+
+
+def make_repo(tmp_path):
+    repo_dir = str(tmp_path / "repo")
+    subprocess.run(["git", "init", "-q", repo_dir], check=True)
+    commit(repo_dir, "2026-02-28T10:00:00+00:00", "Submission")
+    commit(repo_dir, "2026-03-02T10:00:00+00:00", "")  # late, with an empty subject
+    return repo_dir
+
+
+def test_lightweight_tag_and_empty_subject(tmp_path):
+    repo_dir = make_repo(tmp_path)
+    subprocess.run(["git", "-C", repo_dir, "tag", "submission", "HEAD~1"], check=True)
+
+    scan = gh_deadline_scan.scan_local(repo_dir, "main", "submission", SINCE, UNTIL)
+
+    assert scan["late_total"] == 1
+    assert scan["late"][0]["message"] == ""
+    assert scan["last_valid"]["message"] == "Submission"
+    assert scan["tag"]["author"] == "Student"
+    assert scan["tag"]["committed_date"] == datetime(2026, 2, 28, 10, tzinfo=timezone.utc)
+    assert scan["tag"]["tagged_date"] is None
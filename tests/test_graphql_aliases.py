@@ -0,0 +1,113 @@
+"""
+The GraphQL batch helpers built on utils_gh.run_aliased() get, for each repo, the result of
+its alias (a0, a1, ...), which is the repository node itself (no "repository" key). These
+tests feed responses with that exact shape, with no network access.
+"""
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+import utils_gh
+
+COMMIT = {
+    "oid": "a" * 40,
+    "messageHeadline": "Late fix",
+    "authoredDate": "2026-03-02T10:00:00+00:00",
+    "committedDate": "2026-03-02T10:00:00+00:00",
+    "author": {"name": "Student", "email": "1+student@users.noreply.github.com", "user": {"login": "student"}},
+}
+
+
+@pytest.fixture
+def graphql(monkeypatch):
+    """
+    Fake run_query(): answer each alias aK with nodes[name of repo K] (None and a
+    NOT_FOUND error if the repo is not in nodes), as GitHub does.
+    """
+    nodes = dict()
+    queries = []
+
+    def run_query(query, variables=None):
+        queries.append(query)
+        data, errors = dict(), []
+        for alias in re.findall(r"^(a\d+):\s*repository\(", query, re.MULTILINE):
+            name = variables[f"name_{alias[1:]}"]
+            data[alias] = nodes.get(name)
+            if data[alias] is None:
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve to a Repository with the name '{name}'."})
+        result = {"data": data}
+        if errors:
+            result["errors"] = errors
+        return result
+
+    monkeypatch.setattr(utils_gh, "run_query", run_query)
+    return nodes, queries
+
+
+def test_get_tag_commits(graphql):
+    nodes, queries = graphql
+    nodes["p0-alice"] = {"ref": {"target": dict(COMMIT)}}
+    nodes["p0-bob"] = {"ref": None}
+
+    tags = utils_gh.get_tag_commits(["org/p0-alice", "org/p0-bob", "org/p0-carol"], "submission")
+
+    assert len(queries) == 1
+    assert tags["org/p0-alice"]["sha"] == COMMIT["oid"]
+    assert tags["org/p0-alice"]["tagged_date"] is None
+    assert tags["org/p0-bob"] is None
+    assert "Could not resolve" in tags["org/p0-carol"]["error"]
+
+
+def test_pr_merge_get_prs_graphql(graphql):
+    import gh_pr_merge
+
+    nodes, _ = graphql
+    pr = {"id": "PR_1", "number": 1, "title": "Feedback", "url": "u", "state": "OPEN", "merged": False, "mergeable": "MERGEABLE"}
+    nodes["p0-alice"] = {"pullRequests": {"nodes": [dict(pr, title="Other"), pr]}}
+    nodes["p0-bob"] = {"pullRequests": {"nodes": []}}
+    repos = [{"REPO_ID": "org/p0-alice"}, {"REPO_ID": "org/p0-bob"}, {"REPO_ID": "org/p0-carol"}]
+
+    prs = gh_pr_merge.get_prs_graphql(repos, None, "Feedback")
+
+    assert prs["org/p0-alice"] == (pr, None)
+    assert prs["org/p0-bob"] == (None, None)
+    assert prs["org/p0-carol"][0] is None and "Could not resolve" in prs["org/p0-carol"][1]
+
+
+def test_pr_feedback_precheck_repos_graphql(graphql):
+    import gh_pr_feedback_create
+
+    nodes, _ = graphql
+    nodes["p0-alice"] = {
+        "main": {"target": {"oid": "b" * 40, "history": {"totalCount": 7}}, "compare": {"status": "BEHIND"}},
+        "pullRequests": {"pageInfo": {"hasNextPage": False}, "nodes": [{"number": 1, "title": "Feedback", "merged": False}]},
+    }
+    repos = [{"REPO_ID": "org/p0-alice"}, {"REPO_ID": "org/p0-carol"}]
+
+    precheck = gh_pr_feedback_create.precheck_repos_graphql(repos, "c" * 40, "Feedback")
+
+    alice = precheck["org/p0-alice"]
+    assert (alice["head"], alice["commits"], alice["base_ok"], alice["error"]) == ("b" * 40, 7, True, None)
+    assert alice["pr"] == {"number": 1, "merged": False}
+    assert "Could not resolve" in precheck["org/p0-carol"]["error"]
+
+
+def test_deadline_scan_graphql(graphql):
+    import gh_deadline_scan
+
+    nodes, _ = graphql
+    nodes["p0-alice"] = {
+        "branch": {"target": {"late": {"totalCount": 1, "nodes": [COMMIT]}, "valid": {"nodes": []}}},
+        "tag": {"target": dict(COMMIT)},
+    }
+    since = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    until = datetime(2026, 3, 3, tzinfo=timezone.utc)
+
+    scans = gh_deadline_scan.scan_graphql(["org/p0-alice", "org/p0-carol"], "main", "submission", since, until)
+
+    alice = scans["org/p0-alice"]
+    assert alice["error"] is None
+    assert alice["late_total"] == 1 and alice["late"][0]["login"] == "student"
+    assert alice["tag"]["sha"] == COMMIT["oid"]
+    assert "Could not resolve" in scans["org/p0-carol"]["error"]
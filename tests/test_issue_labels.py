@@ -0,0 +1,50 @@
+"""Label changes computed and applied by gh_issue_labels.py sync, with no network access."""
+from unittest import mock
+
+import gh_issue_labels
+
+
+class Label:
+    def __init__(self, name, color="ffffff", description=""):
+        self.name = name
+        self.color = color
+        self.description = description
+
+
+class Repo:
+    full_name = "org/repo"
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def get_labels(self):
+        return self.labels
+
+
+def test_case_only_rename_is_an_update():
+    bug = Label("bug", "d73a4a")
+    repo = Repo([bug, Label("wontfix")])
+    new_labels = [{"name": "Bug", "color": "d73a4a", "description": ""}]
+
+    ops = gh_issue_labels.diff_labels(repo, new_labels, replace=True)
+
+    assert [(action, data["name"], label) for action, _, data, label in ops] == [
+        ("delete", "wontfix", repo.labels[1]),
+        ("update", "Bug", bug),
+    ]
+
+
+def test_sync_deletes_before_creates(tmp_path):
+    repo = Repo([Label("Help Wanted")])
+    labels_file = tmp_path / "labels.json"
+    labels_file.write_text('[{"name": "bug"}, {"name": "question"}]')
+    g = mock.Mock()
+    g.get_repo.return_value = repo
+
+    applied = []
+    with mock.patch("util.get_repos_from_csv", return_value=[{"REPO_ID": "org/repo"}]), mock.patch(
+        "utils_gh.check_rate_limit"
+    ), mock.patch.object(gh_issue_labels, "apply_label_op", side_effect=lambda op: applied.append(op[0])):
+        gh_issue_labels.sync_labels(g, "repos.csv", labels_file, replace=True)
+
+    assert applied == ["delete", "create", "create"]
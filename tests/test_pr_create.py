@@ -0,0 +1,63 @@
+"""Comparison of forks with upstream and fast-forward of gh_pr_create.py, with no network access."""
+from unittest import mock
+
+from github import GithubException
+
+import gh_pr_create
+
+UPSTREAM_SHA = "b" * 40
+
+
+class LazyComparison:
+    """Like PyGithub's Comparison: the request is made when an attribute is first read."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def __getattr__(self, name):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        self.__dict__.update(response)
+        return response[name]
+
+
+def test_compare_fork_reads_values_under_retry():
+    comparisons = iter(
+        [
+            LazyComparison([GithubException(502, {"message": "Bad Gateway"}, {})]),
+            LazyComparison([{"status": "diverged", "ahead_by": 2, "behind_by": 3}]),
+        ]
+    )
+    repo = mock.Mock()
+    repo.compare.side_effect = lambda base, head: next(comparisons)
+    g = mock.Mock()
+    g.get_repo.return_value = repo
+
+    with mock.patch("time.sleep"):
+        _, compare = gh_pr_create.compare_fork(g, "org/repo", UPSTREAM_SHA)
+
+    assert compare == gh_pr_create.ForkComparison("diverged", 2, 3)
+    assert repo.compare.call_count == 2
+
+
+def test_fork_with_only_own_commits_is_up_to_date():
+    repo = mock.Mock()
+    compare = gh_pr_create.ForkComparison("behind", 0, 5)
+
+    result = gh_pr_create.sync_fork(repo, mock.Mock(), source_sha=UPSTREAM_SHA, compare=compare)
+
+    assert result == ("up_to_date", "")
+    repo.get_git_ref.assert_not_called()
+
+
+def test_fast_forward_is_not_forced():
+    repo = mock.Mock()
+    ref = mock.Mock()
+    repo.get_git_ref.return_value = ref
+    compare = gh_pr_create.ForkComparison("ahead", 3, 0)
+
+    result = gh_pr_create.sync_fork(repo, mock.Mock(), create_pr=False, source_sha=UPSTREAM_SHA, compare=compare)
+
+    assert result == ("fast_forwarded", "main")
+    ref.edit.assert_called_with(UPSTREAM_SHA, force=False)
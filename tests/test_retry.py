@@ -0,0 +1,57 @@
+"""Retry of transient errors (server errors, rate limits) of GraphQL requests, with no network access."""
+from unittest import mock
+
+import pytest
+
+import utils_gh
+
+
+class Response:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data or {}
+        self.text = str(self.data)
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+def run(responses):
+    """Run a query with call_with_retry() on the given responses; return (result, requests made)."""
+    post = mock.Mock(side_effect=responses)
+    with mock.patch("requests.post", post), mock.patch("time.sleep"):
+        return utils_gh.call_with_retry(utils_gh.run_query, "query { viewer { login } }"), post.call_count
+
+
+def test_retry_server_error_and_rate_limited():
+    ok = Response(200, {"data": {"viewer": {"login": "ssardina"}}})
+    rate_limited = Response(200, {"data": None, "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]})
+
+    result, calls = run([Response(502), rate_limited, ok])
+
+    assert result == ok.data
+    assert calls == 3
+
+
+def test_no_retry_on_bad_credentials():
+    with pytest.raises(utils_gh.GraphQLError) as e:
+        run([Response(401, {"message": "Bad credentials"})])
+    assert e.value.status == 401
+
+
+@pytest.mark.parametrize(
+    "status, headers, data, transient",
+    [
+        (403, {"X-RateLimit-Remaining": "0"}, {"message": "API rate limit exceeded"}, True),
+        (403, {"Retry-After": "60"}, {"message": "You have exceeded a secondary rate limit"}, True),
+        (403, {"X-RateLimit-Remaining": "4000"}, {"message": "Resource not accessible by integration"}, False),
+        (429, {}, {}, True),
+        (404, {}, {"message": "Not Found"}, False),
+        (502, {}, {}, True),
+    ],
+)
+def test_transient_rest_errors(status, headers, data, transient):
+    from github.GithubException import GithubException
+
+    assert utils_gh.is_transient_error(GithubException(status, data, headers)) == transient
@@ -0,0 +1,53 @@
+"""Access index of gh_user_access.py built from partial GraphQL results, with no network access."""
+import pytest
+
+import gh_user_access
+import utils_gh
+
+
+def repo(name, collaborators):
+    return {"name": name, "nameWithOwner": f"org/{name}", "url": f"https://github.com/org/{name}", "collaborators": collaborators}
+
+
+def test_partial_result_skips_hidden_collaborators(monkeypatch):
+    # GitHub nulls the collaborators it does not let the token see, and reports it in errors
+    page = {
+        "data": {
+            "organization": {
+                "repositories": {
+                    "nodes": [
+                        repo(
+                            "p0-student",
+                            {
+                                "edges": [{"permission": "WRITE", "node": {"login": "student"}}],
+                                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                            },
+                        ),
+                        repo("p0-hidden", None),
+                    ],
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                }
+            }
+        },
+        "errors": [
+            {
+                "type": "FORBIDDEN",
+                "path": ["organization", "repositories", "nodes", 1, "collaborators"],
+                "message": "Must have push access to view repository collaborators.",
+            }
+        ],
+    }
+    monkeypatch.setattr(utils_gh, "run_query", lambda query, variables=None: page)
+
+    index = gh_user_access.build_access_index("org")
+
+    assert set(index["repos"]) == {"org/p0-student", "org/p0-hidden"}
+    assert index["users"] == {"student": {"org/p0-student": "write"}}
+
+
+def test_no_data_fails(monkeypatch):
+    result = {"data": None, "errors": [{"type": "NOT_FOUND", "path": ["organization"], "message": "Not found"}]}
+    monkeypatch.setattr(utils_gh, "run_query", lambda query, variables=None: result)
+
+    with pytest.raises(utils_gh.GraphQLError):
+        gh_user_access.build_access_index("org")
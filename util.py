@@ -74,38 +74,44 @@ def get_repos_from_csv(csv_file, repos_ids=None, ignore_ids=None) -> list[dict]:
     return repos
 
 
+# (git dir, sha of the object the ref points to) -> (commit time, commit, tagged time, annotated)
+_tag_info_cache = dict()
+
+
 def get_tag_info(repo: git.Repo, tag_str="head"):
     """
     Returns the information of a tag in a repo. By default the head
 
+    The tag is resolved directly as refs/tags/<tag_str> (no scan of all the tags in the
+    repo), and the parsed info is cached by the object the ref points to, so repeated
+    lookups cost just reading the ref, and a tag moved (e.g., after a fetch) is re-parsed.
+
     :param repo: the repository to search for a tag
     :param tag_str: the tag in the repo
     :return: the tag's commit time, the tag's commit, the time it was tagged
     """
     if tag_str == "head":
-        commit = repo.commit()
-        commit_time = datetime.fromtimestamp(
-            commit.committed_date, tz=TIMEZONE
-        )
-        tagged_time = commit_time
+        obj = repo.head.commit
     else:
-        tag = next((tag for tag in repo.tags if tag.name == tag_str), None)
-        # tag_commit = next((tag.commit for tag in repo.tags if tag.name == tag_str), None)
-        if tag is None:
+        try:
+            obj = git.TagReference(repo, f"refs/tags/{tag_str}").object
+        except ValueError:  # no such tag
             return None, None, None
-        commit = tag.commit
 
-        commit_time = datetime.fromtimestamp(
-            commit.committed_date, tz=TIMEZONE
-        )
-        try:
-            tagged_time = datetime.fromtimestamp(
-                tag.object.tagged_date, tz=TIMEZONE
-            )  # if it is an annotated tag
-        except:
+    key = (repo.git_dir, obj.hexsha)
+    if key not in _tag_info_cache:
+        annotated = obj.type == "tag"
+        commit = obj
+        while commit.type == "tag":  # peel (possibly nested) annotated tags
+            commit = commit.object
+        commit_time = datetime.fromtimestamp(commit.committed_date, tz=TIMEZONE)
+        if annotated:
+            tagged_time = datetime.fromtimestamp(obj.tagged_date, tz=TIMEZONE)
+        else:
             tagged_time = commit_time  # if it is a lightweight tag (no date stored; https://git-scm.com/book/en/v2/Git-Basics-Tagging)
-        # logging.error("\t Repo {} does not have tag {}".format(repo, tag_str))
+        _tag_info_cache[key] = (commit_time, commit, tagged_time, annotated)
 
+    commit_time, commit, tagged_time, _ = _tag_info_cache[key]
     return commit_time, commit, tagged_time
     # return commit_time.strftime(DATE_FORMAT), commit, tagged_time.strftime(DATE_FORMAT)
 
@@ -166,3 +172,10 @@ def parse_full_repo(name: str):
         raise Exception("Repository must be in format 'org/repo'")
     org, repo = name.split("/")
     return org, repo
+
+
+# run-scoped timing instrumentation (see utils_prof.py), only loaded if requested
+if os.environ.get("RUN_STATS"):
+    import utils_prof
+
+    utils_prof.enable(os.environ.get("RUN_PROFILE"))
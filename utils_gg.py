@@ -0,0 +1,267 @@
+"""
+Google Drive helper functions shared by the gg_xxx.py scripts.
+
+Downloads go straight against the Drive v2 API (the one used by PyDrive2) with an
+authorized http object per worker thread, as httplib2 objects are not thread-safe:
+    https://docs.iterative.ai/PyDrive2/pydrive2/#pydrive2.auth.GoogleAuth.Get_Http_Object
+
+Each file is first downloaded into a <file>.part file in chunks using HTTP Range
+requests, so an interrupted run resumes from where it stopped. Files whose local copy
+already matches the size and md5Checksum reported by Drive are skipped.
+
+Folder listings request only the fields needed (via a `fields` mask), stream through all
+the result pages, and are cached by path for the rest of the run:
+    https://developers.google.com/drive/api/guides/fields-parameter
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from slogger.loguru_backend import logger
+
+DRIVE_API_URL = "https://www.googleapis.com/drive/v2/files"
+DOWNLOAD_FIELDS = "id,title,fileSize,md5Checksum"
+CHUNK_SIZE = 8 * 1024 * 1024  # 8MB per Range request
+PART_SUFFIX = ".part"
+MAX_WORKERS = 8
+MAX_RETRIES = 5
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+LIST_FIELDS = "id,title,mimeType,createdDate,fileSize,md5Checksum,lastModifyingUser/emailAddress"
+LIST_PAGE_SIZE = 1000  # max allowed by Drive API v2
+
+_thread_local = threading.local()
+_listing_cache = dict()  # (folder id, fields) -> list of children metadata
+_path_cache = {"": "root"}  # absolute path in Drive -> id
+
+
+def get_http(drive):
+    """Get an authorized http object for the current thread (created on first use)."""
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = drive.auth.Get_Http_Object()
+        _thread_local.http = http
+    return http
+
+
+def request_with_retry(http, url: str, headers: dict = None, retries=MAX_RETRIES):
+    """
+    Perform a GET request, retrying with exponential backoff on transient errors.
+
+    :return: the response and content of the request
+    """
+    for attempt in range(retries + 1):
+        try:
+            resp, content = http.request(url, method="GET", headers=headers)
+        except (ConnectionError, TimeoutError, OSError) as e:
+            if attempt == retries:
+                raise
+            logger.debug(f"Request to {url} failed ({e}); retrying...")
+        else:
+            if int(resp.status) not in RETRY_STATUS or attempt == retries:
+                return resp, content
+            logger.debug(f"Request to {url} got status {resp.status}; retrying...")
+        time.sleep(2**attempt)
+
+
+def get_file_metadata(drive, file_id: str, fields=DOWNLOAD_FIELDS) -> dict:
+    """Fetch only the given metadata fields of a Drive file."""
+    resp, content = request_with_retry(
+        get_http(drive), f"{DRIVE_API_URL}/{file_id}?fields={fields}"
+    )
+    if int(resp.status) != 200:
+        raise Exception(
+            f"Cannot get metadata of file {file_id}: {resp.status} {content[:200]}"
+        )
+    return json.loads(content)
+
+
+def md5_file(path: str, chunk_size=CHUNK_SIZE) -> str:
+    """Compute the md5 hex digest of a local file."""
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def is_same_file(path: str, meta: dict) -> bool:
+    """Check if the local file matches the size and md5Checksum of the Drive file."""
+    if not os.path.isfile(path) or "md5Checksum" not in meta:
+        return False
+    if "fileSize" in meta and os.path.getsize(path) != int(meta["fileSize"]):
+        return False
+    return md5_file(path) == meta["md5Checksum"]
+
+
+def download_file(drive, file_id: str, dest_file: str, meta: dict = None) -> str:
+    """
+    Download a Drive file into dest_file, resuming any previous partial download.
+
+    :param drive: the authenticated GoogleDrive instance
+    :param file_id: the id of the file in Google Drive
+    :param dest_file: the local file to save the content to
+    :param meta: the file metadata (fileSize, md5Checksum), if already known
+    :return: "skipped" if the local copy was already up to date, "downloaded" otherwise
+    """
+    if meta is None:
+        meta = get_file_metadata(drive, file_id)
+    if is_same_file(dest_file, meta):
+        return "skipped"
+
+    http = get_http(drive)
+    url = f"{DRIVE_API_URL}/{file_id}?alt=media"
+    part_file = dest_file + PART_SUFFIX
+    total = int(meta["fileSize"]) if "fileSize" in meta else None
+
+    offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+    if total is not None and offset > total:  # stale partial file, start again
+        offset = 0
+    with open(part_file, "ab" if offset > 0 else "wb") as f:
+        while total is None or offset < total:
+            end = offset + CHUNK_SIZE - 1
+            resp, content = request_with_retry(
+                http, url, headers={"Range": f"bytes={offset}-{end}"}
+            )
+            status = int(resp.status)
+            if status == 416:  # nothing left to get (e.g., empty file)
+                break
+            if status not in (200, 206):
+                raise Exception(f"Cannot download file {file_id}: {status}")
+            if status == 200:  # server ignored the range: full content received
+                f.seek(0)
+                f.truncate()
+                f.write(content)
+                break
+            f.write(content)
+            offset += len(content)
+            if total is None or len(content) == 0:
+                # size unknown (or nothing returned): stop when a short chunk arrives
+                if len(content) < CHUNK_SIZE:
+                    break
+
+    if "md5Checksum" in meta and md5_file(part_file) != meta["md5Checksum"]:
+        os.remove(part_file)
+        raise Exception(f"Checksum mismatch when downloading file {file_id}")
+    os.replace(part_file, dest_file)
+    return "downloaded"
+
+
+def download_files(drive, jobs, max_workers=MAX_WORKERS) -> list[dict]:
+    """
+    Download many Drive files concurrently with a pool of worker threads.
+
+    Jobs can be given as a list or streamed from a generator: each job is handed to the
+    workers as soon as it is produced.
+
+    Each job is a dictionary with keys:
+        - id: the Google Drive id of the file
+        - folder: the local folder where the file is to be saved (created if needed)
+        - name: the local file name (optional, defaults to the Drive title)
+        - meta: the file metadata (title, fileSize, md5Checksum), if already known (optional)
+        - label: a name to report the job with, e.g., the email of the student (optional)
+
+    :return: the list of jobs, each extended with keys path, status (downloaded, skipped, failed)
+            and error (if failed)
+    """
+    def process(job: dict) -> dict:
+        meta = job.get("meta")
+        if meta is None or "fileSize" not in meta:
+            meta = get_file_metadata(drive, job["id"])
+        os.makedirs(job["folder"], exist_ok=True)
+        job["path"] = os.path.join(job["folder"], job.get("name") or meta["title"])
+        job["status"] = download_file(drive, job["id"], job["path"], meta)
+        return job
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process, job): job for job in jobs}
+        no_jobs = len(futures)
+        for k, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            label = job.get("label", job["id"])
+            try:
+                future.result()
+                logger.info(
+                    f"Submission {k}/{no_jobs} for {label} {job['status'].upper()}: {job['path']}"
+                )
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                logger.error(
+                    f"Submission {k}/{no_jobs} for {label} FAILED: https://drive.google.com/open?id={job['id']} - {e}"
+                )
+
+    return list(futures.values())
+
+
+def iter_children(drive, folder_id: str, fields=LIST_FIELDS, page_size=LIST_PAGE_SIZE):
+    """
+    Stream the (non-trashed) children of a Drive folder, page by page.
+
+    :param drive: the authenticated GoogleDrive instance
+    :param folder_id: the id of the parent folder
+    :param fields: the fields of each file to retrieve
+    :param page_size: the number of files to get per request
+    :return: a generator of the children files, each with only the given fields
+    """
+    params = {
+        "q": f"'{folder_id}' in parents and trashed=false",
+        "fields": f"nextPageToken,items({fields})",
+        "maxResults": page_size,
+    }
+    for page in drive.ListFile(params):
+        yield from page
+
+
+def list_children(drive, folder_id: str, fields=LIST_FIELDS, use_cache=True) -> list:
+    """Get all children of a Drive folder, caching the listing for the rest of the run."""
+    key = (folder_id, fields)
+    if not use_cache or key not in _listing_cache:
+        _listing_cache[key] = list(iter_children(drive, folder_id, fields))
+    return _listing_cache[key]
+
+
+def get_id_by_path(drive, path: str) -> str:
+    """
+    Given an absolute path in Drive (e.g., "assessments/submissions/p0"), get its id.
+
+    Each folder in the path is listed once (id, title, mimeType only) and every resolved
+    prefix of the path is cached, so paths under the same folder resolve without requests.
+
+    :param drive: the authenticated GoogleDrive instance
+    :param path: the path to be resolved
+    :return: the id of the innermost component
+    """
+    pieces = [p for p in path.strip("/").split("/") if p]
+
+    # start from the longest prefix already resolved
+    k = len(pieces)
+    while "/".join(pieces[:k]) not in _path_cache:
+        k -= 1
+    cur_id = _path_cache["/".join(pieces[:k])]
+
+    for i in range(k, len(pieces)):
+        target = pieces[i]
+        children = list_children(drive, cur_id, fields="id,title,mimeType")
+        match = next((f for f in children if f["title"] == target), None)
+        if match is None:
+            raise Exception(f"Directory not found: {target}")
+        if i < len(pieces) - 1 and match["mimeType"] != FOLDER_MIME_TYPE:
+            raise Exception(f"File encountered where a directory was expected: {target}")
+        cur_id = match["id"]
+        _path_cache["/".join(pieces[: i + 1])] = cur_id
+
+    return cur_id
+
+
+def column_index(column: str) -> int:
+    """Convert a spreadsheet column letter (A, B, ..., Z, AA, ...) into a 0-based index."""
+    index = 0
+    for c in column.strip().upper():
+        index = index * 26 + (ord(c) - ord("A") + 1)
+    return index - 1
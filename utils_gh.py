@@ -1,6 +1,10 @@
 import os
+import re
 import sys
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 from github import Github, Auth
@@ -12,6 +16,14 @@ from slogger.loguru_backend import logger
 
 TOKEN = None  # set in main
 
+# REST API root; GITHUB_API_URL (as set in GitHub Actions) points scripts to another server,
+# e.g., a GitHub Enterprise Server (https://HOST/api/v3) or benchmarks/fake_github.py
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GRAPHQL_URL = re.sub(r"/v3$", "", API_URL) + "/graphql"
+
+MAX_WORKERS = 8  # default number of concurrent workers for bulk operations
+RETRY_BACKOFF = 2  # base seconds to wait between retries (doubles each time)
+
 
 def get_token(token_str: str, token_file: str) -> str:
     if token_str:
@@ -40,7 +52,7 @@ def open_gitHub(token: str) -> Github:
 
     if token:
         auth = Auth.Token(token)
-        g = Github(auth=auth)
+        g = Github(auth=auth, base_url=API_URL)
     else:
         raise Exception("❌ No authentication provided, quitting....")
 
@@ -140,6 +152,73 @@ def get_subscription(g: Github, thread_id: str) -> dict:
     return data
 
 
+class GraphQLError(Exception):
+    """
+    A failed GraphQL request, with the HTTP status of the response (200 if the request went
+    through but the query failed as a whole, e.g., rate limited) and its GraphQL error type.
+    """
+
+    def __init__(self, message, status: int, error_type: str = None, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.error_type = error_type
+        self.headers = headers or {}
+
+
+def is_rate_limited(status: int, headers, message: str) -> bool:
+    """
+    Whether a 403/429 response is a (primary or secondary) rate limit, and not a permission
+    denial: https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+    """
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    return (
+        headers.get("x-ratelimit-remaining") == "0"
+        or "retry-after" in headers
+        or "rate limit" in (message or "").lower()
+    )
+
+
+def is_transient_error(e: Exception) -> bool:
+    """Errors worth retrying: server errors, rate limits and network issues."""
+    if isinstance(e, GithubException):
+        return e.status >= 500 or is_rate_limited(e.status, e.headers, str(e))
+    if isinstance(e, GraphQLError):
+        return e.error_type == "RATE_LIMITED" or e.status >= 500 or is_rate_limited(e.status, e.headers, str(e))
+    return isinstance(e, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+
+def call_with_retry(func, *args, retries=3, backoff=RETRY_BACKOFF, is_transient=is_transient_error, **kwargs):
+    """Call func(*args, **kwargs), retrying with exponential backoff on transient errors."""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            wait = backoff * 2**attempt
+            logger.warning(f"Transient error ({e}); retrying in {wait}s...")
+            time.sleep(wait)
+
+
+def run_concurrently(func, items, max_workers=MAX_WORKERS):
+    """
+    Apply func to each item with a bounded pool of worker threads.
+
+    :return: a generator of (item, result, exception) as each call completes
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
 #######################################
 # GitHub GraphQL API helper functions
 #######################################
@@ -150,14 +229,47 @@ def run_query(query, variables=None):
     https://docs.github.com/en/graphql/overview/about-the-graphql-api
     """
     HEADERS = {"Authorization": f"bearer {TOKEN}"}
-    URL = "https://api.github.com/graphql"
 
     query = {"query": query, "variables": variables}
-    response = requests.post(URL, json=query, headers=HEADERS)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise Exception(f"Query failed: {response.status_code}. {response.text}")
+    response = requests.post(GRAPHQL_URL, json=query, headers=HEADERS)
+    if response.status_code != 200:
+        raise GraphQLError(
+            f"Query failed: {response.status_code}. {response.text}", response.status_code, headers=response.headers
+        )
+    result = response.json()
+    # a rate-limited query fails as a whole (no data), but still with status 200
+    for e in result.get("errors") or []:
+        if e.get("type") == "RATE_LIMITED":
+            raise GraphQLError(f"Query failed: {e.get('message')}", 200, "RATE_LIMITED", response.headers)
+    return result
+
+
+def iter_query_pages(query, variables, get_connection):
+    """
+    Run a paginated GraphQL query, following the cursor until there are no more pages.
+    The query must take a `$cursor: String` variable, used as `after: $cursor` in the
+    connection to paginate, and request `pageInfo { hasNextPage endCursor }` in it.
+    A `cursor` given in the variables is used as the starting page.
+
+    Errors on parts of the result (e.g., a field the token cannot see, which comes back null)
+    are logged and the partial data is still used; only a result with no data at all fails.
+
+    :param get_connection: function extracting the connection from the result data
+    :return: a generator of the nodes of each page
+    """
+    variables = dict(variables or {})
+    variables.setdefault("cursor", None)
+    while True:
+        result = run_query(query, variables)
+        if result.get("data") is None:
+            raise GraphQLError(f"Query failed: {result.get('errors')}", 200)
+        for e in result.get("errors") or []:
+            logger.warning(f"Query partially failed at {e.get('path')}: {e.get('message')}")
+        connection = get_connection(result["data"])
+        yield from connection["nodes"]
+        if not connection["pageInfo"]["hasNextPage"]:
+            break
+        variables["cursor"] = connection["pageInfo"]["endCursor"]
 
 
 def get_repository_node_id(owner, name):
@@ -171,36 +283,146 @@ def get_repository_node_id(owner, name):
     return result["data"]["repository"]["id"]
 
 
+def chunks(items: list, size: int) -> list[list]:
+    """Split a list into consecutive chunks of (at most) the given size."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def run_aliased(operation: str, field: str, var_types: dict, items: list[dict]) -> list:
+    """
+    Run the same GraphQL field for many items in a single request, using one alias per item.
+
+    For example, to transfer two issues in one request:
+
+        run_aliased("mutation",
+                    "transferIssue(input: {issueId: $issue, repositoryId: $repo}) { issue { url } }",
+                    {"issue": "ID!", "repo": "ID!"},
+                    [{"issue": id1, "repo": repo_id}, {"issue": id2, "repo": repo_id}])
+
+    :param operation: "query" or "mutation"
+    :param field: the field (with its selection) to run, using $variables from var_types
+    :param var_types: GraphQL type of each variable used in field
+    :param items: the variables for each item
+    :return: list of (data, error) for each item, in the same order as items
+    """
+    if not items:
+        return []
+    var_defs, fields, variables = [], [], {}
+    for k, item in enumerate(items):
+        for name, gql_type in var_types.items():
+            var_defs.append(f"${name}_{k}: {gql_type}")
+            variables[f"{name}_{k}"] = item[name]
+        fields.append(
+            f"a{k}: " + re.sub(r"\$(\w+)", lambda m: f"${m.group(1)}_{k}", field)
+        )
+    query = f"{operation}({', '.join(var_defs)}) {{\n" + "\n".join(fields) + "\n}"
+    result = run_query(query, variables)
+
+    data = result.get("data") or {}
+    errors = dict()
+    for e in result.get("errors", []):
+        alias = (e.get("path") or ["*"])[0]
+        errors.setdefault(alias, e.get("message"))
+    return [
+        (data.get(f"a{k}"), errors.get(f"a{k}", errors.get("*")))
+        for k in range(len(items))
+    ]
+
+
+TAG_BATCH_SIZE = 50  # repos per GraphQL query when looking up tags
+TAG_TARGET_FIELDS = """
+target {
+    ... on Commit { oid authoredDate committedDate author { name } }
+    ... on Tag {
+        tagger { date }
+        target { ... on Commit { oid authoredDate committedDate author { name } } }
+    }
+}
+"""
+TAG_FIELD = f"""
+repository(owner: $owner, name: $name) {{
+    ref(qualifiedName: $ref) {{ {TAG_TARGET_FIELDS} }}
+}}
+"""
+
+
+def parse_tag_ref(ref: dict, tag: str) -> dict:
+    """
+    Get the tag info out of a tag ref queried with TAG_TARGET_FIELDS.
+
+    :return: None if there is no ref, otherwise a dictionary with keys sha, author,
+        authored_date, committed_date and tagged_date (or with key error only)
+    """
+    if ref is None:
+        return None
+    target, tagged_date = ref["target"], None
+    if "tagger" in target:  # annotated tag: get the commit it points to
+        tagged_date = (target["tagger"] or {}).get("date")
+        target = target["target"]
+    if not target or "oid" not in target:  # tag of something else than a commit
+        return {"error": f"tag {tag} does not point to a commit"}
+    return {
+        "sha": target["oid"],
+        "author": (target["author"] or {}).get("name"),
+        "authored_date": datetime.fromisoformat(target["authoredDate"]),
+        "committed_date": datetime.fromisoformat(target["committedDate"]),
+        "tagged_date": tagged_date and datetime.fromisoformat(tagged_date),
+    }
+
+
+def get_tag_commits(repo_names: list[str], tag: str, batch_size=TAG_BATCH_SIZE) -> dict:
+    """
+    Look up a tag in many repos, many repos per GraphQL query, via `ref(qualifiedName: "refs/tags/<tag>")`.
+
+    Only the tag ref is resolved: no tag listing is paged through. Annotated tags are
+    followed to the commit they point to.
+
+    :param repo_names: full names of the repos (owner/name)
+    :param tag: the name of the tag
+    :return: dictionary repo name -> tag info, None if the repo has no such tag. Tag info is a
+        dictionary with keys sha, author, authored_date and committed_date (of the commit
+        tagged) and tagged_date (date of an annotated tag, None for lightweight tags), or
+        with key error only if the repo could not be queried.
+    """
+    var_types = {"owner": "String!", "name": "String!", "ref": "String!"}
+    tags = dict()
+    for batch in chunks(repo_names, batch_size):
+        items = []
+        for repo_name in batch:
+            owner, name = repo_name.split("/")
+            items.append({"owner": owner, "name": name, "ref": f"refs/tags/{tag}"})
+        results = call_with_retry(run_aliased, "query", TAG_FIELD, var_types, items)
+        # each aliased result is the repository itself (None if not found)
+        for repo_name, (data, error) in zip(batch, results):
+            if data is None:
+                tags[repo_name] = {"error": error or "repository not found"}
+            else:
+                tags[repo_name] = parse_tag_ref(data["ref"], tag)
+    return tags
+
+
 def get_issues(owner, name, closed=False):
-    """Fetches a list of all open issue Node IDs from the source repo."""
-    if not closed:
-        query = """
-        query($owner: String!, $name: String!) {
-        repository(owner: $owner, name: $name) {
-            issues(states: OPEN, first: 100) {
-            nodes {
-                id
-                number
-                title
-            }
-            }
-        }
-        }
-        """
-    else:
-        query = """
-        query($owner: String!, $name: String!) {
-        repository(owner: $owner, name: $name) {
-            issues(first: 100) {
-            nodes {
-                id
-                number
-                title
-                state
-            }
-            }
-        }
-        }
-        """
-    result = run_query(query, {"owner": owner, "name": name})
-    return result["data"]["repository"]["issues"]["nodes"]
+    """Fetches the list of all open (or all, if closed is True) issues from a repo, following pagination."""
+    states = "" if closed else "states: OPEN, "
+    query = f"""
+    query($owner: String!, $name: String!, $cursor: String) {{
+    repository(owner: $owner, name: $name) {{
+        issues({states}first: 100, after: $cursor) {{
+        pageInfo {{ hasNextPage endCursor }}
+        nodes {{
+            id
+            number
+            title
+            state
+        }}
+        }}
+    }}
+    }}
+    """
+    return list(
+        iter_query_pages(
+            query,
+            {"owner": owner, "name": name},
+            lambda data: data["repository"]["issues"],
+        )
+    )
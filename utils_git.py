@@ -0,0 +1,153 @@
+"""
+Fast git helpers for the git_xxx.py scripts, for the operations done on every repo.
+
+Instead of building GitPython objects (a Repo, plus a TagReference for every tag in the
+repo just to find one), the info of many refs of a repo is read at once:
+
+    - with pygit2 (libgit2 bindings), if installed: no subprocess at all;
+        python -m pip install pygit2
+    - otherwise, with a single `git cat-file --batch` process per call, that resolves each
+      ref and reads its commit (and tag object, if annotated):
+        https://git-scm.com/docs/git-cat-file#_batch_output
+
+Refs are given as for util.get_tag_info(): "head" for the current HEAD, otherwise the name
+of a tag, which is resolved directly as refs/tags/<name>.
+"""
+import subprocess
+from datetime import datetime
+
+from util import TIMEZONE
+
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+
+def _qualify(ref: str) -> str:
+    """Full name of a ref: HEAD for "head", refs/tags/<ref> for a tag name."""
+    if ref == "head":
+        return "HEAD"
+    if ref.startswith("refs/"):
+        return ref
+    return f"refs/tags/{ref}"
+
+
+def _object_time(content: bytes, field: bytes) -> int:
+    """Get the timestamp of the committer/tagger line of a raw commit/tag object."""
+    for line in content.split(b"\n"):
+        if line.startswith(field + b" "):
+            return int(line.rsplit(b" ", 2)[1])
+        if not line:  # end of headers, message follows
+            break
+    return None
+
+
+def _cat_file_batch(repo_dir: str, names: list[str]) -> list:
+    """
+    Read many objects with a single `git cat-file --batch` process.
+
+    :return: for each name, (sha, type, content) or None if it does not exist
+    """
+    stdin = "".join(f"{name}\n" for name in names).encode()
+    output = subprocess.run(
+        ["git", "-C", repo_dir, "cat-file", "--batch"],
+        input=stdin,
+        capture_output=True,
+        check=True,
+    ).stdout
+
+    objects, pos = [], 0
+    for _ in names:
+        end = output.index(b"\n", pos)
+        header = output[pos:end].split(b" ")
+        pos = end + 1
+        if header[-1] == b"missing" or header[-1] == b"ambiguous":
+            objects.append(None)
+            continue
+        sha, obj_type, size = header[0].decode(), header[1].decode(), int(header[2])
+        objects.append((sha, obj_type, output[pos : pos + size]))
+        pos += size + 1  # content is followed by a newline
+    return objects
+
+
+def _refs_info_git(repo_dir: str, refs: list[str]) -> dict:
+    """Info of many refs with git cat-file: each ref is read as is and peeled to its commit."""
+    names = []
+    for ref in refs:
+        names += [_qualify(ref), f"{_qualify(ref)}^{{commit}}"]
+    objects = _cat_file_batch(repo_dir, names)
+
+    info = dict()
+    for k, ref in enumerate(refs):
+        obj, commit = objects[2 * k], objects[2 * k + 1]
+        if obj is None or commit is None:
+            info[ref] = (None, None, None)
+            continue
+        commit_time = datetime.fromtimestamp(_object_time(commit[2], b"committer"), tz=TIMEZONE)
+        tagged_time = commit_time  # lightweight tags (and HEAD) have no date of their own
+        if obj[1] == "tag":
+            tagger_time = _object_time(obj[2], b"tagger")
+            if tagger_time is not None:
+                tagged_time = datetime.fromtimestamp(tagger_time, tz=TIMEZONE)
+        info[ref] = (commit_time, commit[0], tagged_time)
+    return info
+
+
+def _refs_info_pygit2(repo_dir: str, refs: list[str]) -> dict:
+    """Info of many refs with pygit2."""
+    repo = pygit2.Repository(repo_dir)
+    info = dict()
+    for ref in refs:
+        try:
+            obj = repo.revparse_single(_qualify(ref))
+        except (KeyError, ValueError):
+            info[ref] = (None, None, None)
+            continue
+        commit = obj.peel(pygit2.Commit)
+        commit_time = datetime.fromtimestamp(commit.commit_time, tz=TIMEZONE)
+        tagged_time = commit_time
+        if isinstance(obj, pygit2.Tag) and obj.tagger is not None:
+            tagged_time = datetime.fromtimestamp(obj.tagger.time, tz=TIMEZONE)
+        info[ref] = (commit_time, str(commit.id), tagged_time)
+    return info
+
+
+def get_refs_info(repo_dir: str, refs: list[str]) -> dict:
+    """
+    Returns the information of many refs (tags or "head") of a repo at once.
+
+    :param repo_dir: the folder of the repository
+    :param refs: the refs: "head" or tag names
+    :return: dictionary ref -> (commit time, commit sha, time it was tagged), as
+        util.get_tag_info(); (None, None, None) for refs that do not exist
+    """
+    if pygit2 is not None:
+        return _refs_info_pygit2(repo_dir, refs)
+    return _refs_info_git(repo_dir, refs)
+
+
+def get_ref_info(repo_dir: str, tag_str="head"):
+    """
+    Returns the information of a tag in a repo. By default the head
+
+    :param repo_dir: the folder of the repository
+    :param tag_str: the tag in the repo
+    :return: the tag's commit time, the tag's commit sha, the time it was tagged
+    """
+    return get_refs_info(repo_dir, [tag_str])[tag_str]
+
+
+def count_commits(repo_dir: str, ref="head") -> int:
+    """Number of commits reachable from a ref ("head" or a tag name)."""
+    if pygit2 is not None:
+        repo = pygit2.Repository(repo_dir)
+        commit = repo.revparse_single(_qualify(ref)).peel(pygit2.Commit)
+        return sum(1 for _ in repo.walk(commit.id))
+    output = subprocess.run(
+        ["git", "-C", repo_dir, "rev-list", "--count", _qualify(ref)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return int(output)
@@ -0,0 +1,319 @@
+"""
+Run-scoped timing instrumentation, to see where the time of a run goes.
+
+When enabled, it times every:
+    - API call: any HTTP request made with requests (used by PyGithub and the GraphQL
+      helpers in utils_gh), counted per endpoint (e.g., GET /repos/{repo}/actions/runs)
+      and per repo, keeping track of the rate-limit quota used from the response headers;
+    - git operation: git run via subprocess.run() or GitPython;
+    - sleep: any time.sleep().
+
+At the end of the run, a summary (count, total, p50/p95/max latency per category and
+endpoint, total sleep time, quota used, time not accounted for) is logged and written to
+a JSON file run-stats-<script>-<NOW>.json.
+
+It is enabled for any script by setting environment variable RUN_STATS (checked when util
+is imported), with no change to the scripts. Setting RUN_PROFILE to a file also dumps a
+profile of the run into it: an HTML report via pyinstrument if the file ends in .html (and
+pyinstrument is installed), or cProfile stats otherwise (to inspect with snakeviz or pstats):
+
+    $ RUN_STATS=1 python gh_workflow.py ...
+    $ RUN_STATS=1 RUN_PROFILE=clone.prof python git_clone_submissions.py ...
+
+Other sections of code can be timed explicitly with the timed() context manager:
+
+    with utils_prof.timed("render", "report"):
+        ...
+"""
+import atexit
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+from util import NOW_TXT
+
+STATS_FILE = "run-stats-{script}-{now}.json"
+
+_lock = threading.Lock()
+_stats = {
+    "timings": dict(),  # category -> list of durations
+    "endpoints": dict(),  # category, endpoint -> list of durations
+    "repos": dict(),  # repo -> number of API calls
+    "errors": dict(),  # HTTP status >= 400 -> count
+    "quota": dict(),  # rate-limit resource -> {"used", "remaining", "reset"}
+}
+_enabled = False
+_start = None
+_profiler = None
+_profile_file = None
+_git_local = threading.local()  # to time nested GitPython calls (e.g., fetch -> execute) once
+
+
+def record(category: str, duration: float, endpoint: str = None):
+    """Record the duration (in seconds) of an operation of a category (api, git, sleep, ...)."""
+    with _lock:
+        _stats["timings"].setdefault(category, []).append(duration)
+        if endpoint is not None:
+            _stats["endpoints"].setdefault((category, endpoint), []).append(duration)
+
+
+@contextmanager
+def timed(category: str, endpoint: str = None):
+    """Time the enclosed block of code under a category (and endpoint/name)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(category, time.perf_counter() - start, endpoint)
+
+
+#######################################
+# API calls
+#######################################
+def api_endpoint(method: str, url: str) -> tuple:
+    """
+    Normalize a request into its endpoint, e.g., GET /repos/{repo}/actions/runs/{id}/jobs.
+
+    :return: the endpoint and the repo (owner/name) it is about (None if none)
+    """
+    path = urlparse(url).path
+    repo = None
+    match = re.match(r"/repos/([^/]+/[^/]+)", path)
+    if match:
+        repo = match.group(1)
+        path = "/repos/{repo}" + path[match.end():]
+    path = re.sub(r"^/(org|user)s/[^/]+", r"/\1s/{\1}", path)
+    path = re.sub(r"/[0-9a-f]{40}(?=/|$)", "/{sha}", path)
+    path = re.sub(r"/\d+(?=/|$)", "/{id}", path)
+    return f"{method} {path}", repo
+
+
+def _record_quota(response):
+    """Keep track of the rate-limit quota used, from the headers of a response."""
+    headers = response.headers
+    if "X-RateLimit-Remaining" not in headers:
+        return
+    resource = headers.get("X-RateLimit-Resource", "core")
+    remaining = int(headers["X-RateLimit-Remaining"])
+    reset = headers.get("X-RateLimit-Reset")
+    with _lock:
+        quota = _stats["quota"].get(resource)
+        if quota is None:
+            _stats["quota"][resource] = {"used": 1, "remaining": remaining, "reset": reset}
+            return
+        if quota["reset"] == reset:
+            # decrease since last response (concurrent responses may arrive out of order)
+            quota["used"] += max(quota["remaining"] - remaining, 0)
+            quota["remaining"] = min(quota["remaining"], remaining)
+        else:  # a new rate-limit window started
+            quota["used"] += int(headers.get("X-RateLimit-Used", 1))
+            quota["remaining"], quota["reset"] = remaining, reset
+
+
+_session_send = requests.Session.send
+
+
+def _timed_send(self, request, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = _session_send(self, request, **kwargs)
+    finally:
+        endpoint, repo = api_endpoint(request.method, request.url)
+        record("api", time.perf_counter() - start, endpoint)
+        if repo is not None:
+            with _lock:
+                _stats["repos"][repo] = _stats["repos"].get(repo, 0) + 1
+    _record_quota(response)
+    if response.status_code >= 400:
+        with _lock:
+            _stats["errors"][response.status_code] = _stats["errors"].get(response.status_code, 0) + 1
+    return response
+
+
+#######################################
+# git operations and sleeps
+#######################################
+_subprocess_run = subprocess.run
+_sleep = time.sleep
+
+
+def _command_name(args) -> tuple:
+    """Category and name of a command, e.g., ("git", "git fetch")."""
+    if isinstance(args, str):
+        args = args.split()
+    args = [str(a) for a in args]
+    if not args:
+        return "subprocess", ""
+    program = os.path.basename(args[0])
+    # skip global git options (e.g., -C dir, --git-dir=...) to get the git command
+    sub = next((a for a in args[1:] if not a.startswith("-") and a not in _git_option_values(args)), "")
+    category = "git" if program == "git" else "subprocess"
+    return category, f"{program} {sub}".strip()
+
+
+def _git_option_values(args) -> set:
+    """Values of git options given as separate arguments (e.g., the dir in -C dir)."""
+    return {args[k + 1] for k, a in enumerate(args[:-1]) if a in ("-C", "-c")}
+
+
+def _timed_run(*args, **kwargs):
+    category, name = _command_name(args[0] if args else kwargs.get("args", []))
+    with timed(category, name):
+        return _subprocess_run(*args, **kwargs)
+
+
+def _timed_sleep(seconds):
+    with timed("sleep"):
+        _sleep(seconds)
+
+
+def _patch_gitpython():
+    """Time the git commands run via GitPython (repo.git.xxx(), clone, fetch, pull, push)."""
+    try:
+        import git
+    except ImportError:
+        return
+
+    def wrap(func, name):
+        def timed_func(*args, **kwargs):
+            if getattr(_git_local, "active", False):
+                return func(*args, **kwargs)
+            _git_local.active = True
+            try:
+                with timed("git", name(args)):
+                    return func(*args, **kwargs)
+            finally:
+                _git_local.active = False
+        return timed_func
+
+    git.cmd.Git.execute = wrap(git.cmd.Git.execute, lambda args: _command_name(args[1])[1] if len(args) > 1 else "git")
+    git.Repo.clone_from = classmethod(wrap(git.Repo.clone_from.__func__, lambda args: "git clone"))
+    for op in ["fetch", "pull", "push"]:
+        setattr(git.Remote, op, wrap(getattr(git.Remote, op), lambda args, op=op: f"git {op}"))
+
+
+#######################################
+# Summary
+#######################################
+def percentile(values: list, p: float) -> float:
+    """The p-th percentile (0-100) of a list of values, by nearest rank."""
+    values = sorted(values)
+    if not values:
+        return None
+    k = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[k]
+
+
+def describe(durations: list) -> dict:
+    """Count, total, p50, p95 and max of a list of durations (in seconds)."""
+    return {
+        "count": len(durations),
+        "total": round(sum(durations), 3),
+        "p50": round(percentile(durations, 50), 3),
+        "p95": round(percentile(durations, 95), 3),
+        "max": round(max(durations), 3),
+    }
+
+
+def summary() -> dict:
+    """Summary of the run so far."""
+    wall_time = time.perf_counter() - _start
+    with _lock:
+        categories = {c: describe(d) for c, d in _stats["timings"].items()}
+        endpoints = {
+            f"{category}: {endpoint}": describe(d)
+            for (category, endpoint), d in sorted(_stats["endpoints"].items(), key=lambda x: -sum(x[1]))
+        }
+        repos = dict(sorted(_stats["repos"].items(), key=lambda x: -x[1]))
+        quota = {r: {"used": q["used"], "remaining": q["remaining"]} for r, q in _stats["quota"].items()}
+        errors = dict(_stats["errors"])
+    accounted = sum(c["total"] for c in categories.values())
+    return {
+        "script": os.path.basename(sys.argv[0]),
+        "args": sys.argv[1:],
+        "wall_time": round(wall_time, 3),
+        # time not in any category: CPU work, rendering, logging (0 if concurrent work overlaps)
+        "other_time": round(max(wall_time - accounted, 0), 3),
+        "categories": categories,
+        "quota_used": quota,
+        "http_errors": errors,
+        "endpoints": endpoints,
+        "api_calls_per_repo": repos,
+    }
+
+
+def write_summary():
+    """Log the summary of the run and write it into a JSON file (plus the profile, if any)."""
+    from slogger.loguru_backend import logger
+
+    stats = summary()
+    script = os.path.splitext(stats["script"])[0] or "run"
+    stats_file = STATS_FILE.format(script=script, now=NOW_TXT)
+    with open(stats_file, "w") as f:
+        json.dump(stats, f, indent=4)
+
+    logger.info(f"Run stats: wall time {stats['wall_time']}s - other (CPU, rendering, ...) {stats['other_time']}s")
+    for category, c in stats["categories"].items():
+        logger.info(
+            f"{category}: {c['count']} calls, total {c['total']}s, p50 {c['p50']}s, p95 {c['p95']}s, max {c['max']}s",
+            depth=1,
+        )
+    for resource, q in stats["quota_used"].items():
+        logger.info(f"Quota used ({resource}): ~{q['used']} ({q['remaining']} remaining)", depth=1)
+    for endpoint, c in list(stats["endpoints"].items())[:10]:
+        logger.info(f"{endpoint}: {c['count']} calls, total {c['total']}s, p95 {c['p95']}s", depth=1)
+    logger.info(f"Run stats written to {stats_file}")
+
+    if _profiler is not None:
+        if hasattr(_profiler, "output_html"):  # pyinstrument
+            _profiler.stop()
+            with open(_profile_file, "w") as f:
+                f.write(_profiler.output_html())
+        else:
+            _profiler.disable()
+            _profiler.dump_stats(_profile_file)
+        logger.info(f"Profile written to {_profile_file}")
+
+
+def enable(profile_file: str = None):
+    """
+    Start instrumenting the run: patch requests, subprocess, time.sleep and GitPython, and
+    write the summary (and profile, if a file is given) at exit.
+    """
+    global _enabled, _start, _profiler, _profile_file
+    if _enabled:
+        return
+    _enabled = True
+    _start = time.perf_counter()
+
+    requests.Session.send = _timed_send
+    subprocess.run = _timed_run
+    time.sleep = _timed_sleep
+    _patch_gitpython()
+
+    if profile_file:
+        _profile_file = profile_file
+        if profile_file.endswith(".html"):
+            try:
+                from pyinstrument import Profiler
+
+                _profiler = Profiler()
+                _profiler.start()
+            except ImportError:  # no pyinstrument: cProfile stats in <file>.prof instead
+                _profile_file = os.path.splitext(profile_file)[0] + ".prof"
+        if _profiler is None:
+            import cProfile
+
+            _profiler = cProfile.Profile()
+            _profiler.enable()
+
+    atexit.register(write_summary)